@@ -0,0 +1,101 @@
+"""add identity_key a results/entries (+ class_key em entries) e índices compostos
+
+Identidade canónica classe + vela + país (app.utils.identity) persistida, para que
+entries elegíveis, apagar resultados de uma entry e duplicados de vela sejam
+lookups indexados em vez de lower()/trim() sobre todas as linhas da regata.
+
+Revision ID: a7b8c9d0e1f2
+Revises: c4e5f6a7b8d9
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a7b8c9d0e1f2"
+down_revision: Union[str, Sequence[str], None] = "c4e5f6a7b8d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH = 1000
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    return any(col["name"] == column_name for col in insp.get_columns(table_name))
+
+
+def _has_index(table_name: str, index_name: str) -> bool:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    return any(ix["name"] == index_name for ix in insp.get_indexes(table_name))
+
+
+# cópia de app.utils.identity (a migração não importa a app)
+def _class_key(class_name) -> str:
+    return str(class_name or "").strip().lower()
+
+
+def _identity_key(class_name, sail_number, boat_country_code) -> str:
+    sn = (str(sail_number) if sail_number is not None else "").strip().upper()
+    cc = (str(boat_country_code) if boat_country_code is not None else "").strip().upper()
+    return f"{_class_key(class_name)}|{sn}||{cc}"
+
+
+def _backfill(table_name: str, with_class_key: bool) -> None:
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(f"SELECT id, class_name, sail_number, boat_country_code FROM {table_name}")
+    ).fetchall()
+    sets = "identity_key = :identity_key" + (", class_key = :class_key" if with_class_key else "")
+    stmt = sa.text(f"UPDATE {table_name} SET {sets} WHERE id = :id")
+    params = []
+    for rid, cls, sn, cc in rows:
+        p = {"id": rid, "identity_key": _identity_key(cls, sn, cc)}
+        if with_class_key:
+            p["class_key"] = _class_key(cls)
+        params.append(p)
+    for i in range(0, len(params), _BATCH):
+        bind.execute(stmt, params[i : i + _BATCH])
+
+
+def upgrade() -> None:
+    if not _has_column("results", "identity_key"):
+        op.add_column("results", sa.Column("identity_key", sa.String(), nullable=True))
+    if not _has_column("entries", "class_key"):
+        op.add_column("entries", sa.Column("class_key", sa.String(), nullable=True))
+    if not _has_column("entries", "identity_key"):
+        op.add_column("entries", sa.Column("identity_key", sa.String(), nullable=True))
+
+    _backfill("results", with_class_key=False)
+    _backfill("entries", with_class_key=True)
+
+    if not _has_index("results", "ix_results_regatta_identity"):
+        op.create_index("ix_results_regatta_identity", "results", ["regatta_id", "identity_key"])
+    if not _has_index("results", "ix_results_race_identity"):
+        op.create_index("ix_results_race_identity", "results", ["race_id", "identity_key"])
+    if not _has_index("entries", "ix_entries_regatta_class_key"):
+        op.create_index("ix_entries_regatta_class_key", "entries", ["regatta_id", "class_key"])
+    if not _has_index("entries", "ix_entries_regatta_identity"):
+        op.create_index("ix_entries_regatta_identity", "entries", ["regatta_id", "identity_key"])
+
+
+def downgrade() -> None:
+    for table_name, index_name in (
+        ("entries", "ix_entries_regatta_identity"),
+        ("entries", "ix_entries_regatta_class_key"),
+        ("results", "ix_results_race_identity"),
+        ("results", "ix_results_regatta_identity"),
+    ):
+        if _has_index(table_name, index_name):
+            op.drop_index(index_name, table_name=table_name)
+    if _has_column("entries", "identity_key"):
+        op.drop_column("entries", "identity_key")
+    if _has_column("entries", "class_key"):
+        op.drop_column("entries", "class_key")
+    if _has_column("results", "identity_key"):
+        op.drop_column("results", "identity_key")
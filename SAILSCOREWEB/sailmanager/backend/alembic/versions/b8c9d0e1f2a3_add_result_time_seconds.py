@@ -0,0 +1,90 @@
+"""add results.finish_seconds / elapsed_seconds / corrected_seconds (tempos handicap numéricos)
+
+Os tempos continuam em texto (HH:MM:SS) para mostrar/exportar; os segundos ficam
+gravados ao lado para o ranking e a tabela de pace não voltarem a fazer parse.
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "b8c9d0e1f2a3"
+down_revision: Union[str, Sequence[str], None] = "a7b8c9d0e1f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH = 1000
+_TIME_COLUMNS = (
+    ("finish_time", "finish_seconds"),
+    ("elapsed_time", "elapsed_seconds"),
+    ("corrected_time", "corrected_seconds"),
+)
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    return any(col["name"] == column_name for col in insp.get_columns(table_name))
+
+
+# cópia de app.scoring.handicap.parse_time_to_seconds (a migração não importa a app)
+def _parse_time_to_seconds(s):
+    if not s or not isinstance(s, str):
+        return None
+    normalized = s.replace("\u200b", "").replace("\ufeff", "").replace("\xa0", " ").strip()
+    parts = normalized.split(":")
+    try:
+        if len(parts) == 3:
+            h, m, sec = int(parts[0]), int(parts[1]), float(parts[2])
+            if m < 0 or m >= 60 or sec < 0 or sec >= 60:
+                return None
+            return h * 3600 + m * 60 + sec
+        if len(parts) == 2:
+            m, sec = int(parts[0]), float(parts[1])
+            if m < 0 or sec < 0 or sec >= 60:
+                return None
+            return m * 60 + sec
+    except ValueError:
+        return None
+    return None
+
+
+def upgrade() -> None:
+    for _, seconds_col in _TIME_COLUMNS:
+        if not _has_column("results", seconds_col):
+            op.add_column("results", sa.Column(seconds_col, sa.Float(), nullable=True))
+
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(
+            "SELECT id, finish_time, elapsed_time, corrected_time FROM results "
+            "WHERE finish_time IS NOT NULL OR elapsed_time IS NOT NULL OR corrected_time IS NOT NULL"
+        )
+    ).fetchall()
+    stmt = sa.text(
+        "UPDATE results SET finish_seconds = :finish_seconds, elapsed_seconds = :elapsed_seconds, "
+        "corrected_seconds = :corrected_seconds WHERE id = :id"
+    )
+    params = [
+        {
+            "id": rid,
+            "finish_seconds": _parse_time_to_seconds(ft),
+            "elapsed_seconds": _parse_time_to_seconds(et),
+            "corrected_seconds": _parse_time_to_seconds(ct),
+        }
+        for rid, ft, et, ct in rows
+    ]
+    for i in range(0, len(params), _BATCH):
+        bind.execute(stmt, params[i : i + _BATCH])
+
+
+def downgrade() -> None:
+    for _, seconds_col in reversed(_TIME_COLUMNS):
+        if _has_column("results", seconds_col):
+            op.drop_column("results", seconds_col)
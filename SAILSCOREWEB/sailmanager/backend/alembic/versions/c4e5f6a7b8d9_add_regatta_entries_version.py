@@ -0,0 +1,41 @@
+"""add regattas.entries_version (cache do contexto de competidores por race)
+
+Revision ID: c4e5f6a7b8d9
+Revises: e0f1a2b3c4d5
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c4e5f6a7b8d9"
+down_revision: Union[str, Sequence[str], None] = "e0f1a2b3c4d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    return any(col["name"] == column_name for col in insp.get_columns(table_name))
+
+
+def upgrade() -> None:
+    if not _has_column("regattas", "entries_version"):
+        op.add_column(
+            "regattas",
+            sa.Column(
+                "entries_version",
+                sa.Integer(),
+                nullable=False,
+                server_default=sa.text("0"),
+            ),
+        )
+
+
+def downgrade() -> None:
+    if _has_column("regattas", "entries_version"):
+        op.drop_column("regattas", "entries_version")
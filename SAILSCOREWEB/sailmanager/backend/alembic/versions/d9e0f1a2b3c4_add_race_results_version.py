@@ -0,0 +1,53 @@
+"""add races.results_version + regattas.results_structure_version (incremental overall)
+
+Revision ID: d9e0f1a2b3c4
+Revises: c8d9e0f1a2b3
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "d9e0f1a2b3c4"
+down_revision: Union[str, Sequence[str], None] = "c8d9e0f1a2b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    return any(col["name"] == column_name for col in insp.get_columns(table_name))
+
+
+def upgrade() -> None:
+    if not _has_column("races", "results_version"):
+        op.add_column(
+            "races",
+            sa.Column(
+                "results_version",
+                sa.Integer(),
+                nullable=False,
+                server_default=sa.text("0"),
+            ),
+        )
+    if not _has_column("regattas", "results_structure_version"):
+        op.add_column(
+            "regattas",
+            sa.Column(
+                "results_structure_version",
+                sa.Integer(),
+                nullable=False,
+                server_default=sa.text("0"),
+            ),
+        )
+
+
+def downgrade() -> None:
+    if _has_column("regattas", "results_structure_version"):
+        op.drop_column("regattas", "results_structure_version")
+    if _has_column("races", "results_version"):
+        op.drop_column("races", "results_version")
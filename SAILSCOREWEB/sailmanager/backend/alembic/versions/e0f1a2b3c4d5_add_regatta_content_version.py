@@ -0,0 +1,48 @@
+"""add regattas.content_version + content_updated_at (ETag / conditional GET)
+
+Revision ID: e0f1a2b3c4d5
+Revises: d9e0f1a2b3c4
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "e0f1a2b3c4d5"
+down_revision: Union[str, Sequence[str], None] = "d9e0f1a2b3c4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_column(table_name: str, column_name: str) -> bool:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    return any(col["name"] == column_name for col in insp.get_columns(table_name))
+
+
+def upgrade() -> None:
+    if not _has_column("regattas", "content_version"):
+        op.add_column(
+            "regattas",
+            sa.Column(
+                "content_version",
+                sa.Integer(),
+                nullable=False,
+                server_default=sa.text("0"),
+            ),
+        )
+    if not _has_column("regattas", "content_updated_at"):
+        op.add_column(
+            "regattas",
+            sa.Column("content_updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    if _has_column("regattas", "content_updated_at"):
+        op.drop_column("regattas", "content_updated_at")
+    if _has_column("regattas", "content_version"):
+        op.drop_column("regattas", "content_version")
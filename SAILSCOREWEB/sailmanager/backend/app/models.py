@@ -12,6 +12,8 @@ from sqlalchemy.sql import func
 from sqlalchemy import BigInteger  # <-- adiciona
 
 from app.database import Base
+from app.scoring.handicap import parse_time_to_seconds
+from app.utils.identity import class_identity_key, identity_key
 
 
 
@@ -113,6 +115,20 @@ class Regatta(Base):
     discard_count = Column(Integer, nullable=False, default=0)
     discard_threshold = Column(Integer, nullable=False, default=4)
 
+    # Versão dos dados de pontuação; incrementada em cada commit que altera resultados/standings
+    # (ver app/services/standings_cache.py). Partilhada entre workers via DB.
+    results_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Só incrementada por escritas que mudam a "estrutura" do overall (races, settings, entries, fleets...).
+    # Se não mudou, o overall em cache pode ser atualizado apenas nas races alteradas.
+    results_structure_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Versão do conteúdo público (results, races, entries, notices, fleets, publicação) -> ETag
+    # dos GETs de polling (ver app/services/http_cache.py).
+    content_version = Column(Integer, nullable=False, default=0, server_default="0")
+    content_updated_at = Column(DateTime(timezone=True), nullable=True)
+    # Versão das entries / fleet sets / fleets / fleet assignments -> cache do contexto de
+    # competidores por race (ver app/services/competitor_cache.py).
+    entries_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     organization = relationship("Organization", back_populates="regattas")
     entries = relationship("Entry", back_populates="regatta", cascade="all, delete-orphan")
     results = relationship("Result", back_populates="regatta", cascade="all, delete-orphan")
@@ -242,6 +258,9 @@ class Entry(Base):
     boat_country = Column(String)
     boat_country_code = Column(String(3), nullable=True)  # ISO alpha-3, e.g. POR, GBR
     sail_number = Column(String, index=True)
+    # identidade canónica (app.utils.identity), mantida pelos listeners before_insert/update
+    class_key = Column(String, nullable=True)
+    identity_key = Column(String, nullable=True)
     bow_number = Column(String, nullable=True)  # número de proa (admin)
     boat_name = Column(String)
     boat_model = Column(String, nullable=True)  # ex: Beneteau First 36.7 (handicap)
@@ -295,9 +314,18 @@ class Entry(Base):
 
     __table_args__ = (
         Index("ix_entries_regatta_class", "regatta_id", "class_name"),
+        Index("ix_entries_regatta_class_key", "regatta_id", "class_key"),
+        Index("ix_entries_regatta_identity", "regatta_id", "identity_key"),
     )
 
 
+@sa.event.listens_for(Entry, "before_insert")
+@sa.event.listens_for(Entry, "before_update")
+def _entry_identity_columns(mapper, connection, target):
+    target.class_key = class_identity_key(target.class_name)
+    target.identity_key = identity_key(target.class_name, target.sail_number, target.boat_country_code)
+
+
 # =========================
 #   NOTICE ⟷ CLASS (M2M)
 # =========================
@@ -432,6 +460,8 @@ class Race(Base):
     handicap_method = Column(String(16), nullable=True, server_default="manual")
     # ORC: qual rating usar (low | medium | high)
     orc_rating_mode = Column(String(16), nullable=True)
+    # Incrementada quando os resultados DESTA race mudam (recompute incremental do overall)
+    results_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     regatta = relationship("Regatta", back_populates="races")
     results = relationship("Result", back_populates="race", cascade="all, delete-orphan")
@@ -457,6 +487,8 @@ class Result(Base):
     boat_country_code = Column(String(3), nullable=True)
     boat_name = Column(String, nullable=True)
     class_name = Column(String, nullable=False, index=True)
+    # identidade canónica (app.utils.identity), mantida pelos listeners before_insert/update
+    identity_key = Column(String, nullable=True)
     skipper_name = Column(String, nullable=True)
     position = Column(Integer, nullable=False)
     # Ordem de chegada (One Design); mantém-se ao aplicar OCS/DNF para restore por re-rank
@@ -475,6 +507,10 @@ class Result(Base):
     finish_day = Column(Integer, nullable=True)   # dia de chegada (provas multi-dia)
     elapsed_time = Column(String(32), nullable=True)
     corrected_time = Column(String(32), nullable=True)
+    # os mesmos tempos em segundos (parse de app.scoring.handicap), mantidos em cada set
+    finish_seconds = Column(Float, nullable=True)
+    elapsed_seconds = Column(Float, nullable=True)
+    corrected_seconds = Column(Float, nullable=True)
     delta = Column(String(32), nullable=True)
     notes = Column(Text, nullable=True)
 
@@ -484,9 +520,28 @@ class Result(Base):
     __table_args__ = (
         Index("ix_results_regatta_race_position", "regatta_id", "race_id", "position"),
         Index("ix_results_regatta_class", "regatta_id", "class_name"),
+        Index("ix_results_regatta_identity", "regatta_id", "identity_key"),
+        Index("ix_results_race_identity", "race_id", "identity_key"),
     )
 
 
+@sa.event.listens_for(Result, "before_insert")
+@sa.event.listens_for(Result, "before_update")
+def _result_identity_columns(mapper, connection, target):
+    target.identity_key = identity_key(target.class_name, target.sail_number, target.boat_country_code)
+
+
+def _keep_seconds_in_sync(time_attr, seconds_attr):
+    @sa.event.listens_for(time_attr, "set")
+    def _set_seconds(target, value, oldvalue, initiator):
+        setattr(target, seconds_attr, parse_time_to_seconds(value))
+
+
+_keep_seconds_in_sync(Result.finish_time, "finish_seconds")
+_keep_seconds_in_sync(Result.elapsed_time, "elapsed_seconds")
+_keep_seconds_in_sync(Result.corrected_time, "corrected_seconds")
+
+
 # =========================
 #     SAILOR PROFILE
 # =========================
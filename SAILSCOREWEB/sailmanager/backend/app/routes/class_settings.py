@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models
 from app.org_scope import assert_staff_regatta_access, assert_user_can_manage_org_id
+from app.services.standings_cache import mark_results_changed
 from utils.auth_utils import get_current_user
 
 router = APIRouter(tags=["Class Settings"])
@@ -156,6 +157,7 @@ def upsert_class_settings(
                 normalized[kk] = serialize_scoring_code_entry(pts, discardable)
             row.scoring_codes = normalized
 
+    mark_results_changed(db, regatta_id)
     db.commit()
     db.refresh(row)
 
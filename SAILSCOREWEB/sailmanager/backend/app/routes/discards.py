@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models
 from app.org_scope import assert_staff_regatta_access, assert_user_can_manage_org_id
+from app.services.standings_cache import mark_results_changed
 from utils.auth_utils import get_current_user
 
 router = APIRouter(prefix="/regattas", tags=["discards"])
@@ -165,6 +166,7 @@ def upsert_discard_schedule(
     setattr(row, "discard_schedule_active", bool(body.is_active))
     setattr(row, "discard_schedule_label", body.label)
 
+    mark_results_changed(db, regatta_id)
     db.commit()
 
     return {
@@ -201,5 +203,6 @@ def delete_discard_schedule(
     setattr(row, "discard_schedule_active", True)
     setattr(row, "discard_schedule_label", None)
 
+    mark_results_changed(db, regatta_id)
     db.commit()
     return {"ok": True}
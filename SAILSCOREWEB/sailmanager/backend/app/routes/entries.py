@@ -30,6 +30,8 @@ from app.services.online_entry_fields import (
     resolve_class_context,
     validate_online_entry_fields,
 )
+from app.services.http_cache import conditional_get
+from app.utils.identity import identity_key as competitor_identity_key
 from app.utils.sail_number import (
     SAIL_NUMBER_MAX_LEN,
     extract_sail_digits,
@@ -39,6 +41,9 @@ from app.utils.sail_number import (
 )
 from app.routes.results_utils import (
     delete_results_for_entry,
+    lock_entries_races_for_write,
+    refresh_identity_keys,
+    sync_entries_results_eligibility,
     sync_entry_results_eligibility,
 )
 
@@ -283,27 +288,48 @@ def _entry_duplicate_sail(
     """True se já existir outra entry na mesma regata+classe com o mesmo country code + sail number."""
     if not (class_name and (sail_number or "").strip()):
         return False
-    code = _norm_country_code(boat_country_code)
     sail_cmp = extract_sail_digits(sail_number) or (sail_number or "").strip()
-    q = (
-        db.query(models.Entry.id)
-        .filter(models.Entry.regatta_id == regatta_id)
-        .filter(func.lower(func.trim(models.Entry.class_name)) == func.lower(class_name.strip()))
-        .filter(func.lower(func.trim(models.Entry.sail_number)) == func.lower(sail_cmp))
+    # índice (regatta_id, identity_key)
+    q = db.query(models.Entry.id).filter(
+        models.Entry.regatta_id == regatta_id,
+        models.Entry.identity_key == competitor_identity_key(class_name, sail_cmp, boat_country_code),
     )
-    if code:
-        q = q.filter(func.upper(func.trim(models.Entry.boat_country_code)) == code)
-    else:
-        q = q.filter(
-            or_(
-                models.Entry.boat_country_code.is_(None),
-                func.trim(models.Entry.boat_country_code) == "",
-            )
-        )
     if exclude_entry_id is not None:
         q = q.filter(models.Entry.id != exclude_entry_id)
     return q.first() is not None
 
+
+def _entries_with_duplicate_sail(
+    db: Session,
+    regatta_id: int,
+    entries: List[models.Entry],
+) -> List[models.Entry]:
+    """Como `_entry_duplicate_sail` para várias entries, com uma só query (indexada) por identity_key."""
+    keys_by_entry: Dict[int, str] = {}
+    for e in entries:
+        if not (e.class_name and (e.sail_number or "").strip()):
+            continue
+        sail_cmp = extract_sail_digits(e.sail_number) or (e.sail_number or "").strip()
+        keys_by_entry[int(e.id)] = competitor_identity_key(e.class_name, sail_cmp, e.boat_country_code)
+    if not keys_by_entry:
+        return []
+
+    ids_by_key: Dict[str, set] = {}
+    for eid, key in (
+        db.query(models.Entry.id, models.Entry.identity_key)
+        .filter(
+            models.Entry.regatta_id == regatta_id,
+            models.Entry.identity_key.in_(sorted(set(keys_by_entry.values()))),
+        )
+        .all()
+    ):
+        ids_by_key.setdefault(key, set()).add(int(eid))
+
+    return [
+        e for e in entries
+        if int(e.id) in keys_by_entry and ids_by_key.get(keys_by_entry[int(e.id)], set()) - {int(e.id)}
+    ]
+
 def _gen_temp_password(n: int = 10) -> str:
     alphabet = "ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz23456789"
     return "".join(secrets.choice(alphabet) for _ in range(n))
@@ -1102,15 +1128,13 @@ def create_entry(entry: schemas.EntryCreate, background: BackgroundTasks, db: Se
         print("\n[ERROR] create_entry falhou:", e); print_exc()
         raise HTTPException(status_code=500, detail="Internal error while creating the entry. Check server logs.")
 
-@router.get("/by_regatta/{regatta_id}", response_model=List[schemas.EntryListRead])
-def get_entries_by_regatta(
+def _assert_can_list_entries(
     regatta_id: int,
-    class_name: Optional[str] = Query(None, alias="class"),
-    include_waiting: bool = Query(False, description="Se true, inclui entries da waiting list."),
     db: Session = Depends(get_db),
     current_user: Optional[models.User] = Depends(get_current_user_optional),
     current_regatta_id: Optional[int] = Depends(_get_current_regatta_id_optional),
-):
+) -> None:
+    """Acesso à lista de entries (anónimos veem-na; utilizadores autenticados só na sua org/regata)."""
     reg = db.query(models.Regatta).filter(models.Regatta.id == regatta_id).first()
     if not reg:
         raise HTTPException(status_code=404, detail="Regatta not found")
@@ -1144,6 +1168,19 @@ def get_entries_by_regatta(
         else:
             raise HTTPException(status_code=403, detail="Access denied")
 
+
+@router.get(
+    "/by_regatta/{regatta_id}",
+    response_model=List[schemas.EntryListRead],
+    # permissões ANTES do ETag: um 304 não pode saltar o 403 de um utilizador sem acesso
+    dependencies=[Depends(_assert_can_list_entries), Depends(conditional_get(get_db))],
+)
+def get_entries_by_regatta(
+    regatta_id: int,
+    class_name: Optional[str] = Query(None, alias="class"),
+    include_waiting: bool = Query(False, description="Se true, inclui entries da waiting list."),
+    db: Session = Depends(get_db),
+):
     q = db.query(models.Entry).filter(models.Entry.regatta_id == regatta_id)
     if class_name:
         q = q.filter(models.Entry.class_name == class_name)
@@ -1325,7 +1362,21 @@ def patch_entry(
         if did_change_sail and new_sail:
             updates_res[models.Result.sail_number] = new_sail
         if updates_res:
+            # lock das races renomeadas + as que o sync abaixo toca, numa só chamada ordenada
+            with db.no_autoflush:
+                renamed_race_ids = [rid for (rid,) in q_res.with_entities(models.Result.race_id).distinct()]
+            lock_entries_races_for_write(db, [entry], extra_race_ids=renamed_race_ids)
             q_res.update(updates_res, synchronize_session=False)
+            # o bulk UPDATE não passa pelos listeners: identity_key das linhas renomeadas
+            key_class = updates_res.get(models.Result.class_name, old_class)
+            key_sail = updates_res.get(models.Result.sail_number, old_sail)
+            refresh_identity_keys(
+                db,
+                models.Result,
+                models.Result.regatta_id == entry.regatta_id,
+                *([models.Result.class_name == key_class] if key_class else []),
+                *([models.Result.sail_number == key_sail] if key_sail else []),
+            )
 
         # RULE42
         try:
@@ -1369,6 +1420,61 @@ def toggle_paid(
     return {"id": entry.id, "paid": entry.paid}
 
 
+@router.post("/bulk-status", response_model=schemas.EntryBulkStatusResponse)
+def bulk_set_entry_status(
+    body: schemas.EntryBulkStatusRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Marca várias entries da regata como paid/confirmed (ou não) e sincroniza os
+    resultados numa só passagem (DNC em falta / resultados removidos, cada race
+    renormalizada uma vez). Tudo ou nada.
+    """
+    if current_user.role not in ("admin", "platform_admin", "scorer"):
+        raise HTTPException(status_code=403, detail="Access denied")
+    if body.paid is None and body.confirmed is None:
+        raise HTTPException(status_code=400, detail="Nothing to update (paid / confirmed).")
+    _assert_scorer_can_manage_regatta(db, current_user, body.regatta_id)
+
+    ids = sorted(set(body.entry_ids))
+    entries = (
+        db.query(models.Entry)
+        .filter(models.Entry.regatta_id == body.regatta_id, models.Entry.id.in_(ids))
+        .all()
+    )
+    found = {int(e.id) for e in entries}
+    missing = [i for i in ids if i not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Entry not found: {missing[0]}")
+
+    # Confirmar só é permitido se não houver duplicado (como no PATCH /entries/{id})
+    if body.confirmed is True:
+        dups = _entries_with_duplicate_sail(db, body.regatta_id, entries)
+        if dups:
+            labels = ", ".join(
+                f"{(e.boat_country_code or '').strip()} {e.sail_number or ''}".strip() for e in dups[:5]
+            )
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot confirm: another entry in the same class already uses the same sail number and boat country ({labels}).",
+            )
+
+    for e in entries:
+        if body.paid is not None:
+            e.paid = bool(body.paid)
+        if body.confirmed is not None:
+            e.confirmed = bool(body.confirmed)
+
+    counts = sync_entries_results_eligibility(db, entries)
+    db.commit()
+    return schemas.EntryBulkStatusResponse(
+        updated=len(entries),
+        results_created=counts["created"],
+        results_deleted=counts["deleted"],
+    )
+
+
 def _send_confirmed_entry_email(
     background: BackgroundTasks,
     db: Session,
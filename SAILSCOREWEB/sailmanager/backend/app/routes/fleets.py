@@ -11,10 +11,10 @@ from app.models import FleetSet, FleetAssignment, Race, Result, Fleet, Regatta
 from app.org_scope import assert_staff_regatta_access, assert_user_can_manage_org_id
 from utils.auth_utils import get_current_user
 from app.services.fleets import (
+    build_fleet_set,
     create_initial_set_random,
     reshuffle_from_ranking,
     start_finals,
-    _ensure_unique_label,
 )
 from app.schemas import (
     FleetSetRead,
@@ -24,6 +24,7 @@ from app.schemas import (
     MedalRaceAssignSchema,
 )
 from app.services.fleets import compute_overall_ranking
+from app.services.standings_cache import mark_results_changed
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/regattas", tags=["fleets"])
@@ -72,6 +73,7 @@ def _ensure_single_phase_set(
 
 
 def _attach_races_to_set(db: Session, race_ids: List[int], set_id: int) -> None:
+    """Sem commit: fica na mesma transação que cria o set."""
     if not race_ids:
         return
     (
@@ -79,7 +81,6 @@ def _attach_races_to_set(db: Session, race_ids: List[int], set_id: int) -> None:
         .filter(Race.id.in_(race_ids))
         .update({"fleet_set_id": set_id}, synchronize_session=False)
     )
-    db.commit()
 
 
 def _validate_races_same_regatta_and_class(
@@ -103,18 +104,14 @@ def _validate_races_same_regatta_and_class(
 
 
 def _fleet_set_stats(db: Session, set_id: int) -> dict:
-    races = db.query(Race.id).filter(Race.fleet_set_id == set_id).all()
-    race_ids = [r.id for r in races]
-    if not race_ids:
-        return {"race_count": 0, "result_count": 0}
-
-    result_count = (
-        db.query(func.count(Result.id))
-        .filter(Result.race_id.in_(race_ids))
-        .scalar()
-        or 0
+    race_count, result_count = (
+        db.query(func.count(func.distinct(Race.id)), func.count(Result.id))
+        .select_from(Race)
+        .outerjoin(Result, Result.race_id == Race.id)
+        .filter(Race.fleet_set_id == set_id)
+        .one()
     )
-    return {"race_count": len(race_ids), "result_count": int(result_count)}
+    return {"race_count": int(race_count or 0), "result_count": int(result_count or 0)}
 
 
 # -------------------------
@@ -132,17 +129,13 @@ def create_quali_set(
     current_user: models.User = Depends(get_current_user),
 ):
     _assert_can_manage_regatta(db, regatta_id, current_user)
+    _validate_races_same_regatta_and_class(db, regatta_id, class_name, body.race_ids)
     fs = create_initial_set_random(
         db, regatta_id, class_name, body.label, body.num_fleets
-    )
+    ).fleet_set
+    _attach_races_to_set(db, body.race_ids, fs.id)
+    mark_results_changed(db, regatta_id)
     db.commit()
-    db.refresh(fs)
-
-    if body.race_ids:
-        _validate_races_same_regatta_and_class(
-            db, regatta_id, class_name, body.race_ids
-        )
-        _attach_races_to_set(db, body.race_ids, fs.id)
 
     db.refresh(fs)
     return fs
@@ -172,21 +165,17 @@ def reshuffle(
             detail="There is no previous fleet set to reshuffle.",
         )
 
+    _validate_races_same_regatta_and_class(db, regatta_id, class_name, body.race_ids)
     try:
         fs = reshuffle_from_ranking(
             db, regatta_id, class_name, prev.id, body.label, body.num_fleets
-        )
+        ).fleet_set
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    _attach_races_to_set(db, body.race_ids, fs.id)
+    mark_results_changed(db, regatta_id)
     db.commit()
-    db.refresh(fs)
-
-    if body.race_ids:
-        _validate_races_same_regatta_and_class(
-            db, regatta_id, class_name, body.race_ids
-        )
-        _attach_races_to_set(db, body.race_ids, fs.id)
 
     db.refresh(fs)
     return fs
@@ -227,19 +216,17 @@ def start_finals_set(
     else:
         raise HTTPException(status_code=400, detail="Send either grouping or ranges.")
 
+    _validate_races_same_regatta_and_class(db, regatta_id, class_name, body.race_ids)
     fs = start_finals(
         db,
         regatta_id,
         class_name,
         body.label or "Finals",
         grouping,
-    )
+    ).fleet_set
+    _attach_races_to_set(db, body.race_ids, fs.id)
+    mark_results_changed(db, regatta_id)
     db.commit()
-    db.refresh(fs)
-
-    if body.race_ids:
-        _validate_races_same_regatta_and_class(db, regatta_id, class_name, body.race_ids)
-        _attach_races_to_set(db, body.race_ids, fs.id)
 
     db.refresh(fs)
     return fs
@@ -353,6 +340,7 @@ def delete_fleet_set(
     )
 
     db.delete(fs)
+    mark_results_changed(db, regatta_id)
     db.commit()
 
     return {
@@ -435,6 +423,7 @@ def update_fleet_set_races(
             .update({"fleet_set_id": set_id}, synchronize_session=False)
         )
 
+    mark_results_changed(db, regatta_id)
     db.commit()
     db.refresh(fs)
     return fs
@@ -472,6 +461,7 @@ def publish_set(
 
     fs.published_at = sa.func.now()
 
+    mark_results_changed(db, regatta_id)
     db.commit()
     db.refresh(fs)
     return {"ok": True, "fleet_set_id": set_id}
@@ -502,6 +492,7 @@ def unpublish_set(
     fs.is_published = False
     fs.published_at = None
 
+    mark_results_changed(db, regatta_id)
     db.commit()
     db.refresh(fs)
     return {"ok": True, "fleet_set_id": set_id}
@@ -543,6 +534,7 @@ def update_fleet_set(
     if body.public_title is not None:
         fs.public_title = body.public_title
 
+    mark_results_changed(db, regatta_id)
     db.commit()
     db.refresh(fs)
     return fs
@@ -567,42 +559,15 @@ def assign_medal_race_entries(
     if not selected:
         raise HTTPException(status_code=400, detail="No entries for medal race")
 
-    label = _ensure_unique_label(
-        db, regatta_id, data.class_name, "medal", "Medal Race"
-    )
-
-    fs = FleetSet(
-        regatta_id=regatta_id,
-        class_name=data.class_name,
-        phase="medal",
-        label=label,
-    )
-    db.add(fs)
-    db.flush()
+    # ✅ Só valida e associa se vierem races
+    _validate_races_same_regatta_and_class(db, regatta_id, data.class_name, data.race_ids)
 
-    fleet = Fleet(
-        fleet_set_id=fs.id,
-        name="Medal",
-        order_index=1,
+    build = build_fleet_set(
+        db, regatta_id, data.class_name, "medal", "Medal Race", ["Medal"], [selected]
     )
-    db.add(fleet)
-    db.flush()
-
-    for entry_id in selected:
-        db.add(
-            FleetAssignment(
-                fleet_set_id=fs.id,
-                fleet_id=fleet.id,
-                entry_id=entry_id,
-            )
-        )
+    fs = build.fleet_set
 
-    # ✅ Só valida e associa se vierem races
     if data.race_ids:
-        _validate_races_same_regatta_and_class(
-            db, regatta_id, data.class_name, data.race_ids
-        )
-
         (
             db.query(Race)
             .filter(Race.id.in_(data.race_ids))
@@ -618,11 +583,12 @@ def assign_medal_race_entries(
             )
         )
 
+    mark_results_changed(db, regatta_id)
     db.commit()
 
     return {
         "ok": True,
         "fleet_set_id": fs.id,
-        "entries_assigned": len(selected),
+        "entries_assigned": build.assigned,
         "race_ids": data.race_ids,
     }
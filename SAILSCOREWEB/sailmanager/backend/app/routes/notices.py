@@ -14,6 +14,7 @@ from app import models, schemas
 from app.models import NoticeSource, NoticeDocType, RegattaClass  # enums e modelo
 from app.org_scope import assert_staff_regatta_access, assert_user_can_manage_org_id
 from app.storage_uploads import build_download_url, delete_stored_upload, save_binary_upload
+from app.services.http_cache import conditional_get
 from utils.auth_utils import get_current_user
 
 router = APIRouter(prefix="/notices", tags=["notices"])
@@ -159,6 +160,7 @@ def upload_notice_file(
 @router.get(
     "/{regatta_id}",
     response_model=List[schemas.NoticeRead],
+    dependencies=[Depends(conditional_get(get_db))],
 )
 def get_notices_by_regatta(
     regatta_id: int,
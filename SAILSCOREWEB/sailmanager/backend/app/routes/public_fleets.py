@@ -1,69 +1,107 @@
 import re
+from typing import Any, Dict, List
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models import FleetSet, FleetAssignment, Entry
+from app.models import FleetSet, Fleet, FleetAssignment, Entry
+from app.services import competitor_cache
+from app.services.http_cache import conditional_get
 
 router = APIRouter(prefix="/public", tags=["public-fleets"])
 
 
-def _boat_sort_key(entry: Entry) -> tuple:
-    sn = (entry.sail_number or "").strip()
+def _boat_sort_key(sail_number: str | None, boat_country_code: str | None) -> tuple:
+    sn = (sail_number or "").strip()
     m = re.search(r"\d+", sn)
     num = int(m.group(0)) if m else 10**9
-    cc = (getattr(entry, "boat_country_code", None) or "").strip().upper()
+    cc = (boat_country_code or "").strip().upper()
     return (num, cc, sn.lower())
 
 
-@router.get("/regattas/{regatta_id}/fleets")
-def public_fleet_sets(regatta_id: int, db: Session = Depends(get_db)):
-
-    sets = (
-        db.query(FleetSet)
+def build_public_fleet_sets(db: Session, regatta_id: int) -> List[Dict[str, Any]]:
+    """
+    Fleet sets publicados da regata, com as fleets e os barcos de cada uma,
+    a partir de UMA query (sets ⟕ fleets ⟕ assignments ⟕ entries, só as colunas usadas).
+    """
+    rows = (
+        db.query(
+            FleetSet.id,
+            FleetSet.public_title,
+            FleetSet.label,
+            FleetSet.phase,
+            FleetSet.published_at,
+            Fleet.id.label("fleet_id"),
+            Fleet.name.label("fleet_name"),
+            Fleet.order_index,
+            Entry.id.label("entry_id"),
+            Entry.sail_number,
+            Entry.boat_country_code,
+            Entry.boat_name,
+            Entry.first_name,
+            Entry.last_name,
+        )
+        .outerjoin(Fleet, Fleet.fleet_set_id == FleetSet.id)
+        .outerjoin(FleetAssignment, FleetAssignment.fleet_id == Fleet.id)
+        .outerjoin(Entry, Entry.id == FleetAssignment.entry_id)
         .filter(FleetSet.regatta_id == regatta_id, FleetSet.is_published == True)
-        .order_by(FleetSet.published_at.desc())
+        .order_by(FleetSet.published_at.desc(), FleetSet.id, Fleet.id, FleetAssignment.id)
         .all()
     )
 
-    response = []
-
-    for fs in sets:
-        fleets_payload = []
-
-        for f in fs.fleets:
-            assignments = (
-                db.query(FleetAssignment, Entry)
-                .join(Entry, Entry.id == FleetAssignment.entry_id)
-                .filter(FleetAssignment.fleet_id == f.id)
-                .all()
-            )
-            assignments.sort(key=lambda row: _boat_sort_key(row[1]))
-
-            boats = [
-                {
-                    "sail_number": e.sail_number,
-                    "boat_country_code": getattr(e, "boat_country_code", None),
-                    "boat_name": e.boat_name,
-                    "helm_name": f"{e.first_name or ''} {e.last_name or ''}".strip(),
-                }
-                for (_, e) in assignments
-            ]
+    response: List[Dict[str, Any]] = []
+    sets: Dict[int, Dict[str, Any]] = {}
+    fleets: Dict[int, Dict[str, Any]] = {}
+    for r in rows:
+        fs = sets.get(r.id)
+        if fs is None:
+            fs = sets[r.id] = {
+                "id": r.id,
+                "title": r.public_title or r.label or "Fleets",
+                "phase": r.phase,
+                "created_at": r.published_at.isoformat() if r.published_at else "",
+                "fleets": [],
+            }
+            response.append(fs)
+        if r.fleet_id is None:
+            continue
 
-            fleets_payload.append({
-                "id": f.id,
-                "name": f.name,
-                "order_index": f.order_index,
-                "boats": boats,
-            })
+        f = fleets.get(r.fleet_id)
+        if f is None:
+            f = fleets[r.fleet_id] = {
+                "id": r.fleet_id,
+                "name": r.fleet_name,
+                "order_index": r.order_index,
+                "boats": [],
+            }
+            fs["fleets"].append(f)
+        if r.entry_id is None:
+            continue
 
-        response.append({
-            "id": fs.id,
-            "title": fs.public_title or fs.label or "Fleets",
-            "phase": fs.phase,
-            "created_at": fs.published_at.isoformat() if fs.published_at else "",
-            "fleets": fleets_payload,
+        f["boats"].append({
+            "sail_number": r.sail_number,
+            "boat_country_code": r.boat_country_code,
+            "boat_name": r.boat_name,
+            "helm_name": f"{r.first_name or ''} {r.last_name or ''}".strip(),
         })
 
+    for f in fleets.values():
+        f["boats"].sort(key=lambda b: _boat_sort_key(b["sail_number"], b["boat_country_code"]))
     return response
+
+
+@router.get("/regattas/{regatta_id}/fleets", dependencies=[Depends(conditional_get(get_db))])
+def public_fleet_sets(regatta_id: int, db: Session = Depends(get_db)):
+    """
+    Só depende de entries e fleets: em cache por regata, validada pela entries_version
+    (publish/unpublish/update de sets, assignments e edição de entries sobem-na).
+    """
+    return competitor_cache.get_or_compute(
+        db,
+        regatta_id,
+        "",
+        None,
+        lambda: build_public_fleet_sets(db, regatta_id),
+        variant="public_fleets",
+    )
@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models
 from app.org_scope import assert_staff_regatta_access, assert_user_can_manage_org_id
+from app.services.standings_cache import mark_results_changed
 from utils.auth_utils import get_current_user
 
 router = APIRouter(prefix="/regattas", tags=["publication"])
@@ -131,6 +132,7 @@ def set_publication(
             published_at=datetime.now(tz) if k > 0 else None,
         )
         db.add(row)
+    mark_results_changed(db, regatta_id)
     db.commit()
     db.refresh(row)
     published_at_iso = None
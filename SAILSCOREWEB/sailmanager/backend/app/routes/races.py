@@ -6,6 +6,7 @@ from typing import List
 from app.database import get_db
 from app import models, schemas
 from app.org_scope import assert_staff_regatta_access, assert_user_can_manage_org_id
+from app.services.standings_cache import mark_results_changed
 from utils.auth_utils import get_current_user
 
 # NÃO USAMOS RaceRead DIRETAMENTE → removido
@@ -80,6 +81,7 @@ def create_race(
     )
 
     db.add(new_race)
+    mark_results_changed(db, new_race.regatta_id)
     db.commit()
     db.refresh(new_race)
 
@@ -190,6 +192,7 @@ def update_race(
         val = (body.orc_rating_mode or "").strip().lower()
         r.orc_rating_mode = val if val in ("low", "medium", "high") else None
 
+    mark_results_changed(db, r.regatta_id)
     db.commit()
     db.refresh(r)
     return r
@@ -217,6 +220,7 @@ def delete_race(
         else:
             assert_staff_regatta_access(db, current_user, regatta.id)
 
+    mark_results_changed(db, r.regatta_id)
     db.delete(r)
     db.commit()
     return None
@@ -319,6 +323,7 @@ def _reorder_impl_atomic(regatta_id: int, body, db, current_user):
     """)
 
     db.execute(upd, {"rid": regatta_id, "cname": class_name})
+    mark_results_changed(db, regatta_id)
     db.commit()
 
     return (
@@ -347,6 +352,7 @@ def create_medal_race(regatta_id: int, db: Session = Depends(get_db)):
     )
 
     db.add(race)
+    mark_results_changed(db, regatta_id)
     db.commit()
     db.refresh(race)
 
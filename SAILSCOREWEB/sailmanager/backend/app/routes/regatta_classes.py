@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app import models, schemas
 from app.database import get_db
 from app.org_scope import assert_user_can_manage_org_id
+from app.services.standings_cache import mark_results_changed
 from utils.auth_utils import get_current_user
 from typing import List
 
@@ -22,6 +23,7 @@ def add_class_to_regatta(
     assert_user_can_manage_org_id(current_user, regatta.organization_id)
     new_class = models.RegattaClass(**class_data.dict())
     db.add(new_class)
+    mark_results_changed(db, new_class.regatta_id)
     db.commit()
     db.refresh(new_class)
     return new_class
@@ -18,6 +18,8 @@ from utils.auth_utils import (
 )
 from app.jury_scope import assert_jury_regatta_access
 from app.services.online_entry_fields import normalize_field_overrides
+from app.services.standings_cache import mark_results_changed
+from app.routes.results_utils import refresh_identity_keys
 
 
 def _class_names_for_regatta(regatta: models.Regatta) -> list[str]:
@@ -275,6 +277,7 @@ def update_regatta(
     for field, value in data.items():
         setattr(reg, field, value)
 
+    mark_results_changed(db, reg.id)
     db.commit()
     db.refresh(reg)
     return reg
@@ -325,6 +328,7 @@ def update_scoring(
     if body.code_points is not None:
         regatta.scoring_codes = {k.upper(): float(v) for k, v in body.code_points.items()}
 
+    mark_results_changed(db, regatta.id)
     db.commit()
     db.refresh(regatta)
     return regatta
@@ -604,10 +608,13 @@ def rename_regatta_class(
               )
               .update({model.class_name: new_name}, synchronize_session=False)
         )
+        if hasattr(model, "identity_key"):
+            refresh_identity_keys(db, model, model.regatta_id == regatta_id, model.class_name == new_name)
 
     reg.online_entry_limits_by_class = _rename_json_class_key(reg.online_entry_limits_by_class, old_name, new_name)
     reg.entry_list_columns = _rename_json_class_key(reg.entry_list_columns, old_name, new_name)
 
+    mark_results_changed(db, regatta_id)
     db.commit()
 
     return (
@@ -716,6 +723,7 @@ def replace_regatta_classes(
             )
         )
 
+    mark_results_changed(db, regatta_id)
     db.commit()
 
     return (
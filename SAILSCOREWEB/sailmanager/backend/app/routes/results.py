@@ -7,6 +7,10 @@ from app.routes import results_item
 from app.routes import results_overall
 from app.routes import results_codes  # ✅ novo
 from app.routes import results_pace
+from app.routes import results_whatif
+from app.routes import results_batch
+from app.routes import results_import
+from app.routes import results_pdf_jobs
 
 router = APIRouter()
 
@@ -16,3 +20,7 @@ router.include_router(results_item.router)
 router.include_router(results_overall.router)
 router.include_router(results_codes.router)  # ✅ novo
 router.include_router(results_pace.router)
+router.include_router(results_whatif.router)
+router.include_router(results_batch.router)
+router.include_router(results_import.router)
+router.include_router(results_pdf_jobs.router)
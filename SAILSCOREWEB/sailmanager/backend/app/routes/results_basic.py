@@ -8,6 +8,8 @@ from typing import List
 from app.database import get_db
 from app import models, schemas
 from app.org_scope import assert_user_can_manage_org_id
+from app.services.race_locks import lock_race_for_write
+from app.services.standings_cache import mark_results_changed
 from utils.auth_utils import get_current_user
 
 from app.routes.results_utils import _norm, filter_results_to_eligible_entries
@@ -32,6 +34,7 @@ def create_result(
     race = db.query(models.Race).filter(models.Race.id == result.race_id).first()
     if not race:
         raise HTTPException(status_code=404, detail="Race not found")
+    lock_race_for_write(db, race.id)
 
     code_map = regatta.scoring_codes or {}
     code = _norm(result.code)
@@ -51,6 +54,7 @@ def create_result(
         code=code,
     )
     db.add(new_result)
+    mark_results_changed(db, regatta.id, race_id=race.id)
     db.commit()
     db.refresh(new_result)
     return new_result
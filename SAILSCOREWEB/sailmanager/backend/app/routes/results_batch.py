@@ -0,0 +1,107 @@
+# app/routes/results_batch.py
+"""
+Batch de edições de resultados de UMA race (ex.: decisões de protesto: codes,
+mudanças de posição, overrides de pontos).
+
+Em vez de N chamadas a PATCH /{id}/code | /position | /override-points (cada uma
+com shift + normalize + commit), as mutações são aplicadas por ordem às linhas da
+race em memória (`apply_result_mutation`, as mesmas regras das routes de item) e
+gravadas no fim com um só UPDATE e um só commit. Se alguma mutação for inválida,
+nada é gravado.
+"""
+from __future__ import annotations
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.database import get_db
+from app.org_scope import assert_staff_regatta_access, assert_user_can_manage_org_id
+from app.routes.results_race import get_results_for_race
+from app.routes.results_utils import (
+    MUTATION_WRITTEN_COLUMNS,
+    ResultMutation,
+    _build_competitor_context_for_race,
+    apply_result_mutation,
+    get_scoring_map,
+    load_plain_results,
+    race_class_is_handicap,
+    result_column_values,
+    write_result_columns,
+)
+from app.services.race_locks import lock_race_for_write
+from app.services.standings_cache import mark_results_changed
+from utils.auth_utils import get_current_user
+
+router = APIRouter()
+
+MAX_BATCH_MUTATIONS = 200
+
+
+class ResultBatchBody(BaseModel):
+    mutations: List[ResultMutation] = Field(..., min_length=1, max_length=MAX_BATCH_MUTATIONS)
+
+
+def apply_result_batch(db: Session, race: models.Race, mutations: List[ResultMutation]) -> int:
+    """
+    Aplica as mutações às linhas da race e grava as que mudaram (sem commit).
+    HTTPException 404/400 antes de escrever o que quer que seja. Devolve o nº de linhas gravadas.
+    """
+    race_id = int(race.id)
+    lock_race_for_write(db, race_id)
+    db.flush()
+    rows = load_plain_results(db, [race_id])[race_id]
+    by_id = {r.id: r for r in rows}
+    missing = [m.result_id for m in mutations if m.result_id not in by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Result not found in this race: {missing[0]}")
+
+    before = result_column_values(rows, MUTATION_WRITTEN_COLUMNS)
+    scoring_map = get_scoring_map(db, int(race.regatta_id), str(race.class_name or ""))
+    ctx = _build_competitor_context_for_race(db, race)
+    is_handicap = race_class_is_handicap(db, race)
+
+    for m in mutations:
+        try:
+            apply_result_mutation(
+                db, race, rows, by_id[m.result_id], m, scoring_map, ctx, is_handicap,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Result {m.result_id}: {e}")
+
+    # standings novos só nesta race -> o overall em cache é atualizado incrementalmente
+    mark_results_changed(db, race.regatta_id, race_id=race_id)
+    return write_result_columns(db, rows, before, MUTATION_WRITTEN_COLUMNS)
+
+
+@router.post("/races/{race_id}/batch", response_model=List[schemas.ResultRead])
+def apply_race_results_batch(
+    race_id: int,
+    body: ResultBatchBody,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Aplica uma lista ORDENADA de mutações (position -> code -> points_override, por
+    mutação) numa transação, com uma só escrita no fim. Devolve os resultados finais
+    da race (como GET /races/{race_id}/results).
+    """
+    if current_user.role not in ("admin", "platform_admin", "scorer"):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    race = db.query(models.Race).filter_by(id=race_id).first()
+    if not race:
+        raise HTTPException(status_code=404, detail="Race not found")
+    regatta = db.query(models.Regatta).filter_by(id=race.regatta_id).first()
+    if regatta:
+        if current_user.role in ("admin", "platform_admin"):
+            assert_user_can_manage_org_id(current_user, regatta.organization_id)
+        else:
+            assert_staff_regatta_access(db, current_user, regatta.id)
+
+    apply_result_batch(db, race, body.mutations)
+    db.commit()
+    return get_results_for_race(race_id, db)
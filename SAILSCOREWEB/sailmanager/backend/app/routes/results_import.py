@@ -0,0 +1,687 @@
+# app/routes/results_import.py
+"""
+Import de resultados por CSV: uma race (POST /races/{race_id}/import/csv) ou várias
+races de uma regata num só ficheiro (POST /regattas/{regatta_id}/import/csv, com uma
+coluna `race_id`). As colunas de cada race são as do export (one design ou handicap).
+
+Pipeline em streaming:
+1. `_CsvRecords`: o upload é decodificado aos bocados (UTF-8 incremental, sem ler o
+   ficheiro inteiro para memória) e lido pelo csv.reader; cada registo leva a sua linha.
+2. Validação em blocos de IMPORT_CHUNK_ROWS registos: formato de cada linha e depois o
+   bloco contra o índice de entries da classe, carregado uma vez (uma só query para
+   todas as races do ficheiro). Os erros vêm todos juntos, por linha ("Line N: ...").
+3. Escrita: linhas novas num INSERT executemany, existentes num UPDATE por id e uma só
+   normalização por race; um commit no fim.
+
+`dry_run=true` faz a escrita completa, devolve os resultados com que as races ficariam
+e faz rollback: nada é gravado e nenhuma cache é invalidada.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.database import get_db
+from app.org_scope import assert_staff_regatta_access, assert_user_can_manage_org_id
+from app.routes.results_race import (
+    EntryIdentityIndex,
+    _effective_entry_rating_for_race,
+    _race_handicap_csv_columns,
+    save_race_results,
+)
+from app.routes.results_utils import (
+    _build_competitor_context_for_race,
+    _norm,
+    _parse_time_to_seconds,
+    compute_points_for_code,
+    get_scoring_map,
+    insert_result_rows,
+    load_plain_results,
+    normalize_race_results,
+    result_column_values,
+    write_result_columns,
+)
+from app.services.race_locks import lock_races_for_write
+from app.utils.identity import class_identity_key
+from utils.auth_utils import get_current_user
+
+router = APIRouter()
+
+IMPORT_CHUNK_ROWS = int(os.getenv("RESULTS_IMPORT_CHUNK_ROWS", "500"))
+# a partir daqui a validação pára: um ficheiro errado não gera milhares de mensagens
+MAX_IMPORT_ERRORS = 200
+PREVIEW_ROWS = 15
+
+ONE_DESIGN_CSV_COLUMNS = ["sail_number", "boat_country_code", "points", "code"]
+# o que o import one design muda numa linha que já existe (upsert por sail + country)
+_ONE_DESIGN_UPDATED_COLUMNS = ("points", "code", "points_override")
+
+
+# ============================================================
+# Leitura
+# ============================================================
+class _CsvRecords:
+    """(linha, campos) de cada registo não vazio do upload, com decode UTF-8 incremental."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        # newline="" como pede o csv (um campo entre aspas pode ter quebras de linha)
+        self._text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        self._reader = csv.reader(self._text)
+
+    @property
+    def line_num(self) -> int:
+        return self._reader.line_num
+
+    def __iter__(self) -> Iterator[Tuple[int, List[str]]]:
+        for row in self._reader:
+            if not any(cell.strip() for cell in row):
+                continue  # linhas em branco (ex.: no fim do ficheiro)
+            yield self._reader.line_num, row
+
+
+def _chunks(records: Iterable[Tuple[int, List[str]]], size: int) -> Iterator[List[Tuple[int, List[str]]]]:
+    chunk: List[Tuple[int, List[str]]] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ============================================================
+# Validação
+# ============================================================
+@dataclass
+class _RaceImport:
+    """Uma race do ficheiro: colunas do seu modo de scoring, entries da classe e linhas lidas."""
+    race: models.Race
+    is_one_design: bool
+    columns: List[str]
+    entries: EntryIdentityIndex
+    idx: Dict[str, int] = field(default_factory=dict)
+    header_ok: bool = True
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    seen: set = field(default_factory=set)
+    unmatched: List[str] = field(default_factory=list)
+
+    @property
+    def rating_mode(self) -> Optional[str]:
+        """"ORC" / "Simple Rating" quando a race precisa de rating (anc/orc), senão None."""
+        if self.is_one_design:
+            return None
+        method = (getattr(self.race, "handicap_method", None) or "manual").strip().lower()
+        if method not in ("anc", "orc"):
+            return None
+        return "ORC" if method == "orc" else "Simple Rating"
+
+    def read_header(self, norm_header: List[str]) -> List[str]:
+        """Índices das colunas no header; devolve os erros de colunas em falta."""
+        for c in self.columns:
+            if c in norm_header:
+                self.idx[c] = norm_header.index(c)
+        if self.is_one_design:
+            if "sail_number" not in self.idx:
+                return ["Missing required column 'sail_number'."]
+            if "boat_country_code" not in self.idx:
+                return ["Missing required column 'boat_country_code'."]
+            if "points" not in self.idx and "code" not in self.idx:
+                return ["At least one of 'points' or 'code' is required."]
+            return []
+        return [
+            f"Missing required column '{c}'."
+            for c in self.columns
+            if c not in self.idx and c != "rating"
+        ]
+
+    def parse_row(self, line: int, row: List[str]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        if len(row) <= max(self.idx.values()):
+            return None, [f"Line {line}: missing fields."]
+        if self.is_one_design:
+            return self._parse_one_design_row(line, row)
+        return self._parse_handicap_row(line, row)
+
+    def _key_errors(self, line: int, sn: str, cc: str) -> List[str]:
+        errors: List[str] = []
+        if not sn:
+            errors.append(f"Line {line}: 'sail_number' is required.")
+        if not cc:
+            errors.append(f"Line {line}: 'boat_country_code' is required.")
+        if errors:
+            return errors
+        if (sn, cc) in self.seen:
+            return [f"Line {line}: duplicate pair '{cc} {sn}'."]
+        self.seen.add((sn, cc))
+        return []
+
+    def _parse_one_design_row(self, line: int, row: List[str]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        sn = (row[self.idx["sail_number"]] or "").strip().upper()
+        cc = (row[self.idx["boat_country_code"]] or "").strip().upper()
+        errors = self._key_errors(line, sn, cc)
+        if errors:
+            return None, errors[:1]
+        pts_val = (row[self.idx["points"]] or "").strip() if "points" in self.idx else ""
+        code_val = (row[self.idx["code"]] or "").strip() if "code" in self.idx else ""
+        if not pts_val and not code_val:
+            return None, [f"Line {line}: fill at least one of 'points' or 'code'."]
+        if pts_val:
+            try:
+                float(pts_val)
+            except ValueError:
+                return None, [f"Line {line}: 'points' must be numeric."]
+        return {
+            "line": line,
+            "sail_number": sn,
+            "boat_country_code": cc,
+            "points": pts_val,
+            "code": code_val.upper() if code_val else None,
+        }, []
+
+    def _parse_handicap_row(self, line: int, row: List[str]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        data = {c: (row[i] or "").strip() for c, i in self.idx.items()}
+        sn = data.get("sail_number", "").upper()
+        cc = data.get("boat_country_code", "").upper()
+        errors = self._key_errors(line, sn, cc)
+        if errors:
+            return None, errors
+
+        corrected = data.get("corrected_time", "")
+        if not corrected:
+            return None, [f"Line {line}: 'corrected_time' is required."]
+        if _parse_time_to_seconds(corrected) is None:
+            return None, [f"Line {line}: 'corrected_time' must be HH:MM:SS."]
+
+        for tcol in ("finish_time", "elapsed_time"):
+            tv = data.get(tcol, "")
+            if tv and _parse_time_to_seconds(tv) is None:
+                errors.append(f"Line {line}: '{tcol}' must be HH:MM:SS.")
+
+        finish_day_raw = data.get("finish_day", "")
+        if finish_day_raw:
+            try:
+                if int(finish_day_raw) < 0:
+                    raise ValueError()
+            except ValueError:
+                errors.append(f"Line {line}: 'finish_day' must be an integer >= 0.")
+
+        rating_raw = data.get("rating", "")
+        if rating_raw:
+            try:
+                float(rating_raw)
+            except ValueError:
+                errors.append(f"Line {line}: 'rating' must be numeric.")
+
+        if errors:
+            return None, errors
+        return {
+            "line": line,
+            "sail_number": sn,
+            "boat_country_code": cc,
+            "finish_day": finish_day_raw,
+            "finish_time": data.get("finish_time", ""),
+            "elapsed_time": data.get("elapsed_time", ""),
+            "corrected_time": corrected,
+            "code": data.get("code", "").upper() or None,
+            "rating": float(rating_raw) if rating_raw else None,
+        }, []
+
+    def match_entries(self, rows: List[Dict[str, Any]]) -> List[Tuple[int, str]]:
+        """Um bloco de linhas válidas contra o índice de entries (par exato) e o rating em anc/orc."""
+        errors: List[Tuple[int, str]] = []
+        rating_mode = self.rating_mode
+        for r in rows:
+            sn, cc = r["sail_number"], r["boat_country_code"]
+            entry = self.entries.by_pair.get((sn, cc))
+            if entry is None:
+                self.unmatched.append(f"{cc} {sn}")
+                errors.append((r["line"], f"Line {r['line']}: entry not found for sail/country pair '{cc} {sn}'."))
+            elif (
+                rating_mode
+                and r.get("rating") is None
+                and _effective_entry_rating_for_race(entry, self.race) is None
+            ):
+                errors.append((r["line"], f"Line {r['line']}: missing rating for {rating_mode} mode for '{cc} {sn}'."))
+        # as linhas ficam todas (preview); com erros nada é gravado
+        self.rows.extend(rows)
+        return errors
+
+    def preview(self) -> List[Dict[str, Any]]:
+        rows = self.rows[:PREVIEW_ROWS]
+        if self.is_one_design:
+            return [{c: r[c] for c in ONE_DESIGN_CSV_COLUMNS} for r in rows]
+        return [{c: r.get(c, "") for c in self.columns} for r in rows]
+
+
+class _CsvImport:
+    """
+    Estado do import de um ficheiro: tipos de classe e entries das races carregados uma
+    vez, uma `_RaceImport` por race que aparece no ficheiro e os erros por linha.
+    Com `by_race_column`, cada linha diz a sua race na coluna `race_id`.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        regatta_id: int,
+        races: List[models.Race],
+        *,
+        by_race_column: bool = False,
+    ) -> None:
+        self.by_race_column = by_race_column
+        self.races = {int(r.id): r for r in races}
+        self.plans: Dict[int, _RaceImport] = {}
+        self.errors: List[str] = []
+        self._norm_header: List[str] = []
+
+        # como `_race_is_one_design`: classe da regata com class_type != handicap
+        self._class_types: Dict[str, str] = {}
+        for name, class_type in (
+            db.query(models.RegattaClass.class_name, models.RegattaClass.class_type)
+            .filter(models.RegattaClass.regatta_id == regatta_id)
+            .order_by(models.RegattaClass.id.asc())
+            .all()
+        ):
+            self._class_types.setdefault(str(name or "").lower(), (class_type or "").lower())
+
+        # entries de todas as classes do ficheiro numa só query (como EntryIdentityIndex.for_race)
+        class_keys = sorted({class_identity_key(r.class_name) for r in races})
+        by_class: Dict[str, List[models.Entry]] = {k: [] for k in class_keys}
+        if class_keys:
+            for e in (
+                db.query(models.Entry)
+                .filter(models.Entry.regatta_id == regatta_id, models.Entry.class_key.in_(class_keys))
+                .order_by(models.Entry.id.asc())
+                .all()
+            ):
+                by_class[e.class_key].append(e)
+        self._entries = {k: EntryIdentityIndex(v) for k, v in by_class.items()}
+
+    def plan(self, race: models.Race) -> _RaceImport:
+        plan = self.plans.get(int(race.id))
+        if plan is None:
+            class_type = self._class_types.get(str(race.class_name or "").lower())
+            is_one_design = class_type is not None and class_type != "handicap"
+            plan = self.plans[int(race.id)] = _RaceImport(
+                race=race,
+                is_one_design=is_one_design,
+                columns=list(ONE_DESIGN_CSV_COLUMNS) if is_one_design else _race_handicap_csv_columns(race),
+                entries=self._entries[class_identity_key(race.class_name)],
+            )
+        return plan
+
+    @property
+    def unmatched(self) -> List[str]:
+        return [u for plan in self.plans.values() for u in plan.unmatched]
+
+    @property
+    def applied(self) -> int:
+        return sum(len(plan.rows) for plan in self.plans.values())
+
+    def read(self, stream: BinaryIO) -> None:
+        records = _CsvRecords(stream)
+        try:
+            self._read(records)
+        except UnicodeDecodeError as e:
+            self.errors.append(f"File is not valid UTF-8: {e}")
+        except csv.Error as e:
+            self.errors.append(f"Line {records.line_num}: {e}")
+
+    def _read(self, records: _CsvRecords) -> None:
+        lines = iter(records)
+        first = next(lines, None)
+        if first is None:
+            self.errors.append("File is empty.")
+            return
+        self._norm_header = [h.strip().lower() for h in first[1]]
+
+        race_idx = -1
+        if self.by_race_column:
+            if "race_id" not in self._norm_header:
+                self.errors.append("Missing required column 'race_id'.")
+                return
+            race_idx = self._norm_header.index("race_id")
+        else:
+            # uma só race: erros de header param logo a leitura
+            (race,) = self.races.values()
+            header_errors = self.plan(race).read_header(self._norm_header)
+            if header_errors:
+                self.errors.extend(header_errors)
+                return
+
+        for chunk in _chunks(lines, IMPORT_CHUNK_ROWS):
+            parsed: Dict[int, List[Dict[str, Any]]] = {}
+            chunk_errors: List[Tuple[int, str]] = []
+            for line, row in chunk:
+                plan = self._plan_for_row(line, row, race_idx, chunk_errors)
+                if plan is None:
+                    continue
+                parsed_row, row_errors = plan.parse_row(line, row)
+                chunk_errors.extend((line, msg) for msg in row_errors)
+                if parsed_row is not None:
+                    parsed.setdefault(int(plan.race.id), []).append(parsed_row)
+            for race_id, rows in parsed.items():
+                chunk_errors.extend(self.plans[race_id].match_entries(rows))
+            # por ordem de linha (sort estável: a ordem dentro da mesma linha mantém-se)
+            chunk_errors.sort(key=lambda e: e[0])
+            room = MAX_IMPORT_ERRORS - len(self.errors)
+            self.errors.extend(msg for _, msg in chunk_errors[:room])
+            if len(chunk_errors) >= room:
+                self.errors.append(f"Too many errors: validation stopped at line {chunk_errors[room - 1][0]}.")
+                return
+
+    def _plan_for_row(
+        self,
+        line: int,
+        row: List[str],
+        race_idx: int,
+        errors: List[Tuple[int, str]],
+    ) -> Optional[_RaceImport]:
+        if not self.by_race_column:
+            return next(iter(self.plans.values()))
+        raw = (row[race_idx] or "").strip() if len(row) > race_idx else ""
+        try:
+            race = self.races.get(int(raw))
+        except ValueError:
+            race = None
+        if race is None:
+            errors.append((line, f"Line {line}: 'race_id' must be the id of a race of this regatta."))
+            return None
+        known = int(race.id) in self.plans
+        plan = self.plan(race)
+        if not known:
+            header_errors = plan.read_header(self._norm_header)
+            plan.header_ok = not header_errors
+            errors.extend((line, f"Race {race.id}: {msg}") for msg in header_errors)
+        return plan if plan.header_ok else None
+
+
+# ============================================================
+# Escrita
+# ============================================================
+def _write_one_design(db: Session, plan: _RaceImport, *, clear_existing: bool) -> None:
+    """Upsert por (sail, country): existentes num UPDATE por id, novas num INSERT; 1 normalize."""
+    race = plan.race
+    race_id = int(race.id)
+    if clear_existing:
+        db.query(models.Result).filter(models.Result.race_id == race_id).delete(synchronize_session=False)
+    db.flush()
+
+    # resultados já existentes da race, 1 query (só colunas)
+    existing = load_plain_results(db, [race_id])[race_id]
+    before = result_column_values(existing, _ONE_DESIGN_UPDATED_COLUMNS)
+    existing_by_key: Dict[Tuple[Optional[str], Optional[str]], Any] = {}
+    for res in sorted(existing, key=lambda r: r.id):
+        existing_by_key.setdefault((res.sail_number, res.boat_country_code), res)
+
+    scoring_map = get_scoring_map(db, int(race.regatta_id), str(race.class_name or ""))
+    competitor_ctx: Optional[dict] = None
+    new_rows: List[Dict[str, Any]] = []
+    for i, r in enumerate(plan.rows):
+        sn = r["sail_number"]
+        cc = r["boat_country_code"]
+        pts_str = r["points"]
+        code = _norm(r["code"]) if r["code"] else None
+        if code:
+            if competitor_ctx is None:
+                competitor_ctx = _build_competitor_context_for_race(db, race)
+            try:
+                pts_val = compute_points_for_code(
+                    db=db,
+                    race=race,
+                    sail_number=sn,
+                    code=code,
+                    manual_points=float(pts_str) if pts_str else None,
+                    scoring_map=scoring_map,
+                    ctx=competitor_ctx,
+                    boat_country_code=cc,
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Line {r['line']}: {e}")
+        else:
+            pts_val = float(pts_str)
+
+        current = existing_by_key.get((sn, cc))
+        if current is not None:
+            current.points = float(pts_val)
+            current.code = code
+            current.points_override = float(pts_val) if code else None
+            continue
+
+        entry = plan.entries.by_pair.get((sn, cc))
+        helm_name = (
+            f"{getattr(entry, 'first_name', '') or ''} {getattr(entry, 'last_name', '') or ''}".strip()
+            if entry else ""
+        )
+        new_rows.append(dict(
+            regatta_id=race.regatta_id,
+            race_id=race_id,
+            sail_number=sn,
+            boat_country_code=cc,
+            boat_name=getattr(entry, "boat_name", None) if entry else None,
+            class_name=race.class_name,
+            skipper_name=helm_name or None,
+            position=i + 1,
+            points=float(pts_val),
+            code=code,
+            points_override=float(pts_val) if code else None,
+        ))
+
+    write_result_columns(db, existing, before, _ONE_DESIGN_UPDATED_COLUMNS)
+    insert_result_rows(db, new_rows)
+    normalize_race_results(db, race)
+
+
+def _write_handicap(db: Session, plan: _RaceImport) -> None:
+    """Substitui os resultados da race pelo ficheiro (o mesmo caminho do bulk save)."""
+    race = plan.race
+    payload: List[schemas.ResultCreate] = []
+    for r in plan.rows:
+        entry = plan.entries.by_pair.get((r["sail_number"], r["boat_country_code"]))
+        rating_val = r.get("rating")
+        if rating_val is None:
+            rating_val = _effective_entry_rating_for_race(entry, race)
+        helm_name = (
+            f"{getattr(entry, 'first_name', '') or ''} {getattr(entry, 'last_name', '') or ''}".strip()
+            if entry
+            else ""
+        )
+        finish_day_val = r.get("finish_day")
+        payload.append(
+            schemas.ResultCreate(
+                regatta_id=race.regatta_id,
+                race_id=int(race.id),
+                sail_number=r["sail_number"],
+                boat_country_code=r["boat_country_code"],
+                boat_name=getattr(entry, "boat_name", None) if entry else None,
+                helm_name=helm_name or None,
+                position=None,
+                points=None,
+                code=r.get("code"),
+                finish_time=r.get("finish_time") or None,
+                finish_day=int(finish_day_val) if str(finish_day_val or "").strip() != "" else None,
+                elapsed_time=r.get("elapsed_time") or None,
+                corrected_time=r.get("corrected_time") or None,
+                rating=rating_val,
+            )
+        )
+    save_race_results(db, race, payload, "all", entries=plan.entries)
+
+
+def _apply_import(db: Session, imp: _CsvImport, *, clear_existing: bool) -> None:
+    lock_races_for_write(db, imp.plans.keys())
+    for plan in imp.plans.values():
+        if plan.is_one_design:
+            _write_one_design(db, plan, clear_existing=clear_existing)
+        else:
+            _write_handicap(db, plan)
+
+
+def _race_results(db: Session, race_id: int) -> List[schemas.ResultRead]:
+    rows = (
+        db.query(models.Result)
+        .filter(models.Result.race_id == race_id)
+        .order_by(models.Result.position.asc(), models.Result.id.asc())
+        .all()
+    )
+    return [schemas.ResultRead.model_validate(r) for r in rows]
+
+
+def _import_failed(errors: List[str]) -> HTTPException:
+    shown = "; ".join(errors[:10])
+    more = f" (+{len(errors) - 10} more)" if len(errors) > 10 else ""
+    return HTTPException(status_code=400, detail=f"Import failed: {shown}{more}")
+
+
+def _finish(db: Session, dry_run: bool, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Commit, ou rollback em dry_run (os resultados do payload já foram lidos)."""
+    if dry_run:
+        db.rollback()
+        payload["dry_run"] = True
+    else:
+        db.commit()
+    return payload
+
+
+def _assert_regatta_access(db: Session, current_user: models.User, regatta: Optional[models.Regatta]) -> None:
+    if regatta:
+        if current_user.role in ("admin", "platform_admin"):
+            assert_user_can_manage_org_id(current_user, regatta.organization_id)
+        else:
+            assert_staff_regatta_access(db, current_user, regatta.id)
+
+
+# ============================================================
+# Routes
+# ============================================================
+@router.post("/races/{race_id}/import/csv")
+def import_race_results_csv(
+    race_id: int,
+    file: UploadFile = File(...),
+    clear_existing: bool = Form(False),
+    confirm: bool = Form(False),
+    dry_run: bool = Form(False),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Import CSV for this race (columns as in the race export).
+    Without confirm: returns validation + preview.
+    With confirm: applies import (one design: upsert by sail + country, optional
+    clear_existing; handicap: replaces the race results).
+    With dry_run: runs the import and returns the resulting race results without saving.
+    """
+    if current_user.role not in ("admin", "platform_admin", "scorer"):
+        raise HTTPException(status_code=403, detail="Access denied")
+    if not file:
+        raise HTTPException(status_code=400, detail="Missing file.")
+    race = db.query(models.Race).filter(models.Race.id == race_id).first()
+    if not race:
+        raise HTTPException(status_code=404, detail="Race not found")
+    regatta = db.query(models.Regatta).filter_by(id=race.regatta_id).first()
+    _assert_regatta_access(db, current_user, regatta)
+
+    imp = _CsvImport(db, int(race.regatta_id), [race])
+    plan = imp.plan(race)
+    try:
+        imp.read(file.file)
+    finally:
+        file.file.close()
+
+    if not confirm and not dry_run:
+        return {
+            "ok": not imp.errors,
+            "preview": plan.preview(),
+            "errors": imp.errors,
+            "unmatched": plan.unmatched,
+            "columns": plan.columns,
+        }
+    if imp.errors:
+        raise _import_failed(imp.errors)
+
+    _apply_import(db, imp, clear_existing=clear_existing)
+    return _finish(db, dry_run, {
+        "ok": True,
+        "applied": len(plan.rows),
+        "results": _race_results(db, race_id),
+        "columns": plan.columns,
+    })
+
+
+@router.post("/regattas/{regatta_id}/import/csv")
+def import_regatta_results_csv(
+    regatta_id: int,
+    file: UploadFile = File(...),
+    clear_existing: bool = Form(False),
+    confirm: bool = Form(False),
+    dry_run: bool = Form(False),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Import de várias races num só CSV: coluna `race_id` + as colunas do modo de cada
+    race (as do export). Mesmo fluxo do import por race (validação / confirm / dry_run);
+    com confirm grava todas as races num só commit, ou nenhuma.
+    """
+    if current_user.role not in ("admin", "platform_admin", "scorer"):
+        raise HTTPException(status_code=403, detail="Access denied")
+    if not file:
+        raise HTTPException(status_code=400, detail="Missing file.")
+    regatta = db.query(models.Regatta).filter_by(id=regatta_id).first()
+    if not regatta:
+        raise HTTPException(status_code=404, detail="Regatta not found")
+    _assert_regatta_access(db, current_user, regatta)
+
+    races = (
+        db.query(models.Race)
+        .filter(models.Race.regatta_id == regatta_id)
+        .order_by(models.Race.order_index.asc(), models.Race.id.asc())
+        .all()
+    )
+    imp = _CsvImport(db, regatta_id, races, by_race_column=True)
+    try:
+        imp.read(file.file)
+    finally:
+        file.file.close()
+
+    if not confirm and not dry_run:
+        return {
+            "ok": not imp.errors,
+            "errors": imp.errors,
+            "unmatched": imp.unmatched,
+            "races": [
+                {
+                    "race_id": int(plan.race.id),
+                    "race_name": plan.race.name,
+                    "class_name": plan.race.class_name,
+                    "columns": plan.columns,
+                    "rows": len(plan.rows),
+                    "preview": plan.preview(),
+                }
+                for plan in imp.plans.values()
+            ],
+        }
+    if imp.errors:
+        raise _import_failed(imp.errors)
+
+    _apply_import(db, imp, clear_existing=clear_existing)
+    return _finish(db, dry_run, {
+        "ok": True,
+        "applied": imp.applied,
+        "races": [
+            {
+                "race_id": int(plan.race.id),
+                "race_name": plan.race.name,
+                "applied": len(plan.rows),
+                "results": _race_results(db, int(plan.race.id)),
+            }
+            for plan in imp.plans.values()
+        ],
+    })
@@ -8,22 +8,15 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app import models, schemas
 from app.org_scope import assert_staff_regatta_access, assert_user_can_manage_org_id
+from app.services.race_locks import lock_race_for_write
 from utils.auth_utils import get_current_user
 
 from app.routes.results_utils import (
-    AUTO_N_PLUS_ONE_CODES,
     PositionPatch,
     CodePatch,
-    UNRANKED_POSITION,
-    _norm,
-    capture_finish_position_before_unrank,
-    is_adjustable,
-    is_prp_code,
-    prp_scored_base_points,
+    apply_code_patch,
     get_scoring_map,
-    compute_points_for_code,
     result_removes_from_ranking,
-    removes_from_ranking,
     normalize_race_results,
     shift_finish_positions,
     _parse_time_to_seconds,
@@ -49,20 +42,20 @@ def _norm_time_or_none(v: str | None) -> str | None:
     return s or None
 
 
-@router.delete("/{result_id}", status_code=204)
-def delete_result(
+def _load_result_for_write(
+    db: Session,
     result_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
-    if current_user.role not in ("admin", "platform_admin", "scorer"):
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    row = db.query(models.Result).filter_by(id=result_id).first()
-    if not row:
+    current_user: models.User,
+) -> tuple[models.Result, models.Race]:
+    """
+    Permissões e lock de escrita da race ANTES de ler a linha a mudar: nenhum handler
+    calcula a partir de uma cópia lida antes de outra escrita da mesma race acabar.
+    """
+    race_id = db.query(models.Result.race_id).filter(models.Result.id == result_id).scalar()
+    if race_id is None:
         raise HTTPException(status_code=404, detail="Result not found")
 
-    race = db.query(models.Race).filter_by(id=row.race_id).first()
+    race = db.query(models.Race).filter_by(id=race_id).first()
     if not race:
         raise HTTPException(status_code=404, detail="Race not found")
     regatta = db.query(models.Regatta).filter_by(id=race.regatta_id).first()
@@ -71,6 +64,25 @@ def delete_result(
             assert_user_can_manage_org_id(current_user, regatta.organization_id)
         else:
             assert_staff_regatta_access(db, current_user, regatta.id)
+    lock_race_for_write(db, race.id)
+
+    row = db.query(models.Result).filter_by(id=result_id).first()
+    if not row:
+        # apagada por quem tinha o lock
+        raise HTTPException(status_code=404, detail="Result not found")
+    return row, race
+
+
+@router.delete("/{result_id}", status_code=204)
+def delete_result(
+    result_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    if current_user.role not in ("admin", "platform_admin", "scorer"):
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    row, race = _load_result_for_write(db, result_id, current_user)
 
     db.delete(row)
     db.flush()
@@ -89,19 +101,7 @@ def change_result_position(
     if current_user.role not in ("admin", "platform_admin", "scorer"):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    row = db.query(models.Result).filter(models.Result.id == result_id).first()
-    if not row:
-        raise HTTPException(status_code=404, detail="Result not found")
-
-    race = db.query(models.Race).filter_by(id=row.race_id).first()
-    if not race:
-        raise HTTPException(status_code=404, detail="Race not found")
-    regatta = db.query(models.Regatta).filter_by(id=race.regatta_id).first()
-    if regatta:
-        if current_user.role in ("admin", "platform_admin"):
-            assert_user_can_manage_org_id(current_user, regatta.organization_id)
-        else:
-            assert_staff_regatta_access(db, current_user, regatta.id)
+    row, race = _load_result_for_write(db, result_id, current_user)
 
     # se este code remove do ranking, não faz sentido mover
     if result_removes_from_ranking(row):
@@ -174,82 +174,15 @@ def set_result_code(
     if current_user.role not in ("admin", "platform_admin", "scorer"):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    row = db.query(models.Result).filter_by(id=result_id).first()
-    if not row:
-        raise HTTPException(status_code=404, detail="Result not found")
-
-    race = db.query(models.Race).filter_by(id=row.race_id).first()
-    if not race:
-        raise HTTPException(status_code=404, detail="Race not found")
-    regatta = db.query(models.Regatta).filter_by(id=race.regatta_id).first()
-    if regatta:
-        if current_user.role in ("admin", "platform_admin"):
-            assert_user_can_manage_org_id(current_user, regatta.organization_id)
-        else:
-            assert_staff_regatta_access(db, current_user, regatta.id)
+    row, race = _load_result_for_write(db, result_id, current_user)
 
     scoring_map = get_scoring_map(db, int(row.regatta_id), str(race.class_name or ""))
 
-    raw = (body.code or "").strip()
-    if raw == "":
-        # limpar code => re-rank por finish_position (One Design) ou tempo (Handicap)
-        row.code = None
-        if hasattr(row, "code_shifts_places"):
-            row.code_shifts_places = False
-        if hasattr(row, "code_discardable"):
-            row.code_discardable = None
-        if hasattr(row, "points_override"):
-            row.points_override = None
-
-        db.flush()
-        normalize_race_results(db, race)
-        db.commit()
-        db.refresh(row)
-        return row
-
-    code = _norm(raw)
-    effective_points_arg = body.prp_percent if body.prp_percent is not None else body.points
-    base_points = prp_scored_base_points(row) if is_prp_code(code) else None
-
     try:
-        pts = compute_points_for_code(
-            db=db,
-            race=race,
-            sail_number=row.sail_number,
-            code=code,
-            manual_points=effective_points_arg,
-            scoring_map=scoring_map,
-            boat_country_code=getattr(row, "boat_country_code", None),
-            base_points=base_points,
-        )
+        apply_code_patch(db, race, row, body, scoring_map)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    row.code = code
-    row.points = float(pts)
-
-    # ✅ ao definir um code, normalmente queremos “voltar ao normal” (sem override manual)
-    if hasattr(row, "points_override"):
-        row.points_override = None
-
-    if hasattr(row, "code_shifts_places"):
-        if body.shifts_places_behind is not None:
-            row.code_shifts_places = bool(body.shifts_places_behind)
-        elif code in AUTO_N_PLUS_ONE_CODES or is_prp_code(code) or is_adjustable(code):
-            row.code_shifts_places = False
-        # custom sem flag explícito: mantém valor anterior ou False
-
-    if hasattr(row, "code_discardable"):
-        if body.discardable is not None:
-            row.code_discardable = bool(body.discardable)
-        elif code in AUTO_N_PLUS_ONE_CODES or is_prp_code(code) or is_adjustable(code):
-            row.code_discardable = None
-        # custom sem flag explícita: mantém valor anterior ou None
-
-    if result_removes_from_ranking(row):
-        capture_finish_position_before_unrank(row)
-        row.position = UNRANKED_POSITION
-
     db.flush()
     normalize_race_results(db, race)
     db.commit()
@@ -267,19 +200,7 @@ def patch_handicap_fields(
     if current_user.role not in ("admin", "platform_admin", "scorer"):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    row = db.query(models.Result).filter_by(id=result_id).first()
-    if not row:
-        raise HTTPException(status_code=404, detail="Result not found")
-
-    race = db.query(models.Race).filter_by(id=row.race_id).first()
-    if not race:
-        raise HTTPException(status_code=404, detail="Race not found")
-    regatta = db.query(models.Regatta).filter_by(id=race.regatta_id).first()
-    if regatta:
-        if current_user.role in ("admin", "platform_admin"):
-            assert_user_can_manage_org_id(current_user, regatta.organization_id)
-        else:
-            assert_staff_regatta_access(db, current_user, regatta.id)
+    row, race = _load_result_for_write(db, result_id, current_user)
 
     finish_day = body.finish_day
     if finish_day is not None and int(finish_day) < 0:
@@ -325,19 +246,7 @@ def override_points(
     if current_user.role not in ("admin", "platform_admin", "scorer"):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    row = db.query(models.Result).filter_by(id=result_id).first()
-    if not row:
-        raise HTTPException(status_code=404, detail="Result not found")
-
-    race = db.query(models.Race).filter_by(id=row.race_id).first()
-    if not race:
-        raise HTTPException(status_code=404, detail="Race not found")
-    regatta = db.query(models.Regatta).filter_by(id=race.regatta_id).first()
-    if regatta:
-        if current_user.role in ("admin", "platform_admin"):
-            assert_user_can_manage_org_id(current_user, regatta.organization_id)
-        else:
-            assert_staff_regatta_access(db, current_user, regatta.id)
+    row, race = _load_result_for_write(db, result_id, current_user)
 
     # não faz sentido override em resultados fora do ranking (DNF/DNC/etc)
     if result_removes_from_ranking(row):
@@ -369,19 +278,7 @@ def undo_override_points(
     if current_user.role not in ("admin", "platform_admin", "scorer"):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    row = db.query(models.Result).filter_by(id=result_id).first()
-    if not row:
-        raise HTTPException(status_code=404, detail="Result not found")
-
-    race = db.query(models.Race).filter_by(id=row.race_id).first()
-    if not race:
-        raise HTTPException(status_code=404, detail="Race not found")
-    regatta = db.query(models.Regatta).filter_by(id=race.regatta_id).first()
-    if regatta:
-        if current_user.role in ("admin", "platform_admin"):
-            assert_user_can_manage_org_id(current_user, regatta.organization_id)
-        else:
-            assert_staff_regatta_access(db, current_user, regatta.id)
+    row, race = _load_result_for_write(db, result_id, current_user)
 
     if not hasattr(row, "points_override"):
         raise HTTPException(status_code=500, detail="Result model has no points_override field")
@@ -1,26 +1,31 @@
 # app/routes/results_overall.py
 from __future__ import annotations
 
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import Response
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app import models
 from app.scoring.tiebreakers import (
-    sort_overall_rows,           # ✅ já tinhas
-    tie_signature_overall,       # ✅ NOVO (para ranks com empate 1,2,2,4)
+    StandingsKey,
+    build_standings_keys,        # keys 1x por barco: sort + ranks com empate 1,2,2,4
+    sort_by_standings_keys,
 )
-from app.services.results_pdf import build_results_pdf
+from app.scoring import matrix_kernel
+from app.services import pdf_render_pool, race_locks, scoring_pool, standings_cache
+from app.services.http_cache import conditional_get
+from utils.auth_utils import get_current_user
+from app.services.scoring_snapshot import RegattaScoringSnapshot, load_class_names, load_scoring_snapshot
 from app.routes.results_utils import (
-    build_eligible_result_identities,
+    entry_is_results_eligible,
     entry_result_identity,
     format_result_code_display,
-    result_row_identity,
 )
 
 router = APIRouter()
@@ -48,107 +53,10 @@ def _sc_key(sail_number: Any, boat_country_code: Any) -> str:
     return f"{_sn_norm(sail_number)}||{_cc_norm(boat_country_code)}"
 
 
-def _finals_fleet_order_map(
-    db: Session,
-    regatta_id: int,
-    class_name: str | None,
-) -> dict[str, int]:
-    """
-    Se existir um FleetSet de phase='finals' para esta regata/classe,
-    devolve um mapa "<SAIL>||<COUNTRY>" -> order_index da fleet (1=Gold, 2=Silver, ...).
-    """
-    if not class_name:
-        return {}
-
-    fs = (
-        db.query(models.FleetSet)
-        .filter(
-            models.FleetSet.regatta_id == regatta_id,
-            models.FleetSet.class_name == class_name,
-            models.FleetSet.phase == "finals",
-        )
-        .order_by(models.FleetSet.created_at.desc(), models.FleetSet.id.desc())
-        .first()
-    )
-    if not fs:
-        return {}
-
-    rows = (
-        db.query(models.Entry.sail_number, models.Entry.boat_country_code, models.Fleet.order_index)
-        .join(models.FleetAssignment, models.Entry.id == models.FleetAssignment.entry_id)
-        .join(models.Fleet, models.FleetAssignment.fleet_id == models.Fleet.id)
-        .filter(
-            models.Entry.regatta_id == regatta_id,
-            models.Entry.class_name == class_name,
-            models.Fleet.fleet_set_id == fs.id,
-        )
-        .all()
-    )
-
-    mapping: dict[str, int] = {}
-    for sn, cc, idx in rows:
-        key = _sc_key(sn, cc)
-        if not _sn_norm(sn):
-            continue
-        mapping[key] = int(idx or 0)
-    return mapping
-
-
-def _medal_entry_set(
-    db: Session,
-    regatta_id: int,
-    class_name: str | None,
-) -> set[str]:
-    """
-    Conjunto de identidades "<SAIL>||<COUNTRY>" que pertencem à Medal Race (phase='medal').
-    (isto define "MR sailors", não define "MR races")
-    """
-    if not class_name:
-        return set()
-
-    fs = (
-        db.query(models.FleetSet)
-        .filter(
-            models.FleetSet.regatta_id == regatta_id,
-            models.FleetSet.class_name == class_name,
-            models.FleetSet.phase == "medal",
-        )
-        .order_by(models.FleetSet.created_at.desc(), models.FleetSet.id.desc())
-        .first()
-    )
-    if not fs:
-        return set()
-
-    rows = (
-        db.query(models.Entry.sail_number, models.Entry.boat_country_code)
-        .join(models.FleetAssignment, models.Entry.id == models.FleetAssignment.entry_id)
-        .join(models.Fleet, models.FleetAssignment.fleet_id == models.Fleet.id)
-        .filter(models.Fleet.fleet_set_id == fs.id)
-        .all()
-    )
-
-    out: set[str] = set()
-    for sn, cc in rows:
-        snn = _sn_norm(sn)
-        if snn:
-            out.add(_sc_key(snn, cc))
-    return out
-
-
 # =====================================================================
 # Helpers para Discards (Opção A: discard_schedule)
 # =====================================================================
 
-def _get_class_settings_model():
-    Model = getattr(models, "RegattaClassSettings", None)
-    if Model is not None:
-        return Model
-    Model = getattr(models, "RegattaClassOverride", None)
-    if Model is not None:
-        return Model
-    return None
-
-
 def _extract_schedule(raw: Any) -> List[int]:
     """
     Aceita:
@@ -312,34 +220,179 @@ def _short_race_name(r: models.Race) -> str:
     return name
 
 
-def get_overall_results_data(
+# =====================================================================
+# Estado intermédio do overall (base para o recompute incremental)
+# =====================================================================
+
+RowKey = Tuple[str, str]  # (class_name, "<SAIL>||<COUNTRY>")
+
+# campos de cada row, pela ordem em que saem no payload
+OVERALL_ROW_FIELDS: Tuple[str, ...] = (
+    "sail_number",
+    "boat_country_code",
+    "boat_name",
+    "class_name",
+    "skipper_name",
+    "boat_model",
+    "bow_number",
+    "club",
+    "total_points",
+    "net_points",
+    "per_race",
+    "per_race_fleet",
+    "per_race_code",
+    "per_race_times",
+    "overall_rank",
+    "finals_fleet",
+    "is_medal",
+)
+_PER_RACE_FIELDS = ("per_race", "per_race_fleet", "per_race_code", "per_race_times")
+
+_COMPACT_FIELDS = frozenset({
+    "overall_rank",
+    "sail_number",
+    "boat_country_code",
+    "boat_name",
+    "class_name",
+    "skipper_name",
+    "total_points",
+    "net_points",
+    "per_race",
+    "finals_fleet",
+    "is_medal",
+})
+# view -> campos por defeito (None = todos)
+OVERALL_VIEWS: Dict[str, Optional[frozenset]] = {
+    "full": None,
+    "compact": _COMPACT_FIELDS,
+    "handicap": _COMPACT_FIELDS | {"boat_model", "club", "per_race_times"},
+}
+
+
+@dataclass(frozen=True)
+class OverallView:
+    """
+    Que campos leva cada row do overall. Os mapas por race que não são pedidos
+    nem chegam a ser construídos. `positional`: os mapas por race passam a listas
+    alinhadas com `races` do payload (em vez de dicts com o nome da race).
+    Hashable: faz parte da chave da cache de standings.
+    """
+    name: str = "full"
+    fields: Optional[frozenset] = None  # None = todos
+    positional: bool = False
+
+    def wants(self, field_name: str) -> bool:
+        return self.fields is None or field_name in self.fields
+
+
+FULL_VIEW = OverallView()
+
+
+def parse_overall_view(view: Optional[str], fields: Optional[str]) -> OverallView:
+    name = (view or "full").strip().lower()
+    if name not in OVERALL_VIEWS:
+        raise HTTPException(400, f"Invalid view '{view}'. Use one of: {', '.join(OVERALL_VIEWS)}")
+    selected = OVERALL_VIEWS[name]
+    if fields:
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = sorted(requested - set(OVERALL_ROW_FIELDS))
+        if unknown:
+            raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}")
+        selected = frozenset(requested)
+    if name == "full" and selected is None:
+        return FULL_VIEW
+    return OverallView(name=name, fields=selected, positional=name != "full")
+
+
+@dataclass
+class OverallContext:
+    """
+    Tudo o que o overall usa e que NÃO depende das linhas de Result:
+    races visíveis, discards, medal races, fleets, elegibilidade e dados das entries.
+    Só muda com escritas "estruturais" (races, settings, entries, publicação, fleets).
+    """
+    regatta_id: int
+    class_name: Optional[str]
+    public: bool
+    race_ids: List[int]
+    race_map: Dict[int, str]
+    races_meta: Dict[str, Dict[str, object]]
+    non_discardable_race_ids: set[int]
+    race_ids_by_class: Dict[str, List[int]]
+    discardable_by_class: Dict[str, Dict[str, bool]]
+    discard_count_by_class: Dict[str, int]
+    medal_race_ids_by_class: Dict[str, set[int]]
+    fleet_by_sn_race: Dict[tuple[str, str, str, int], str]
+    eligible_identities: set[Tuple[str, str]]
+    entry_extra: Dict[Tuple[str, str], Dict[str, object]]
+    medal_sail_set_by_class: Dict[str, set[str]]
+    finals_map: Dict[str, int]
+    extra_out: Dict[str, object]
+    race_versions: Dict[int, int]
+    # entries do snapshot (Row tuples) — para o fallback sem results
+    entries: Tuple[Any, ...] = ()
+
+
+@dataclass
+class OverallState:
+    """
+    Payload do overall + matriz boats × races que lhe deu origem.
+    Permite atualizar só as colunas (races) cujos resultados mudaram.
+    Partilhado via cache: nunca mutar, criar um novo.
+    """
+    payload: Dict[str, Any]
+    ctx: Optional[OverallContext] = None
+    view: OverallView = FULL_VIEW
+    per_race_map: Dict[RowKey, Dict[int, Dict[str, object]]] = field(default_factory=dict)
+    # key -> race_id -> (result_id, info); a info "oficial" é a do result com menor id
+    info_by_race: Dict[RowKey, Dict[int, Tuple[int, Dict[str, object]]]] = field(default_factory=dict)
+    rows_by_key: Dict[RowKey, Dict[str, Any]] = field(default_factory=dict)
+    # só preenchido quando o kernel NumPy está ativo
+    scores_by_key: Dict[RowKey, matrix_kernel.MatrixScore] = field(default_factory=dict)
+
+
+def _load_overall_context(
+    db: Session,
     regatta_id: int,
     class_name: str | None,
     public: bool,
-    db: Session,
-):
-    reg = db.query(models.Regatta).filter(models.Regatta.id == regatta_id).first()
-    if not reg:
-        raise HTTPException(404, "Regatta not found")
+) -> Optional[OverallContext]:
+    """None => público sem races publicadas para a classe."""
+    return _overall_context_from_snapshot(load_scoring_snapshot(db, regatta_id, class_name), public)
 
-    reg_default_D = int(getattr(reg, "discard_count", 0) or 0)
-    reg_default_TH = int(getattr(reg, "discard_threshold", 0) or 0)
+
+def _overall_context_from_snapshot(
+    snap: RegattaScoringSnapshot,
+    public: bool,
+) -> Optional[OverallContext]:
+    """Deriva o contexto do overall a partir do snapshot (sem tocar na DB)."""
+    regatta_id = snap.regatta_id
+    class_name = snap.class_name
+    reg_default_D = snap.discard_count
+    reg_default_TH = snap.discard_threshold
+
+    def _published_count(cls: str) -> int:
+        row = snap.publications.get(cls)
+        return int(row.published_races_count) if row else 0
+
+    def _published_at(cls: str) -> str | None:
+        row = snap.publications.get(cls)
+        if not row or not getattr(row, "published_at", None):
+            return None
+        dt = row.published_at
+        return dt.isoformat() if hasattr(dt, "isoformat") else str(dt)
 
     # --------------------------------------------------------
     # Corridas consideradas (TODAS ou só publicadas se public=True)
     # --------------------------------------------------------
-    race_q = db.query(models.Race).filter(models.Race.regatta_id == regatta_id)
-    if class_name:
-        race_q = race_q.filter(models.Race.class_name == class_name)
-
-    races = race_q.order_by(models.Race.order_index.asc(), models.Race.id.asc()).all()
+    races = [r for r in snap.races if not class_name or r.class_name == class_name]
 
     if public:
         if class_name:
-            k = _get_published_races_count(db, regatta_id, class_name)
+            k = _published_count(class_name)
             races = races[:k] if k > 0 else []
             if k == 0:
-                return {"rows": [], "races_meta": {}, "published_at": None}  # Public sees "No published results yet" for this class
+                return None  # Public sees "No published results yet" for this class
         else:
             # multi-class: for each class take first K races
             by_class: dict[str, list] = {}
@@ -348,12 +401,14 @@ def get_overall_results_data(
                 by_class.setdefault(cls, []).append(r)
             kept = []
             for cls, cls_races in by_class.items():
-                k = _get_published_races_count(db, regatta_id, cls)
+                k = _published_count(cls)
                 kept.extend(cls_races[:k] if k > 0 else [])
             races = sorted(kept, key=lambda r: (r.order_index or 0, r.id))
 
     race_ids = [int(r.id) for r in races]
     race_map = {int(r.id): _short_race_name(r) for r in races}
+    # lidas ANTES dos results: se uma escrita entrar pelo meio, a race volta a ser recarregada
+    race_versions = {int(r.id): int(getattr(r, "results_version", 0) or 0) for r in races}
 
     # estas nunca podem ser descartadas
     non_discardable_race_ids = {
@@ -366,34 +421,13 @@ def get_overall_results_data(
         race_ids_by_class.setdefault(cls, []).append(int(r.id))
 
     # --------------------------------------------------------
-    # Settings por classe (batch)
+    # Settings por classe
     # --------------------------------------------------------
-    SettingsModel = _get_class_settings_model()
-    settings_by_class: dict[str, Any] = {}
-
-    if SettingsModel is not None:
-        classes_needed = list(race_ids_by_class.keys())
-        if class_name:
-            classes_needed = [str(class_name)]
-
-        if classes_needed:
-            rows = (
-                db.query(SettingsModel)
-                .filter(
-                    SettingsModel.regatta_id == regatta_id,
-                    SettingsModel.class_name.in_(classes_needed),
-                )
-                .all()
-            )
-            settings_by_class = {
-                str(r.class_name): r
-                for r in rows
-                if getattr(r, "class_name", None)
-            }
+    settings_by_class = snap.class_settings
 
     from app.services.scoring_code_map import merge_scoring_codes_dict, parse_scoring_codes_dict
 
-    regatta_scoring_raw = getattr(reg, "scoring_codes", None) or {}
+    regatta_scoring_raw = snap.scoring_codes or {}
     discardable_by_class: Dict[str, Dict[str, bool]] = {}
     for cls in race_ids_by_class.keys():
         cs = settings_by_class.get(cls)
@@ -422,10 +456,14 @@ def get_overall_results_data(
                 TH_eff = int(cs.discard_threshold)
         return _fallback_discards_count_threshold(n_races_cls, int(D_eff), int(TH_eff))
 
+    discard_count_by_class: dict[str, int] = {}
+    for cls, ids in race_ids_by_class.items():
+        discard_count_by_class[cls] = _resolve_discard_count_for_class(cls, len(ids))
+
     # --------------------------------------------------------
     # Medal race IDs por classe (robusto)
     # - is_medal_race OR double_points
-    # - fallback FleetSet phase="medal"
+    # - fallback FleetSet phase="medal" (o mais recente por classe)
     # --------------------------------------------------------
     medal_race_ids_by_class: dict[str, set[int]] = {}
 
@@ -436,92 +474,191 @@ def get_overall_results_data(
             medal_race_ids_by_class.setdefault(cls, set()).add(int(r.id))
 
     # 2) fallback: FleetSet medal -> races desse fleet_set
-    medal_sets = (
-        db.query(models.FleetSet.id, models.FleetSet.class_name)
-        .filter(
-            models.FleetSet.regatta_id == regatta_id,
-            models.FleetSet.phase == "medal",
-        )
-        .order_by(
-            models.FleetSet.class_name.asc(),
-            models.FleetSet.created_at.desc(),
-            models.FleetSet.id.desc(),
-        )
-        .all()
-    )
-
-    latest_by_class: dict[str, int] = {}
-    for fs_id, cls in medal_sets:
-        if cls and str(cls) not in latest_by_class:
-            latest_by_class[str(cls)] = int(fs_id)
+    latest_medal_by_class: dict[str, int] = {}
+    for fs in snap.fleet_sets:
+        if fs.phase == "medal" and fs.class_name and str(fs.class_name) not in latest_medal_by_class:
+            latest_medal_by_class[str(fs.class_name)] = int(fs.id)
 
-    for cls, fs_id in latest_by_class.items():
-        ids = db.query(models.Race.id).filter(models.Race.fleet_set_id == fs_id).all()
-        medal_race_ids_by_class.setdefault(cls, set()).update({int(rid) for (rid,) in ids})
+    race_ids_by_fleet_set: dict[int, set[int]] = {}
+    for r in snap.races:
+        if r.fleet_set_id is not None:
+            race_ids_by_fleet_set.setdefault(int(r.fleet_set_id), set()).add(int(r.id))
 
-    def _multiplier_for(race_id: int, cls: str) -> float:
-        return 2.0 if race_id in medal_race_ids_by_class.get(cls, set()) else 1.0
+    for cls, fs_id in latest_medal_by_class.items():
+        medal_race_ids_by_class.setdefault(cls, set()).update(race_ids_by_fleet_set.get(fs_id, set()))
 
     # --------------------------------------------------------
     # Mapa (class_name, sail_number, country, race_id) -> fleet_name
     # (evita colisão: dois 12 na mesma classe com países diferentes)
     # --------------------------------------------------------
     fleet_by_sn_race: dict[tuple[str, str, str, int], str] = {}
+    for r in races:
+        if r.fleet_set_id is None:
+            continue
+        for m in snap.fleet_members.get(int(r.fleet_set_id), ()):
+            if m.entry_regatta_id != regatta_id:
+                continue
+            if class_name and m.class_name != class_name:
+                continue
+            snn = _sn_norm(m.sail_number)
+            ccn = (m.boat_country_code or "").strip().upper()
+            if snn:
+                fleet_by_sn_race[(str(m.class_name), snn, ccn, int(r.id))] = str(m.fleet_name)
 
-    if race_ids:
-        fleet_rows = (
-            db.query(
-                models.Race.id.label("race_id"),
-                models.Entry.class_name.label("class_name"),
-                models.Entry.sail_number.label("sail_number"),
-                models.Entry.boat_country_code.label("boat_country_code"),
-                models.Fleet.name.label("fleet_name"),
-            )
-            .join(models.FleetSet, models.Race.fleet_set_id == models.FleetSet.id)
-            .join(models.Fleet, models.Fleet.fleet_set_id == models.FleetSet.id)
-            .join(models.FleetAssignment, models.FleetAssignment.fleet_id == models.Fleet.id)
-            .join(models.Entry, models.Entry.id == models.FleetAssignment.entry_id)
-            .filter(
-                models.Race.regatta_id == regatta_id,
-                models.Entry.regatta_id == regatta_id,
-                models.Race.id.in_(race_ids),
-            )
-        )
+    # Só entradas existentes, paid+confirmed (resultados órfãos não aparecem)
+    eligible_identities: set[Tuple[str, str]] = {
+        entry_result_identity(e) for e in snap.entries if entry_is_results_eligible(e)
+    }
 
-        if class_name:
-            fleet_rows = fleet_rows.filter(models.Entry.class_name == class_name)
+    # Lookup boat_model e bow_number a partir das entries (para a resposta overall)
+    entry_extra: dict[tuple[str, str], dict[str, object]] = {}
+    for e in snap.entries:
+        if class_name and e.class_name != class_name:
+            continue
+        skipper = f"{getattr(e, 'first_name', '') or ''} {getattr(e, 'last_name', '') or ''}".strip() or None
+        entry_extra[entry_result_identity(e)] = {
+            "skipper_name": skipper,
+            "boat_model": getattr(e, "boat_model", None),
+            "bow_number": getattr(e, "bow_number", None),
+            "club": getattr(e, "club", None),
+        }
 
-        for fr in fleet_rows.all():
-            snn = _sn_norm(fr.sail_number)
-            ccn = (getattr(fr, "boat_country_code", None) or "").strip().upper()
+    # ========================================================
+    # MR sailors set por classe (para MR-first)
+    # ========================================================
+    def _medal_sails(cls: str) -> set[str]:
+        out: set[str] = set()
+        for m in snap.fleet_members.get(latest_medal_by_class.get(cls, -1), ()):
+            snn = _sn_norm(m.sail_number)
             if snn:
-                fleet_by_sn_race[(str(fr.class_name), snn, ccn, int(fr.race_id))] = str(
-                    fr.fleet_name
-                )
+                out.add(_sc_key(snn, m.boat_country_code))
+        return out
 
-    # --------------------------------------------------------
-    # Resultados por corrida (fonte principal)
-    # --------------------------------------------------------
-    pr_q = db.query(models.Result).filter(models.Result.regatta_id == regatta_id)
+    medal_sail_set_by_class: dict[str, set[str]] = {}
+    if class_name:
+        medal_sail_set_by_class[str(class_name)] = _medal_sails(str(class_name))
+    else:
+        for cls in race_ids_by_class.keys():
+            medal_sail_set_by_class[cls] = _medal_sails(cls)
+
+    # Finals: "<SAIL>||<COUNTRY>" -> order_index da fleet (1=Gold, 2=Silver, ...)
+    finals_map: dict[str, int] = {}
+    if class_name:
+        finals_id = snap.latest_fleet_set_id(class_name, "finals")
+        for m in snap.fleet_members.get(finals_id or -1, ()):
+            if m.entry_regatta_id != regatta_id or m.class_name != class_name:
+                continue
+            if not _sn_norm(m.sail_number):
+                continue
+            finals_map[_sc_key(m.sail_number, m.boat_country_code)] = int(m.fleet_order_index or 0)
+
+    # Metadados das races (start_time, handicap_method, orc_rating_mode) para detalhe handicap
+    races_meta: dict[str, dict[str, object]] = {}
+    for r in races:
+        rname = race_map.get(int(r.id), r.name)
+        races_meta[rname] = {
+            "race_id": int(r.id),
+            "race_date": getattr(r, "date", None),
+            "start_time": getattr(r, "start_time", None),
+            "handicap_method": getattr(r, "handicap_method", None),
+            "orc_rating_mode": getattr(r, "orc_rating_mode", None),
+        }
+
+    extra_out: dict[str, object] = {}
+    if class_name:
+        ckey = str(class_name).lower()
+        if ckey in snap.class_types:
+            extra_out["class_type"] = (snap.class_types[ckey] or "one_design").strip().lower()
+        else:
+            extra_out["class_type"] = "one_design"
+    if public and class_name:
+        extra_out["published_at"] = _published_at(class_name)
+    elif public and race_ids_by_class:
+        # Uma única classe nos resultados publicados
+        classes_in_result = list(race_ids_by_class.keys())
+        if len(classes_in_result) == 1:
+            extra_out["published_at"] = _published_at(classes_in_result[0])
+
+    return OverallContext(
+        regatta_id=int(regatta_id),
+        class_name=class_name,
+        public=bool(public),
+        race_ids=race_ids,
+        race_map=race_map,
+        races_meta=races_meta,
+        non_discardable_race_ids=non_discardable_race_ids,
+        race_ids_by_class=race_ids_by_class,
+        discardable_by_class=discardable_by_class,
+        discard_count_by_class=discard_count_by_class,
+        medal_race_ids_by_class=medal_race_ids_by_class,
+        fleet_by_sn_race=fleet_by_sn_race,
+        eligible_identities=eligible_identities,
+        entry_extra=entry_extra,
+        medal_sail_set_by_class=medal_sail_set_by_class,
+        finals_map=finals_map,
+        extra_out=extra_out,
+        race_versions=race_versions,
+        entries=snap.entries,
+    )
+
+
+def _query_race_results(db: Session, ctx: OverallContext, race_ids: List[int]) -> List[Any]:
+    return _query_results(db, ctx.regatta_id, race_ids, ctx.class_name)
+
+
+def _query_results(
+    db: Session,
+    regatta_id: int,
+    race_ids: List[int],
+    class_name: Optional[str] = None,
+) -> List[Any]:
+    # só as colunas que o _ingest_results lê (Row tuples: sem identity map nem objetos ORM)
+    pr_q = db.query(
+        models.Result.id,
+        models.Result.race_id,
+        models.Result.class_name,
+        models.Result.sail_number,
+        models.Result.boat_country_code,
+        models.Result.boat_name,
+        models.Result.skipper_name,
+        models.Result.position,
+        models.Result.points,
+        models.Result.code,
+        models.Result.code_discardable,
+        models.Result.finish_time,
+        models.Result.elapsed_time,
+        models.Result.corrected_time,
+        models.Result.delta,
+    ).filter(models.Result.regatta_id == regatta_id)
     if race_ids:
         pr_q = pr_q.filter(models.Result.race_id.in_(race_ids))
     if class_name:
         pr_q = pr_q.filter(models.Result.class_name == class_name)
-
-    per_race_map: dict[tuple[str, str], dict[int, dict[str, object]]] = {}
-    info_map: dict[tuple[str, str], dict[str, object]] = {}
-
-    pr_rows = pr_q.all()
+    # ordem estável: a info do barco vem sempre do result mais antigo
+    return pr_q.order_by(models.Result.id.asc()).all()
+
+
+def _ingest_results(
+    ctx: OverallContext,
+    pr_rows: List[Any],
+    per_race_map: Dict[RowKey, Dict[int, Dict[str, object]]],
+    info_by_race: Dict[RowKey, Dict[int, Tuple[int, Dict[str, object]]]],
+) -> set[RowKey]:
+    """Mete as linhas elegíveis na matriz; devolve as keys (barcos) tocadas."""
+    touched: set[RowKey] = set()
     for r in pr_rows:
         cls = str(r.class_name or "")
         sn = _sn_norm(r.sail_number)
         cc = _cc_norm(getattr(r, "boat_country_code", None))
         key = (cls, _sc_key(sn, cc))
+        if (cls.strip().lower(), key[1]) not in ctx.eligible_identities:
+            continue
 
-        mult = _multiplier_for(int(r.race_id), cls)
+        race_id = int(r.race_id)
+        mult = 2.0 if race_id in ctx.medal_race_ids_by_class.get(cls, set()) else 1.0
         eff_pts = float(r.points) * mult  # x2 só no overall
 
-        per_race_map.setdefault(key, {})[int(r.race_id)] = {
+        per_race_map.setdefault(key, {})[race_id] = {
             "points": eff_pts,
             "position": int(r.position),  # 🔥 necessário para MR-first
             "base_points": float(r.points),
@@ -533,205 +670,255 @@ def get_overall_results_data(
             "corrected_time": getattr(r, "corrected_time", None),
             "delta": getattr(r, "delta", None),
         }
-
-        if key not in info_map:
-            info_map[key] = {
+        info_by_race.setdefault(key, {})[race_id] = (
+            int(r.id),
+            {
                 "boat_name": r.boat_name,
                 "class_name": r.class_name,
                 "skipper_name": r.skipper_name,
                 "sail_number": r.sail_number,
                 "boat_country_code": getattr(r, "boat_country_code", None),
-            }
-
-    # Só entradas existentes, paid+confirmed (resultados órfãos não aparecem)
-    eligible_identities = build_eligible_result_identities(db, regatta_id, class_name)
-    pr_rows = [r for r in pr_rows if result_row_identity(r) in eligible_identities]
-    per_race_map = {
-        k: v for k, v in per_race_map.items()
-        if (k[0].strip().lower(), k[1]) in eligible_identities
-    }
-    info_map = {
-        k: v for k, v in info_map.items()
-        if (k[0].strip().lower(), k[1]) in eligible_identities
-    }
-
-    # Lookup boat_model e bow_number a partir das entries (para a resposta overall)
-    entry_extra: dict[tuple[str, str], dict[str, object]] = {}
-    entries_q = db.query(models.Entry).filter(models.Entry.regatta_id == regatta_id)
-    if class_name:
-        entries_q = entries_q.filter(models.Entry.class_name == class_name)
-    for e in entries_q.all():
-        skipper = f"{getattr(e, 'first_name', '') or ''} {getattr(e, 'last_name', '') or ''}".strip() or None
-        entry_extra[entry_result_identity(e)] = {
-            "skipper_name": skipper,
-            "boat_model": getattr(e, "boat_model", None),
-            "bow_number": getattr(e, "bow_number", None),
-            "club": getattr(e, "club", None),
-        }
+            },
+        )
+        touched.add(key)
+    return touched
 
-    overall: list[dict] = []
 
-    # ========================================================
-    # FALLBACK: se ainda não há Results, construir pelas Entries
-    # ========================================================
-    if not pr_rows:
-        entries_q = db.query(models.Entry).filter(models.Entry.regatta_id == regatta_id)
-        if class_name:
-            entries_q = entries_q.filter(models.Entry.class_name == class_name)
-
-        entries_q = entries_q.filter(models.Entry.paid.is_(True))
-        entries_q = entries_q.filter(models.Entry.confirmed.is_(True))
-
-        entries = entries_q.order_by(models.Entry.sail_number.asc()).all()
-
-        for e in entries:
-            sn_norm = _sn_norm(e.sail_number)
-            cls = str(e.class_name or "")
-            cc_e = (getattr(e, "boat_country_code", None) or "").strip().upper()
-
-            per_race_named: dict[str, object] = {}
-            per_race_fleet: dict[str, object] = {}
-            per_race_code: dict[str, object] = {}
-
-            for rid in race_ids:
-                rname = race_map[rid]
-                per_race_named[rname] = "-"
-                per_race_fleet[rname] = fleet_by_sn_race.get((cls, sn_norm, cc_e, rid))
-                per_race_code[rname] = None
-
-            skipper = f"{e.first_name or ''} {e.last_name or ''}".strip() or None
-
-            overall.append(
-                {
-                    "sail_number": e.sail_number,
-                    "boat_country_code": getattr(e, "boat_country_code", None),
-                    "boat_name": e.boat_name,
-                    "class_name": e.class_name,
-                    "skipper_name": skipper,
-                    "boat_model": getattr(e, "boat_model", None),
-                    "bow_number": getattr(e, "bow_number", None),
-                    "club": getattr(e, "club", None),
-                    "total_points": 0.0,
-                    "net_points": 0.0,
-                    "per_race": per_race_named,
-                    "per_race_fleet": per_race_fleet,
-                    "per_race_code": per_race_code,
-                    "per_race_times": {race_map[rid]: {} for rid in race_ids},
-                }
+def _boat_info(info_by_race_for_key: Dict[int, Tuple[int, Dict[str, object]]]) -> Dict[str, object]:
+    if not info_by_race_for_key:
+        return {}
+    return min(info_by_race_for_key.values(), key=lambda t: t[0])[1]
+
+
+def _score_boats_with_kernel(
+    ctx: OverallContext,
+    keys: List[RowKey],
+    per_race_map: Dict[RowKey, Dict[int, Dict[str, object]]],
+) -> Dict[RowKey, matrix_kernel.MatrixScore]:
+    """Totais/discards/A8 em bloco por classe (NumPy). {} se o kernel estiver desligado."""
+    keys_by_class: dict[str, list[RowKey]] = {}
+    for key in keys:
+        keys_by_class.setdefault(key[0], []).append(key)
+
+    out: Dict[RowKey, matrix_kernel.MatrixScore] = {}
+    for cls, cls_keys in keys_by_class.items():
+        if not matrix_kernel.kernel_enabled(len(cls_keys)):
+            continue
+        discardable_by_code = ctx.discardable_by_class.get(cls, {})
+        out.update(
+            matrix_kernel.score_matrix(
+                cls_keys,
+                per_race_map,
+                ctx.race_ids,
+                ctx.race_ids_by_class.get(cls, ctx.race_ids),
+                int(ctx.discard_count_by_class.get(cls, 0) or 0),
+                ctx.non_discardable_race_ids,
+                lambda cell: _is_discardable_code(
+                    cell.get("code"), discardable_by_code, cell.get("code_discardable")
+                ),
             )
+        )
+    return out
 
-    else:
-        discard_count_by_class: dict[str, int] = {}
-        for cls, ids in race_ids_by_class.items():
-            discard_count_by_class[cls] = _resolve_discard_count_for_class(cls, len(ids))
-
-        for key, per_by_id in per_race_map.items():
-            cls, _sc = key
-            info = info_map.get(key, {})
-            sn_norm = _sn_norm(info.get("sail_number"))
-
-            ordered_ids_cls = race_ids_by_class.get(cls, race_ids)
-            D_cls = int(discard_count_by_class.get(cls, 0) or 0)
-
-            discarded_ids = _compute_discards_fixed_count(
-                ordered_ids_cls,
-                per_by_id,
-                D_cls,
-                non_discardable_race_ids,
-                discardable_by_class.get(cls, {}),
-            )
 
-            total_points = 0.0
-            net_total = 0.0
-            per_race_named: dict[str, object] = {}
-            per_race_fleet: dict[str, object] = {}
-            per_race_code: dict[str, object] = {}
-            per_race_times: dict[str, dict[str, object]] = {}
+def _per_race_out(view: OverallView, race_names: List[str], values: List[Any]) -> Any:
+    return values if view.positional else dict(zip(race_names, values))
 
-            for rid in race_ids:
-                name = race_map[rid]
 
-                if rid not in per_by_id:
-                    per_race_named[name] = "-"
-                    per_race_fleet[name] = None
-                    per_race_code[name] = None
-                    per_race_times[name] = {}
-                    continue
+def _build_boat_row(
+    ctx: OverallContext,
+    key: RowKey,
+    per_by_id: Dict[int, Dict[str, object]],
+    info: Dict[str, object],
+    score: Optional[matrix_kernel.MatrixScore] = None,
+    view: OverallView = FULL_VIEW,
+) -> Dict[str, Any]:
+    """
+    Linha do overall de um barco (totais, discards e colunas por race), ainda sem rank.
+    Só constrói os mapas por race que a `view` pede.
+    """
+    cls, _sc = key
+    race_ids = ctx.race_ids
+    race_map = ctx.race_map
+    sn_norm = _sn_norm(info.get("sail_number"))
+
+    ordered_ids_cls = ctx.race_ids_by_class.get(cls, race_ids)
+    D_cls = int(ctx.discard_count_by_class.get(cls, 0) or 0)
 
-                pts = float(per_by_id[rid]["points"])
-                total_points += pts
+    if score is not None:
+        discarded_ids = score.discarded_ids
+    else:
+        discarded_ids = _compute_discards_fixed_count(
+            ordered_ids_cls,
+            per_by_id,
+            D_cls,
+            ctx.non_discardable_race_ids,
+            ctx.discardable_by_class.get(cls, {}),
+        )
 
-                code_raw = per_by_id[rid].get("code")
-                code = (str(code_raw).strip().upper() if code_raw else None)
-                per_race_code[name] = code
+    want_named = view.wants("per_race")
+    want_fleet = view.wants("per_race_fleet")
+    want_code = view.wants("per_race_code")
+    want_times = view.wants("per_race_times")
+    cc_for_fleet = (info.get("boat_country_code") or "").strip().upper()
+
+    total_points = 0.0
+    net_total = 0.0
+    per_race_named: list[object] = []
+    per_race_fleet: list[object] = []
+    per_race_code: list[object] = []
+    per_race_times: list[dict[str, object]] = []
+
+    for rid in race_ids:
+        cell = per_by_id.get(rid)
+        if cell is None:
+            if want_named:
+                per_race_named.append("-")
+            if want_fleet:
+                per_race_fleet.append(None)
+            if want_code:
+                per_race_code.append(None)
+            if want_times:
+                per_race_times.append({})
+            continue
 
+        pts = float(cell["points"])
+        total_points += pts
+        if rid not in discarded_ids:
+            net_total += pts
+
+        if want_named or want_code:
+            code_raw = cell.get("code")
+            code = (str(code_raw).strip().upper() if code_raw else None)
+            if want_code:
+                per_race_code.append(code)
+            if want_named:
                 display = format_result_code_display(code, pts)
-
                 if rid not in discarded_ids:
-                    net_total += pts
-                    per_race_named[name] = display if code else pts
+                    per_race_named.append(display if code else pts)
                 else:
-                    per_race_named[name] = f"{_DISCARD_INVISIBLE_PREFIX}({display})"
-
-                cc_for_fleet = (info.get("boat_country_code") or "").strip().upper()
-                per_race_fleet[name] = fleet_by_sn_race.get(
-                    (cls, sn_norm, cc_for_fleet, rid)
-                )
-
-                # Handicap: tempos e dados preenchidos pelo admin
-                ft = per_by_id[rid].get("finish_time")
-                et = per_by_id[rid].get("elapsed_time")
-                ct = per_by_id[rid].get("corrected_time")
-                delta = per_by_id[rid].get("delta")
-                pts = per_by_id[rid].get("base_points")
-                pos = per_by_id[rid].get("position")
-                if ft is not None or et is not None or ct is not None or delta is not None or pts is not None:
-                    per_race_times[name] = {
-                        "finish_time": ft,
-                        "elapsed_time": et,
-                        "corrected_time": ct,
-                        "delta": delta,
-                        "points": float(pts) if pts is not None else None,
-                        "position": int(pos) if pos is not None else None,
-                    }
-                else:
-                    per_race_times[name] = {"points": float(pts) if pts is not None else None, "position": int(pos) if pos is not None else None}
-
-            extra = entry_extra.get((cls.strip().lower(), _sc), {})
-            overall.append(
-                {
-                    "sail_number": info.get("sail_number"),
-                    "boat_country_code": info.get("boat_country_code"),
-                    "boat_name": info.get("boat_name"),
-                    "class_name": info.get("class_name"),
-                    "skipper_name": extra.get("skipper_name") or info.get("skipper_name"),
-                    "boat_model": extra.get("boat_model"),
-                    "bow_number": extra.get("bow_number"),
-                    "club": extra.get("club"),
-                    "total_points": float(total_points),
-                    "net_points": float(net_total),
-                    "per_race": per_race_named,
-                    "per_race_fleet": per_race_fleet,
-                    "per_race_code": per_race_code,
-                    "per_race_times": per_race_times,
-                }
+                    per_race_named.append(f"{_DISCARD_INVISIBLE_PREFIX}({display})")
+
+        if want_fleet:
+            per_race_fleet.append(ctx.fleet_by_sn_race.get((cls, sn_norm, cc_for_fleet, rid)))
+
+        if want_times:
+            # Handicap: tempos e dados preenchidos pelo admin
+            ft = cell.get("finish_time")
+            et = cell.get("elapsed_time")
+            ct = cell.get("corrected_time")
+            delta = cell.get("delta")
+            base_pts = cell.get("base_points")
+            pos = cell.get("position")
+            if ft is not None or et is not None or ct is not None or delta is not None or base_pts is not None:
+                per_race_times.append({
+                    "finish_time": ft,
+                    "elapsed_time": et,
+                    "corrected_time": ct,
+                    "delta": delta,
+                    "points": float(base_pts) if base_pts is not None else None,
+                    "position": int(pos) if pos is not None else None,
+                })
+            else:
+                per_race_times.append({"points": float(base_pts) if base_pts is not None else None, "position": int(pos) if pos is not None else None})
+
+    if score is not None:
+        total_points = score.total_points
+        net_total = score.net_points
+
+    race_names = [race_map[rid] for rid in race_ids]
+    extra = ctx.entry_extra.get((cls.strip().lower(), _sc), {})
+    row: Dict[str, Any] = {
+        "sail_number": info.get("sail_number"),
+        "boat_country_code": info.get("boat_country_code"),
+        "boat_name": info.get("boat_name"),
+        "class_name": info.get("class_name"),
+        "skipper_name": extra.get("skipper_name") or info.get("skipper_name"),
+        "boat_model": extra.get("boat_model"),
+        "bow_number": extra.get("bow_number"),
+        "club": extra.get("club"),
+        "total_points": float(total_points),
+        "net_points": float(net_total),
+    }
+    if want_named:
+        row["per_race"] = _per_race_out(view, race_names, per_race_named)
+    if want_fleet:
+        row["per_race_fleet"] = _per_race_out(view, race_names, per_race_fleet)
+    if want_code:
+        row["per_race_code"] = _per_race_out(view, race_names, per_race_code)
+    if want_times:
+        row["per_race_times"] = _per_race_out(view, race_names, per_race_times)
+    return row
+
+
+def _fallback_rows_from_entries(ctx: OverallContext, view: OverallView = FULL_VIEW) -> List[Dict[str, Any]]:
+    """FALLBACK: se ainda não há Results, construir pelas Entries (paid + confirmed)."""
+    entries = sorted(
+        (
+            e for e in ctx.entries
+            if entry_is_results_eligible(e) and (not ctx.class_name or e.class_name == ctx.class_name)
+        ),
+        key=lambda e: e.sail_number or "",
+    )
+
+    race_names = [ctx.race_map[rid] for rid in ctx.race_ids]
+    n_races = len(race_names)
+    out: List[Dict[str, Any]] = []
+    for e in entries:
+        sn_norm = _sn_norm(e.sail_number)
+        cls = str(e.class_name or "")
+        cc_e = (getattr(e, "boat_country_code", None) or "").strip().upper()
+        skipper = f"{e.first_name or ''} {e.last_name or ''}".strip() or None
+
+        row: Dict[str, Any] = {
+            "sail_number": e.sail_number,
+            "boat_country_code": getattr(e, "boat_country_code", None),
+            "boat_name": e.boat_name,
+            "class_name": e.class_name,
+            "skipper_name": skipper,
+            "boat_model": getattr(e, "boat_model", None),
+            "bow_number": getattr(e, "bow_number", None),
+            "club": getattr(e, "club", None),
+            "total_points": 0.0,
+            "net_points": 0.0,
+        }
+        if view.wants("per_race"):
+            row["per_race"] = _per_race_out(view, race_names, ["-"] * n_races)
+        if view.wants("per_race_fleet"):
+            row["per_race_fleet"] = _per_race_out(
+                view, race_names, [ctx.fleet_by_sn_race.get((cls, sn_norm, cc_e, rid)) for rid in ctx.race_ids]
             )
+        if view.wants("per_race_code"):
+            row["per_race_code"] = _per_race_out(view, race_names, [None] * n_races)
+        if view.wants("per_race_times"):
+            row["per_race_times"] = _per_race_out(view, race_names, [{} for _ in race_names])
+        out.append(row)
+    return out
 
-    # ========================================================
-    # MR sailors set por classe (para MR-first)
-    # ========================================================
-    medal_sail_set_by_class: dict[str, set[str]] = {}
-    if class_name:
-        medal_sail_set_by_class[str(class_name)] = _medal_entry_set(db, regatta_id, class_name)
-    else:
-        for cls in race_ids_by_class.keys():
-            medal_sail_set_by_class[cls] = _medal_entry_set(db, regatta_id, cls)
+
+def _rank_overall_rows(
+    ctx: OverallContext,
+    rows: List[Dict[str, Any]],
+    per_race_map: Dict[RowKey, Dict[int, Dict[str, object]]],
+    scores_by_key: Optional[Dict[RowKey, matrix_kernel.MatrixScore]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Ordena (locks medal/finals + tiebreaks por classe) e atribui overall_rank.
+    Trabalha sobre cópias das rows: as originais ficam intactas no estado em cache.
+    """
+    class_name = ctx.class_name
+    race_ids = ctx.race_ids
+    overall = [dict(r) for r in rows]
+    a8_keys = (
+        {k: (s.a8_signature, s.a8_last_race) for k, s in scores_by_key.items()}
+        if scores_by_key else None
+    )
 
     # ========================================================
     # LOCKING: MEDAL + FINALS (para agrupar)
     # ========================================================
-    medal_set = medal_sail_set_by_class.get(str(class_name), set()) if class_name else set()
-    finals_map = _finals_fleet_order_map(db, regatta_id, class_name)
+    medal_set = ctx.medal_sail_set_by_class.get(str(class_name), set()) if class_name else set()
+    finals_map = ctx.finals_map
 
     def _lock_group_key(row: dict) -> tuple[int, int]:
         sc = _sc_key(row.get("sail_number"), row.get("boat_country_code"))
@@ -747,6 +934,7 @@ def get_overall_results_data(
         return (cls, sc)
 
     sorted_overall: list[dict] = []
+    sorted_keys: list[StandingsKey] = []
     i = 0
     while i < len(overall):
         gk = _lock_group_key(overall[i])
@@ -762,11 +950,11 @@ def get_overall_results_data(
             group_by_class.setdefault(str(rr.get("class_name") or ""), []).append(rr)
 
         for cls, cls_rows in group_by_class.items():
-            ordered_ids_cls = race_ids_by_class.get(cls, race_ids)
-            medal_ids_cls = sorted(list(medal_race_ids_by_class.get(cls, set())))
-            mr_sails = medal_sail_set_by_class.get(cls, set())
+            ordered_ids_cls = ctx.race_ids_by_class.get(cls, race_ids)
+            medal_ids_cls = sorted(ctx.medal_race_ids_by_class.get(cls, set()))
+            mr_sails = ctx.medal_sail_set_by_class.get(cls, set())
 
-            resolved = sort_overall_rows(
+            keys = build_standings_keys(
                 cls_rows,
                 ordered_race_ids=ordered_ids_cls,
                 results_by_key=per_race_map,
@@ -774,8 +962,11 @@ def get_overall_results_data(
                 medal_race_ids=medal_ids_cls if medal_ids_cls else None,
                 medal_sail_set=mr_sails if mr_sails else None,
                 sail_number_of_row=lambda r: _sc_key(r.get("sail_number"), r.get("boat_country_code")),
+                a8_keys=a8_keys,
             )
-            sorted_overall.extend(resolved)
+            for row, key in sort_by_standings_keys(cls_rows, keys):
+                sorted_overall.append(row)
+                sorted_keys.append(key)
 
         i = j
 
@@ -790,26 +981,13 @@ def get_overall_results_data(
     current_rank = 0
 
     for i, row in enumerate(overall):
-        cls = str(row.get("class_name") or "")
-        ordered_ids_cls = race_ids_by_class.get(cls, race_ids)
-        medal_ids_cls = sorted(list(medal_race_ids_by_class.get(cls, set())))
-        mr_sails = medal_sail_set_by_class.get(cls, set())
-
-        sig = tie_signature_overall(
-            row,
-            ordered_race_ids=ordered_ids_cls,
-            results_by_key=per_race_map,
-            key_of_row=_row_key,
-            medal_race_ids=medal_ids_cls if medal_ids_cls else None,
-            medal_sail_set=mr_sails if mr_sails else None,
-            sail_number_of_row=lambda r: _sc_key(r.get("sail_number"), r.get("boat_country_code")),
-        )
+        # mesma key do sort: nada de recalcular A8 / MR por row
+        sig = sorted_keys[i].rank_signature
 
         if prev_sig is None or sig != prev_sig:
             current_rank = i + 1
             prev_sig = sig
 
-        sn = _sn_norm(row.get("sail_number"))
         sc = _sc_key(row.get("sail_number"), row.get("boat_country_code"))
         row["overall_rank"] = current_rank
 
@@ -818,67 +996,502 @@ def get_overall_results_data(
 
         row["is_medal"] = (sc in medal_set) if class_name else False
 
-    # Metadados das races (start_time, handicap_method, orc_rating_mode) para detalhe handicap
-    races_meta: dict[str, dict[str, object]] = {}
-    for r in races:
-        rname = race_map.get(int(r.id), r.name)
-        races_meta[rname] = {
-            "race_id": int(r.id),
-            "race_date": getattr(r, "date", None),
-            "start_time": getattr(r, "start_time", None),
-            "handicap_method": getattr(r, "handicap_method", None),
-            "orc_rating_mode": getattr(r, "orc_rating_mode", None),
+    return overall
+
+
+def _assemble_payload(
+    ctx: OverallContext,
+    ranked_rows: List[Dict[str, Any]],
+    view: OverallView = FULL_VIEW,
+) -> Dict[str, Any]:
+    if view.fields is not None:
+        keep = [f for f in OVERALL_ROW_FIELDS if f in view.fields]
+        ranked_rows = [{f: r[f] for f in keep if f in r} for r in ranked_rows]
+    out: dict[str, object] = {"rows": ranked_rows, "races_meta": ctx.races_meta}
+    if view.positional:
+        # cabeçalho único para os arrays por race das rows
+        out["races"] = [ctx.race_map[rid] for rid in ctx.race_ids]
+    out.update(ctx.extra_out)
+    return out
+
+
+def build_overall_state(
+    regatta_id: int,
+    class_name: str | None,
+    public: bool,
+    db: Session,
+    view: OverallView = FULL_VIEW,
+) -> OverallState:
+    """Cálculo completo do overall (todas as races, todos os barcos)."""
+    ctx = _load_overall_context(db, regatta_id, class_name, public)
+    if ctx is None:
+        return _empty_state(view)
+    return _state_from_results(ctx, _query_race_results(db, ctx, ctx.race_ids), view)
+
+
+def _empty_state(view: OverallView) -> OverallState:
+    payload: Dict[str, Any] = {"rows": [], "races_meta": {}, "published_at": None}
+    if view.positional:
+        payload["races"] = []
+    return OverallState(payload=payload, view=view)
+
+
+def _state_from_results(ctx: OverallContext, pr_rows: List[Any], view: OverallView) -> OverallState:
+    """
+    Scoring puro (sem DB) a partir do contexto e das linhas de Result.
+    Função de módulo e argumentos picklable: corre também nos workers do scoring pool.
+    """
+    per_race_map: Dict[RowKey, Dict[int, Dict[str, object]]] = {}
+    info_by_race: Dict[RowKey, Dict[int, Tuple[int, Dict[str, object]]]] = {}
+    _ingest_results(ctx, pr_rows, per_race_map, info_by_race)
+
+    if not per_race_map:
+        rows = _fallback_rows_from_entries(ctx, view)
+        # sem matriz não há nada para atualizar incrementalmente (ctx=None)
+        return OverallState(
+            payload=_assemble_payload(ctx, _rank_overall_rows(ctx, rows, per_race_map), view),
+            view=view,
+        )
+
+    scores_by_key = _score_boats_with_kernel(ctx, list(per_race_map.keys()), per_race_map)
+    rows_by_key = {
+        key: _build_boat_row(
+            ctx, key, per_by_id, _boat_info(info_by_race.get(key, {})), scores_by_key.get(key), view
+        )
+        for key, per_by_id in per_race_map.items()
+    }
+    ranked = _rank_overall_rows(ctx, list(rows_by_key.values()), per_race_map, scores_by_key)
+    return OverallState(
+        payload=_assemble_payload(ctx, ranked, view),
+        ctx=ctx,
+        view=view,
+        per_race_map=per_race_map,
+        info_by_race=info_by_race,
+        rows_by_key=rows_by_key,
+        scores_by_key=scores_by_key,
+    )
+
+
+def refresh_overall_state(prev: OverallState, db: Session) -> Optional[OverallState]:
+    """
+    Recompute incremental: só as races cujo results_version mudou são relidas.
+    Atualiza essas colunas da matriz, recalcula totais/discards apenas dos barcos
+    tocados e volta a ordenar. None => é preciso o cálculo completo.
+    Só é válido quando o contexto (estrutura) não mudou — garantido pelo chamador.
+    """
+    ctx = prev.ctx
+    if ctx is None:
+        return None
+
+    versions = {
+        int(rid): int(v or 0)
+        for rid, v in db.query(models.Race.id, models.Race.results_version)
+        .filter(models.Race.id.in_(ctx.race_ids))
+        .all()
+    } if ctx.race_ids else {}
+    if set(versions) != set(ctx.race_versions):
+        return None
+
+    changed = [rid for rid in ctx.race_ids if versions[rid] != ctx.race_versions.get(rid)]
+    new_ctx = replace(ctx, race_versions=versions)
+    if not changed:
+        return replace(prev, ctx=new_ctx)
+
+    return _replace_race_columns(prev, new_ctx, changed, _query_race_results(db, ctx, changed))
+
+
+def _replace_race_columns(
+    prev: OverallState,
+    new_ctx: OverallContext,
+    changed: List[int],
+    fresh_rows: List[Any],
+) -> Optional[OverallState]:
+    """
+    Troca as colunas `changed` da matriz pelas linhas `fresh_rows` (todas as linhas
+    dessas races) e re-pontua só os barcos tocados. Sem DB; `prev` não é alterado.
+    None => é preciso o cálculo completo.
+    """
+    ctx = new_ctx
+    changed_set = set(changed)
+    per_race_map = dict(prev.per_race_map)
+    info_by_race = dict(prev.info_by_race)
+
+    # 1) tirar a coluna antiga (copy-on-write: o estado anterior pode estar a ser lido)
+    touched: set[RowKey] = set()
+    for key, per_by_id in prev.per_race_map.items():
+        if changed_set.isdisjoint(per_by_id):
+            continue
+        touched.add(key)
+        per_race_map[key] = {rid: v for rid, v in per_by_id.items() if rid not in changed_set}
+        info_by_race[key] = {
+            rid: v for rid, v in prev.info_by_race.get(key, {}).items() if rid not in changed_set
         }
 
-    out: dict[str, object] = {"rows": overall, "races_meta": races_meta}
-    if class_name:
-        rc = (
-            db.query(models.RegattaClass)
-            .filter(
-                models.RegattaClass.regatta_id == regatta_id,
-                func.lower(models.RegattaClass.class_name) == func.lower(str(class_name)),
-            )
-            .first()
+    # 2) meter a coluna nova
+    fresh_map: Dict[RowKey, Dict[int, Dict[str, object]]] = {}
+    fresh_info: Dict[RowKey, Dict[int, Tuple[int, Dict[str, object]]]] = {}
+    new_keys = _ingest_results(ctx, fresh_rows, fresh_map, fresh_info)
+    for key in new_keys:
+        if key not in touched:
+            per_race_map[key] = dict(per_race_map.get(key, {}))
+            info_by_race[key] = dict(info_by_race.get(key, {}))
+        per_race_map[key].update(fresh_map[key])
+        info_by_race[key].update(fresh_info[key])
+    touched |= new_keys
+
+    # 3) barcos tocados: recalcular linha (ou sair, se ficaram sem resultados)
+    rows_by_key = dict(prev.rows_by_key)
+    scores_by_key = dict(prev.scores_by_key)
+    for key in touched:
+        if not per_race_map.get(key):
+            per_race_map.pop(key, None)
+            info_by_race.pop(key, None)
+            rows_by_key.pop(key, None)
+            scores_by_key.pop(key, None)
+
+    if not per_race_map:
+        return None  # passou a fallback por entries
+
+    live = [key for key in touched if key in per_race_map]
+    for key in live:
+        scores_by_key.pop(key, None)
+    scores_by_key.update(_score_boats_with_kernel(new_ctx, live, per_race_map))
+    for key in live:
+        rows_by_key[key] = _build_boat_row(
+            new_ctx, key, per_race_map[key], _boat_info(info_by_race.get(key, {})),
+            scores_by_key.get(key), prev.view,
         )
-        out["class_type"] = (rc.class_type or "one_design").strip().lower() if rc else "one_design"
-    if public and class_name:
-        published_at_iso = _get_published_at_iso(db, regatta_id, class_name)
-        out["published_at"] = published_at_iso
-    elif public and race_ids_by_class:
-        # Uma única classe nos resultados publicados
-        classes_in_result = list(race_ids_by_class.keys())
-        if len(classes_in_result) == 1:
-            published_at_iso = _get_published_at_iso(db, regatta_id, classes_in_result[0])
-            out["published_at"] = published_at_iso
+
+    ranked = _rank_overall_rows(new_ctx, list(rows_by_key.values()), per_race_map, scores_by_key)
+    return OverallState(
+        payload=_assemble_payload(new_ctx, ranked, prev.view),
+        ctx=new_ctx,
+        view=prev.view,
+        per_race_map=per_race_map,
+        info_by_race=info_by_race,
+        rows_by_key=rows_by_key,
+        scores_by_key=scores_by_key,
+    )
+
+
+# =====================================================================
+# Só o ranking (fleets: reshuffle, finals, medal race)
+# =====================================================================
+
+class RankedEntry(NamedTuple):
+    entry_id: int
+    net_points: float
+    overall_rank: int
+
+
+# rows sem colunas por race (o fallback por entries também as salta)
+_RANKING_VIEW = OverallView(name="ranking", fields=frozenset())
+
+
+def _query_ranking_results(db: Session, ctx: OverallContext) -> List[Any]:
+    """Como `_query_race_results`, só com as colunas que o scoring e os desempates leem."""
+    pr_q = db.query(
+        models.Result.id,
+        models.Result.race_id,
+        models.Result.class_name,
+        models.Result.sail_number,
+        models.Result.boat_country_code,
+        models.Result.skipper_name,
+        models.Result.position,
+        models.Result.points,
+        models.Result.code,
+        models.Result.code_discardable,
+    ).filter(models.Result.regatta_id == ctx.regatta_id)
+    if ctx.race_ids:
+        pr_q = pr_q.filter(models.Result.race_id.in_(ctx.race_ids))
+    if ctx.class_name:
+        pr_q = pr_q.filter(models.Result.class_name == ctx.class_name)
+    return pr_q.order_by(models.Result.id.asc()).all()
+
+
+def _ingest_ranking_cells(
+    ctx: OverallContext,
+    pr_rows: List[Any],
+) -> Tuple[Dict[RowKey, Dict[int, Dict[str, object]]], Dict[RowKey, Any]]:
+    """
+    `_ingest_results` reduzido ao ranking: células só com points/position/code e, por
+    barco, a linha de Result que daria a info da row (a de menor id entre as races).
+    """
+    per_race_map: Dict[RowKey, Dict[int, Dict[str, object]]] = {}
+    last_by_race: Dict[RowKey, Dict[int, Any]] = {}
+    for r in pr_rows:
+        cls = str(r.class_name or "")
+        key = (cls, _sc_key(r.sail_number, r.boat_country_code))
+        if (cls.strip().lower(), key[1]) not in ctx.eligible_identities:
+            continue
+        race_id = int(r.race_id)
+        mult = 2.0 if race_id in ctx.medal_race_ids_by_class.get(cls, set()) else 1.0
+        per_race_map.setdefault(key, {})[race_id] = {
+            "points": float(r.points) * mult,
+            "position": int(r.position),
+            "code": r.code,
+            "code_discardable": r.code_discardable,
+        }
+        last_by_race.setdefault(key, {})[race_id] = r
+    info_row = {key: min(by_race.values(), key=lambda r: r.id) for key, by_race in last_by_race.items()}
+    return per_race_map, info_row
+
+
+def _ranking_row(
+    ctx: OverallContext,
+    key: RowKey,
+    per_by_id: Dict[int, Dict[str, object]],
+    info: Any,
+    score: Optional[matrix_kernel.MatrixScore] = None,
+) -> Dict[str, Any]:
+    """Só os campos que o `_rank_overall_rows` lê; totais iguais aos do `_build_boat_row`."""
+    cls, sc = key
+    if score is not None:
+        total_points, net_total = score.total_points, score.net_points
+    else:
+        discarded_ids = _compute_discards_fixed_count(
+            ctx.race_ids_by_class.get(cls, ctx.race_ids),
+            per_by_id,
+            int(ctx.discard_count_by_class.get(cls, 0) or 0),
+            ctx.non_discardable_race_ids,
+            ctx.discardable_by_class.get(cls, {}),
+        )
+        total_points = net_total = 0.0
+        for rid in ctx.race_ids:
+            cell = per_by_id.get(rid)
+            if cell is None:
+                continue
+            pts = float(cell["points"])
+            total_points += pts
+            if rid not in discarded_ids:
+                net_total += pts
+
+    extra = ctx.entry_extra.get((cls.strip().lower(), sc), {})
+    return {
+        "sail_number": info.sail_number,
+        "boat_country_code": info.boat_country_code,
+        "class_name": info.class_name,
+        "skipper_name": extra.get("skipper_name") or info.skipper_name,
+        "total_points": float(total_points),
+        "net_points": float(net_total),
+    }
+
+
+def compute_entry_ranking(
+    regatta_id: int,
+    class_name: str,
+    public: bool,
+    db: Session,
+) -> List[RankedEntry]:
+    """
+    Ordem do overall da classe (a mesma de `build_overall_state`) já em entry ids,
+    sem payload, colunas por race nem cache. Barcos sem entry da classe ficam de fora;
+    com entries repetidas (mesma vela + país) conta só a primeira posição.
+    """
+    ctx = _load_overall_context(db, regatta_id, class_name, public)
+    if ctx is None:
+        return []
+
+    per_race_map, info_row = _ingest_ranking_cells(ctx, _query_ranking_results(db, ctx))
+
+    scores_by_key: Optional[Dict[RowKey, matrix_kernel.MatrixScore]] = None
+    if per_race_map:
+        scores_by_key = _score_boats_with_kernel(ctx, list(per_race_map.keys()), per_race_map)
+        rows = [
+            _ranking_row(ctx, key, per_by_id, info_row[key], scores_by_key.get(key))
+            for key, per_by_id in per_race_map.items()
+        ]
+    else:
+        rows = _fallback_rows_from_entries(ctx, _RANKING_VIEW)
+
+    # (classe, vela||país) -> entry id; entries da classe exata, com ou sem pagamento
+    entry_ids: Dict[Tuple[str, str], int] = {}
+    for e in ctx.entries:
+        if e.class_name != class_name or not _sn_norm(e.sail_number):
+            continue
+        entry_ids[(str(e.class_name or ""), _sc_key(e.sail_number, e.boat_country_code))] = int(e.id)
+
+    out: List[RankedEntry] = []
+    seen: set[int] = set()
+    for row in _rank_overall_rows(ctx, rows, per_race_map, scores_by_key):
+        eid = entry_ids.get((str(class_name), _sc_key(row.get("sail_number"), row.get("boat_country_code"))))
+        if eid is None or eid in seen:
+            continue
+        seen.add(eid)
+        out.append(RankedEntry(eid, float(row.get("net_points") or 0.0), int(row["overall_rank"])))
     return out
 
 
-@router.get("/overall/{regatta_id}")
+def get_overall_results_data(
+    regatta_id: int,
+    class_name: str | None,
+    public: bool,
+    db: Session,
+    view: OverallView = FULL_VIEW,
+):
+    return build_overall_state(regatta_id, class_name, public, db, view).payload
+
+
+def get_overall_results_cached(
+    regatta_id: int,
+    class_name: str | None,
+    public: bool,
+    db: Session,
+    view: OverallView = FULL_VIEW,
+) -> dict:
+    """
+    Igual a get_overall_results_data, mas servido da cache de standings
+    (invalidada por regattas.results_version). O dict devolvido é partilhado: não mutar.
+    Se só mudaram resultados de algumas races, o estado em cache é atualizado
+    incrementalmente em vez de recalculado.
+    """
+    return get_overall_state_cached(regatta_id, class_name, public, db, view).payload
+
+
+def get_overall_state_cached(
+    regatta_id: int,
+    class_name: str | None,
+    public: bool,
+    db: Session,
+    view: OverallView = FULL_VIEW,
+) -> OverallState:
+    """Estado completo (matriz + payload) da cache de standings. Partilhado: não mutar."""
+    return standings_cache.get_or_compute(
+        db,
+        regatta_id,
+        class_name,
+        public,
+        lambda: build_overall_state(regatta_id, class_name, public, db, view),
+        refresh=lambda prev: refresh_overall_state(prev, db),
+        variant=view,
+    )
+
+
+def build_overall_states_by_class(
+    regatta_id: int,
+    class_names: Optional[List[str]],
+    public: bool,
+    db: Session,
+    view: OverallView = FULL_VIEW,
+) -> Dict[str, OverallState]:
+    """
+    Overall de várias classes (por defeito todas as configuradas), cada uma igual a
+    `build_overall_state(regatta_id, classe, ...)`. Um snapshot da regata inteira e
+    uma query de results, partidos por classe; o scoring das classes corre no
+    scoring pool (em paralelo quando compensa).
+    """
+    snap = load_scoring_snapshot(db, regatta_id)
+    if class_names is None:
+        class_names = list(snap.class_names)
+
+    ctx_by_class = {
+        cls: _overall_context_from_snapshot(snap.for_class(cls), public) for cls in class_names
+    }
+    race_ids = sorted({rid for ctx in ctx_by_class.values() if ctx for rid in ctx.race_ids})
+
+    rows_by_class: Dict[str, List[Any]] = {}
+    if race_ids:
+        for r in _query_results(db, regatta_id, race_ids):
+            rows_by_class.setdefault(str(r.class_name or ""), []).append(r)
+
+    # cada classe só vê os results das suas races (como a query filtrada por classe)
+    jobs = []
+    for cls, ctx in ctx_by_class.items():
+        if ctx is None:
+            continue
+        own = set(ctx.race_ids)
+        jobs.append((ctx, [r for r in rows_by_class.get(cls, ()) if r.race_id in own], view))
+
+    states = scoring_pool.run_jobs(
+        _state_from_results, jobs, work_size=sum(len(job[1]) for job in jobs)
+    )
+    by_class = {job[0].class_name: state for job, state in zip(jobs, states)}
+    return {cls: by_class.get(cls) or _empty_state(view) for cls in class_names}
+
+
+def get_overall_results_by_class_cached(
+    regatta_id: int,
+    class_names: Optional[List[str]],
+    public: bool,
+    db: Session,
+    view: OverallView = FULL_VIEW,
+) -> Dict[str, dict]:
+    """Payload por classe, partilhando a cache de standings com o overall por classe."""
+    if class_names is None:
+        class_names = list(load_class_names(db, regatta_id))
+    states = standings_cache.get_many_or_compute(
+        db,
+        regatta_id,
+        class_names,
+        public,
+        lambda missing: build_overall_states_by_class(regatta_id, missing, public, db, view),
+        variant=view,
+    )
+    return {cls: state.payload for cls, state in states.items()}
+
+
+@router.get("/overall/{regatta_id}", dependencies=[Depends(conditional_get(get_db))])
 def get_overall_results(
     regatta_id: int,
     class_name: str | None = Query(None),
     public: bool = Query(False, description="If true, only published races (by class) are included."),
+    view: str = Query("full", description="full | compact | handicap. Non-full views return per-race data as arrays aligned with `races`."),
+    fields: str | None = Query(None, description="Comma-separated row fields to include (overrides the view's defaults)."),
     db: Session = Depends(get_db),
 ):
-    return get_overall_results_data(regatta_id, class_name, public, db)
+    return get_overall_results_cached(regatta_id, class_name, public, db, parse_overall_view(view, fields))
+
+
+@router.get("/overall/{regatta_id}/classes", dependencies=[Depends(conditional_get(get_db))])
+def get_overall_results_by_class(
+    regatta_id: int,
+    classes: str | None = Query(None, description="Comma-separated class names (default: all regatta classes)."),
+    public: bool = Query(False, description="If true, only published races (by class) are included."),
+    view: str = Query("full", description="full | compact | handicap (same as /overall/{regatta_id})."),
+    fields: str | None = Query(None, description="Comma-separated row fields to include."),
+    db: Session = Depends(get_db),
+):
+    """Overall de várias classes numa só resposta: {"classes": [{"class_name", ...payload da classe}]}."""
+    class_names = [c.strip() for c in classes.split(",") if c.strip()] if classes else None
+    payloads = get_overall_results_by_class_cached(
+        regatta_id, class_names, public, db, parse_overall_view(view, fields)
+    )
+    return {"classes": [{"class_name": cls, **payload} for cls, payload in payloads.items()]}
+
+
+@router.get("/overall-cache/stats")
+def get_overall_cache_stats(
+    current_user: models.User = Depends(get_current_user),
+):
+    if current_user.role not in ("admin", "platform_admin"):
+        raise HTTPException(status_code=403, detail="Access denied")
+    return standings_cache.cache_stats()
+
+
+@router.get("/race-locks/stats")
+def get_race_lock_stats(
+    current_user: models.User = Depends(get_current_user),
+):
+    """Locks de escrita por race: aquisições, esperas (total/máx/média em ms) e timeouts."""
+    if current_user.role not in ("admin", "platform_admin"):
+        raise HTTPException(status_code=403, detail="Access denied")
+    return race_locks.lock_stats()
 
 
 @router.get("/overall/{regatta_id}/pdf", response_class=Response)
 def get_overall_results_pdf(
     regatta_id: int,
     class_name: str = Query(..., description="Class name for which to generate the PDF."),
+    wait: bool = Query(True, description="If false, return 202 with the render job status instead of waiting for the PDF."),
     db: Session = Depends(get_db),
 ):
-    """Generate PDF of published overall results for the given class. Public endpoint."""
+    """
+    Generate PDF of published overall results for the given class. Public endpoint.
+    Rendered in the PDF pool and stored: an unchanged PDF is served from disk (see pdf_render_pool).
+    """
     reg = db.query(models.Regatta).filter(models.Regatta.id == regatta_id).first()
     if not reg:
         raise HTTPException(404, "Regatta not found")
-    data = get_overall_results_data(regatta_id, class_name, True, db)
-    rows = data.get("rows") or []
-    if not rows:
-        raise HTTPException(404, "No published results for this class")
-    races_meta = data.get("races_meta") or {}
-    race_names = list(races_meta.keys())
 
     sponsors = (
         db.query(models.RegattaSponsor)
@@ -895,12 +1508,28 @@ def get_overall_results_pdf(
         .all()
     )
 
-    uploads_dir = Path("uploads").resolve()
-    pdf_bytes = build_results_pdf(reg, class_name, data, race_names, uploads_dir, sponsors)
     safe_name = "".join(c if c.isalnum() or c in " -_" else "_" for c in f"{getattr(reg, 'name', 'Results')} - {class_name}")
     filename = f"Results - {safe_name}.pdf"
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    key = pdf_render_pool.pdf_key("overall", reg, class_name, sponsors)
+    job = pdf_render_pool.cached_job(key, filename)
+    if job is None:
+        data = get_overall_results_cached(regatta_id, class_name, True, db)
+        rows = data.get("rows") or []
+        if not rows:
+            raise HTTPException(404, "No published results for this class")
+        races_meta = data.get("races_meta") or {}
+        race_names = list(races_meta.keys())
+
+        uploads_dir = Path("uploads").resolve()
+        args = (
+            pdf_render_pool.regatta_snapshot(reg),
+            class_name,
+            {"rows": rows, "published_at": data.get("published_at")},
+            race_names,
+            uploads_dir,
+            pdf_render_pool.sponsor_snapshots(sponsors),
+        )
+        job = pdf_render_pool.submit_render(key, filename, "overall", args)
+    # o render já não precisa da DB: devolver a ligação antes de esperar
+    db.close()
+    return pdf_render_pool.pdf_response(job, wait)
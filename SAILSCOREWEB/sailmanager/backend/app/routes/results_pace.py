@@ -3,18 +3,15 @@ from __future__ import annotations
 from typing import Any
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy import func
+from sqlalchemy import and_, case, false, func, literal, select, union_all
 from sqlalchemy.orm import Session
 
 from app import models
 from app.database import get_db
+from app.services import standings_cache
+from app.services.http_cache import conditional_get
 from app.routes.results_overall import _get_published_at_iso, _get_published_races_count
-from app.routes.results_utils import (
-    AUTO_N_PLUS_ONE_CODES,
-    _parse_time_to_seconds,
-    build_eligible_result_identities,
-    result_row_identity,
-)
+from app.routes.results_utils import AUTO_N_PLUS_ONE_CODES
 
 router = APIRouter()
 
@@ -23,10 +20,6 @@ def _clean_class_name(value: Any) -> str:
     return str(value or "").strip()
 
 
-def _norm_code(value: Any) -> str:
-    return str(value or "").strip().upper()
-
-
 def _format_seconds(seconds: float) -> str:
     total = int(round(max(0, seconds)))
     h = total // 3600
@@ -66,13 +59,149 @@ def _rank_rows(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return rows
 
 
-@router.get("/pace/{regatta_id}")
+# ============================================================
+# Agregação em SQL
+# ============================================================
+def _distance_by_race(races: list[models.Race], distances_by_race: dict[str, Any]) -> dict[int, float]:
+    """race_id -> milhas (só distâncias > 0), a partir de results_pace_config.distances_by_race."""
+    out: dict[int, float] = {}
+    for race in races:
+        try:
+            distance = float((distances_by_race.get(_clean_class_name(race.class_name)) or {}).get(str(int(race.id))) or 0)
+        except (TypeError, ValueError):
+            distance = 0
+        if distance > 0:
+            out[int(race.id)] = distance
+    return out
+
+
+def _pace_source(
+    regatta_id: int,
+    race_ids: list[int],
+    eligible_classes: set[str],
+    distance_by_race: dict[int, float],
+):
+    """
+    Peças comuns às queries do pace:
+    - `distances`: tabela race_id -> milhas (CTE), para LEFT JOIN com os resultados;
+    - `counted`: a linha entra no pace (sem code N+1, com elapsed e race com distância);
+    - `criteria`: resultados das races/classes, só de barcos com entry paid+confirmed
+      (EXISTS pelo índice (regatta_id, identity_key)).
+    """
+    R = models.Result
+    distances = union_all(
+        # 1ª linha sempre vazia: dá tipos às colunas mesmo sem distâncias configuradas
+        select(literal(0).label("race_id"), literal(0.0).label("distance")).where(false()),
+        *(
+            select(literal(rid).label("race_id"), literal(dist).label("distance"))
+            for rid, dist in sorted(distance_by_race.items())
+        ),
+    ).cte("pace_distances")
+    counted = and_(
+        func.upper(func.trim(func.coalesce(R.code, ""))).not_in(sorted(AUTO_N_PLUS_ONE_CODES)),
+        R.elapsed_seconds.isnot(None),
+        distances.c.distance.isnot(None),
+    )
+    eligible = (
+        select(models.Entry.id)
+        .where(
+            models.Entry.regatta_id == R.regatta_id,
+            models.Entry.identity_key == R.identity_key,
+            models.Entry.paid.is_(True),
+            models.Entry.confirmed.is_(True),
+        )
+        .exists()
+    )
+    criteria = [
+        R.regatta_id == regatta_id,
+        R.race_id.in_(race_ids),
+        func.trim(R.class_name).in_(sorted(eligible_classes)),
+        eligible,
+    ]
+    return distances, counted, criteria
+
+
+def _aggregate_pace_totals(
+    db: Session,
+    regatta_id: int,
+    race_ids: list[int],
+    eligible_classes: set[str],
+    distance_by_race: dict[int, float],
+) -> dict[str, tuple[float, float, int]]:
+    """
+    identity_key -> (elapsed total, milhas totais, races contadas), num GROUP BY.
+    Barcos com algum code N+1 nas races ficam de fora, tal como os sem milhas.
+    """
+    R = models.Result
+    distances, counted, criteria = _pace_source(regatta_id, race_ids, eligible_classes, distance_by_race)
+    is_n_plus_one = func.upper(func.trim(func.coalesce(R.code, ""))).in_(sorted(AUTO_N_PLUS_ONE_CODES))
+    total_distance = func.sum(case((counted, distances.c.distance), else_=0.0))
+    rows = (
+        db.query(
+            R.identity_key,
+            func.sum(case((counted, R.elapsed_seconds), else_=0.0)),
+            total_distance,
+            func.sum(case((counted, 1), else_=0)),
+        )
+        .outerjoin(distances, distances.c.race_id == R.race_id)
+        .filter(*criteria)
+        .group_by(R.identity_key)
+        .having(func.sum(case((is_n_plus_one, 1), else_=0)) == 0)
+        .having(total_distance > 0)
+        .all()
+    )
+    return {key: (float(elapsed), float(miles), int(n)) for key, elapsed, miles, n in rows}
+
+
+def _query_pace_cells(
+    db: Session,
+    regatta_id: int,
+    race_ids: list[int],
+    eligible_classes: set[str],
+    distance_by_race: dict[int, float],
+):
+    """Linhas contadas (barco x race) para o detalhe por race, por id."""
+    R = models.Result
+    distances, counted, criteria = _pace_source(regatta_id, race_ids, eligible_classes, distance_by_race)
+    return (
+        db.query(
+            R.identity_key,
+            R.race_id,
+            R.sail_number,
+            R.boat_country_code,
+            R.boat_name,
+            R.class_name,
+            R.skipper_name,
+            R.elapsed_time,
+            R.elapsed_seconds,
+            distances.c.distance,
+        )
+        .join(distances, distances.c.race_id == R.race_id)
+        .filter(*criteria, counted)
+        .order_by(R.id.asc())
+        .all()
+    )
+
+
+@router.get("/pace/{regatta_id}", dependencies=[Depends(conditional_get(get_db))])
 def get_pace_results(
     regatta_id: int,
     class_name: str | None = Query(None),
     public: bool = Query(False, description="If true, only published races for the class are included."),
     db: Session = Depends(get_db),
 ):
+    # mesma invalidação do overall: results_version (resultados, entries, config da regata, publicação)
+    return standings_cache.get_or_compute(
+        db,
+        regatta_id,
+        class_name,
+        public,
+        lambda: build_pace_payload(db, regatta_id, class_name, public),
+        variant="pace",
+    )
+
+
+def build_pace_payload(db: Session, regatta_id: int, class_name: str | None, public: bool) -> dict[str, Any]:
     regatta = db.query(models.Regatta).filter(models.Regatta.id == regatta_id).first()
     if not regatta:
         return {"enabled": False, "table_name": "Time per mile", "class_name": class_name, "rows": []}
@@ -182,78 +311,45 @@ def get_pace_results(
             "rows": [],
         }
 
-    results = (
-        db.query(models.Result)
-        .filter(models.Result.regatta_id == regatta_id, models.Result.race_id.in_(race_ids))
-        .all()
-    )
-
-    eligible_identities = build_eligible_result_identities(db, regatta_id, class_name)
-    by_boat: dict[tuple[str, str], dict[str, Any]] = {}
-    n_plus_one_boat_keys: set[tuple[str, str]] = set()
-
-    for result in results:
-        cls = _clean_class_name(result.class_name)
-        if cls not in eligible_classes:
-            continue
-        if result_row_identity(result) not in eligible_identities:
-            continue
-        key = (cls.lower(), f"{str(result.sail_number or '').strip().upper()}||{str(result.boat_country_code or '').strip().upper()}")
-        if _norm_code(getattr(result, "code", None)) in AUTO_N_PLUS_ONE_CODES:
-            n_plus_one_boat_keys.add(key)
-            continue
-
-        elapsed_seconds = _parse_time_to_seconds(getattr(result, "elapsed_time", None))
-        if elapsed_seconds is None:
-            continue
-
-        race = race_by_id.get(int(result.race_id))
-        if not race:
+    distance_by_race = _distance_by_race(races, distances_by_race)
+    totals = _aggregate_pace_totals(db, regatta_id, race_ids, eligible_classes, distance_by_race)
+    by_boat: dict[str, dict[str, Any]] = {}
+    for cell in _query_pace_cells(db, regatta_id, race_ids, eligible_classes, distance_by_race):
+        boat_totals = totals.get(cell.identity_key)
+        if boat_totals is None:
             continue
+        race = race_by_id[int(cell.race_id)]
         race_name = str(getattr(race, "name", None) or f"R{getattr(race, 'order_index', '') or race.id}")
-        try:
-            distance = float((distances_by_race.get(cls) or {}).get(str(int(result.race_id))) or 0)
-        except (TypeError, ValueError):
-            distance = 0
-        if distance <= 0:
-            continue
-
-        column_id = race_column_by_id.get(int(result.race_id), str(int(result.race_id)))
+        column_id = race_column_by_id.get(int(cell.race_id), str(int(cell.race_id)))
+        # dados do barco: a primeira linha contada (por id)
         row = by_boat.setdefault(
-            key,
+            cell.identity_key,
             {
                 "rank": 0,
-                "sail_number": result.sail_number,
-                "boat_country_code": result.boat_country_code,
-                "boat_name": result.boat_name,
-                "class_name": cls,
-                "skipper_name": result.skipper_name,
-                "total_elapsed_seconds": 0.0,
-                "total_distance": 0.0,
-                "races_counted": 0,
+                "sail_number": cell.sail_number,
+                "boat_country_code": cell.boat_country_code,
+                "boat_name": cell.boat_name,
+                "class_name": _clean_class_name(cell.class_name),
+                "skipper_name": cell.skipper_name,
+                "total_elapsed_seconds": boat_totals[0],
+                "total_distance": boat_totals[1],
+                "races_counted": boat_totals[2],
                 "per_race": {},
             },
         )
-        row["total_elapsed_seconds"] = float(row["total_elapsed_seconds"]) + float(elapsed_seconds)
-        row["total_distance"] = float(row["total_distance"]) + float(distance)
-        row["races_counted"] = int(row["races_counted"]) + 1
-        row["per_race"][str(int(result.race_id))] = {
-            "race_id": int(result.race_id),
+        row["per_race"][str(int(cell.race_id))] = {
+            "race_id": int(cell.race_id),
             "column_id": column_id,
             "race_name": race_name,
-            "distance": distance,
-            "elapsed_time": result.elapsed_time,
-            "elapsed_seconds": elapsed_seconds,
+            "distance": float(cell.distance),
+            "elapsed_time": cell.elapsed_time,
+            "elapsed_seconds": float(cell.elapsed_seconds),
         }
 
     rows: list[dict[str, Any]] = []
-    for key, row in by_boat.items():
-        if key in n_plus_one_boat_keys:
-            continue
+    for row in by_boat.values():
         total_elapsed = float(row["total_elapsed_seconds"])
         total_distance = float(row["total_distance"])
-        if total_distance <= 0:
-            continue
         seconds_per_mile = total_elapsed / total_distance
         row["seconds_per_mile"] = seconds_per_mile
         row["total_elapsed_time"] = _format_seconds(total_elapsed)
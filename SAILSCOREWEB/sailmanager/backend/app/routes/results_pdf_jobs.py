@@ -0,0 +1,38 @@
+# app/routes/results_pdf_jobs.py
+from fastapi import APIRouter, Depends, HTTPException
+
+from app import models
+from app.services import pdf_render_pool
+from utils.auth_utils import get_current_user
+
+router = APIRouter()
+
+
+@router.get("/pdf-jobs/{job_id}")
+def get_pdf_job(job_id: str):
+    """Estado de um render de PDF (queued | running | done | failed), devolvido pelo 202 dos endpoints /pdf."""
+    job = pdf_render_pool.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="PDF job not found")
+    return job.to_dict()
+
+
+@router.get("/pdf-jobs/{job_id}/file")
+def get_pdf_job_file(job_id: str):
+    job = pdf_render_pool.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="PDF job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail="PDF generation failed")
+    if job.status != "done" or not job.path.is_file():
+        raise HTTPException(status_code=409, detail="PDF is not ready yet")
+    return pdf_render_pool.file_response(job)
+
+
+@router.get("/pdf-render/stats")
+def get_pdf_render_stats(
+    current_user: models.User = Depends(get_current_user),
+):
+    if current_user.role not in ("admin", "platform_admin"):
+        raise HTTPException(status_code=403, detail="Access denied")
+    return pdf_render_pool.render_stats()
@@ -4,7 +4,7 @@ import csv
 import io
 from typing import List, Union, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Body, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, status
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func, or_
@@ -14,7 +14,10 @@ from app.database import get_db
 from app import models, schemas
 from app.org_scope import assert_staff_regatta_access, assert_user_can_manage_org_id
 from utils.auth_utils import get_current_user
-from app.services.results_pdf import build_race_results_pdf
+from app.services import pdf_render_pool
+from app.services.race_locks import lock_race_for_write
+from app.scoring.handicap import correct_elapsed_times, format_hms
+from app.utils.identity import class_identity_key, identity_key as competitor_identity_key
 
 from app.routes.results_utils import (
     ResultUpsert,
@@ -32,6 +35,7 @@ from app.routes.results_utils import (
     ensure_missing_results_as_dnc,
     normalize_race_results,
     filter_results_to_eligible_entries,
+    insert_result_rows,
     shift_finish_positions_open_slot,
     result_removes_from_ranking,
 )
@@ -80,22 +84,27 @@ def _find_entry_for_result_identity(
     if not sail_number_norm:
         return None
 
+    cc_norm = _norm_cc(boat_country_code)
+    if cc_norm:
+        # índice (regatta_id, identity_key)
+        return (
+            db.query(models.Entry)
+            .filter(
+                models.Entry.regatta_id == regatta_id,
+                models.Entry.identity_key == competitor_identity_key(class_name, sail_number_norm, cc_norm),
+            )
+            .first()
+        )
+
     base_q = (
         db.query(models.Entry)
         .filter(
             models.Entry.regatta_id == regatta_id,
-            func.lower(models.Entry.class_name) == class_name.strip().lower(),
+            models.Entry.class_key == class_identity_key(class_name),
             func.lower(models.Entry.sail_number) == sail_number_norm.lower(),
         )
     )
 
-    cc_norm = _norm_cc(boat_country_code)
-    if cc_norm:
-        return (
-            base_q.filter(func.upper(func.trim(models.Entry.boat_country_code)) == cc_norm)
-            .first()
-        )
-
     matches = base_q.all()
     if len(matches) > 1 and require_country_when_ambiguous:
         raise HTTPException(
@@ -108,18 +117,73 @@ def _find_entry_for_result_identity(
     return matches[0] if matches else None
 
 
+class EntryIdentityIndex:
+    """
+    Entries da classe de uma race, carregadas numa só query por pedido, para resolver
+    a Entry de cada linha sem 1 query por linha (bulk save, CSV import, listagem).
+    Mesmas regras que `_find_entry_for_result_identity`: par (sail, country) exato;
+    sem country, fallback só por sail (400 se houver mais do que uma entry).
+    Chaves normalizadas como no resto dos results (sail trim+upper, country trim+upper).
+    """
+
+    def __init__(self, entries: List[models.Entry]) -> None:
+        self.by_pair: dict[Tuple[str, str], models.Entry] = {}
+        self.by_sail: dict[str, List[models.Entry]] = {}
+        for e in entries:
+            sn = _norm_sn(getattr(e, "sail_number", None))
+            if not sn:
+                continue
+            cc = _norm_cc(getattr(e, "boat_country_code", None)) or ""
+            self.by_pair.setdefault((sn, cc), e)
+            self.by_sail.setdefault(sn, []).append(e)
+
+    @classmethod
+    def for_race(cls, db: Session, race: models.Race) -> "EntryIdentityIndex":
+        entries = (
+            db.query(models.Entry)
+            .filter(
+                models.Entry.regatta_id == race.regatta_id,
+                models.Entry.class_key == class_identity_key(race.class_name),
+            )
+            .order_by(models.Entry.id.asc())
+            .all()
+        )
+        return cls(entries)
+
+    def find(
+        self,
+        sail_number_norm: Optional[str],
+        boat_country_code: Optional[str],
+        *,
+        require_country_when_ambiguous: bool = True,
+    ) -> Optional[models.Entry]:
+        sn = _norm_sn(sail_number_norm)
+        if not sn:
+            return None
+
+        cc_norm = _norm_cc(boat_country_code)
+        if cc_norm:
+            return self.by_pair.get((sn, cc_norm))
+
+        matches = self.by_sail.get(sn, [])
+        if len(matches) > 1 and require_country_when_ambiguous:
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"boat_country_code is required for sail_number '{sail_number_norm}' "
+                    "because more than one entry has the same sail number."
+                ),
+            )
+        return matches[0] if matches else None
+
+
 def _build_result_identity_filter(
+    class_name: Optional[str],
     identities: set[Tuple[str, str]],
 ):
-    clauses = []
-    for sn, cc in identities:
-        clauses.append(
-            and_(
-                models.Result.sail_number == sn,
-                func.upper(func.trim(models.Result.boat_country_code)) == cc,
-            )
-        )
-    return or_(*clauses) if clauses else None
+    """Filtro por identity_key (índice (race_id, identity_key)) para os pares (sail, country) normalizados."""
+    keys = sorted({competitor_identity_key(class_name, sn, cc) for sn, cc in identities})
+    return models.Result.identity_key.in_(keys) if keys else None
 
 
 @router.get("/races/{race_id}/results", response_model=List[schemas.ResultRead])
@@ -136,15 +200,13 @@ def get_results_for_race(race_id: int, db: Session = Depends(get_db)):
     visible_rows = filter_results_to_eligible_entries(
         db, int(race.regatta_id), rows, str(race.class_name or "")
     )
+    entries = EntryIdentityIndex.for_race(db, race)
     out = []
     for row in visible_rows:
         item = schemas.ResultRead.model_validate(row).model_dump()
-        entry = _find_entry_for_result_identity(
-            db,
-            regatta_id=int(race.regatta_id),
-            class_name=str(race.class_name or ""),
-            sail_number_norm=_norm_sn(getattr(row, "sail_number", None)),
-            boat_country_code=_norm_cc(getattr(row, "boat_country_code", None)),
+        entry = entries.find(
+            getattr(row, "sail_number", None),
+            getattr(row, "boat_country_code", None),
             require_country_when_ambiguous=False,
         )
         if entry is not None:
@@ -174,6 +236,7 @@ def upsert_single_result(
             assert_user_can_manage_org_id(current_user, regatta.organization_id)
         else:
             assert_staff_regatta_access(db, current_user, regatta.id)
+    lock_race_for_write(db, race.id)
 
     existing = (
         db.query(models.Result)
@@ -274,6 +337,7 @@ def add_single_result(
             assert_user_can_manage_org_id(current_user, regatta.organization_id)
         else:
             assert_staff_regatta_access(db, current_user, regatta.id)
+    lock_race_for_write(db, race.id)
 
     scoring_map = get_scoring_map(db, int(race.regatta_id), str(race.class_name or ""))
 
@@ -282,13 +346,7 @@ def add_single_result(
 
     sn_res = _norm_sn(payload.sail_number) or payload.sail_number
     payload_cc = _norm_cc(getattr(payload, "boat_country_code", None))
-    entry_res = _find_entry_for_result_identity(
-        db,
-        regatta_id=payload.regatta_id,
-        class_name=str(race.class_name or ""),
-        sail_number_norm=_norm_sn(sn_res),
-        boat_country_code=payload_cc,
-    )
+    entry_res = EntryIdentityIndex.for_race(db, race).find(sn_res, payload_cc)
 
     if payload.sail_number:
         cc_filter = payload_cc or _norm_cc(getattr(entry_res, "boat_country_code", None))
@@ -391,6 +449,7 @@ def reorder_race_results(
             assert_user_can_manage_org_id(current_user, regatta.organization_id)
         else:
             assert_staff_regatta_access(db, current_user, regatta.id)
+    lock_race_for_write(db, race.id)
 
     rows = (
         db.query(models.Result)
@@ -424,11 +483,12 @@ def reorder_race_results(
 @router.get("/races/{race_id}/results/pdf", response_class=Response)
 def get_race_results_pdf(
     race_id: int,
+    wait: bool = Query(True, description="If false, return 202 with the render job status instead of waiting for the PDF."),
     db: Session = Depends(get_db),
 ):
     """
     Generate PDF for a single race, including handicap time fields.
-    Public endpoint (no auth required).
+    Public endpoint (no auth required). Rendered in the PDF pool and stored (see pdf_render_pool).
     """
     race = db.query(models.Race).filter(models.Race.id == race_id).first()
     if not race:
@@ -438,20 +498,6 @@ def get_race_results_pdf(
     if not regatta:
         raise HTTPException(status_code=404, detail="Regatta not found")
 
-    results = filter_results_to_eligible_entries(
-        db,
-        int(race.regatta_id),
-        (
-            db.query(models.Result)
-            .filter(models.Result.race_id == race_id)
-            .order_by(models.Result.position.asc(), models.Result.id.asc())
-            .all()
-        ),
-        str(race.class_name or ""),
-    )
-    if not results:
-        raise HTTPException(status_code=404, detail="No results for this race")
-
     sponsors = (
         db.query(models.RegattaSponsor)
         .filter(
@@ -467,16 +513,36 @@ def get_race_results_pdf(
         .all()
     )
 
-    uploads_dir = Path("uploads").resolve()
-    pdf_bytes = build_race_results_pdf(regatta, race, results, sponsors, uploads_dir)
-
     filename = _safe_race_export_filename(regatta, race, "pdf")
-
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    key = pdf_render_pool.pdf_key("race", regatta, int(race.id), sponsors)
+    job = pdf_render_pool.cached_job(key, filename)
+    if job is None:
+        results = filter_results_to_eligible_entries(
+            db,
+            int(race.regatta_id),
+            (
+                db.query(models.Result)
+                .filter(models.Result.race_id == race_id)
+                .order_by(models.Result.position.asc(), models.Result.id.asc())
+                .all()
+            ),
+            str(race.class_name or ""),
+        )
+        if not results:
+            raise HTTPException(status_code=404, detail="No results for this race")
+
+        uploads_dir = Path("uploads").resolve()
+        args = (
+            pdf_render_pool.regatta_snapshot(regatta),
+            pdf_render_pool.race_snapshot(race),
+            pdf_render_pool.result_snapshots(results),
+            pdf_render_pool.sponsor_snapshots(sponsors),
+            uploads_dir,
+        )
+        job = pdf_render_pool.submit_render(key, filename, "race", args)
+    # o render já não precisa da DB: devolver a ligação antes de esperar
+    db.close()
+    return pdf_render_pool.pdf_response(job, wait)
 
 
 @router.post("/races/{race_id}/results", response_model=List[schemas.ResultRead])
@@ -510,6 +576,32 @@ def create_results_for_race(
         else:
             assert_staff_regatta_access(db, current_user, regatta.id)
 
+    save_race_results(db, race, results, fleet_id)
+    db.commit()
+
+    return (
+        db.query(models.Result)
+        .filter(models.Result.race_id == race_id)
+        .order_by(models.Result.position.asc(), models.Result.id.asc())
+        .all()
+    )
+
+
+def save_race_results(
+    db: Session,
+    race: models.Race,
+    results: List[schemas.ResultCreate],
+    fleet_id: Union[int, str] = "all",
+    entries: Optional[EntryIdentityIndex] = None,
+) -> None:
+    """
+    Corpo do bulk save (sem auth nem commit; também usado pelo import CSV): apaga o
+    scope, valida o payload, insere as linhas num só INSERT (`insert_result_rows`),
+    DNC para quem falta e normaliza a race uma vez. `entries`: índice já carregado.
+    """
+    race_id = int(race.id)
+    lock_race_for_write(db, race_id)
+
     # Verificar se a classe é handicap (usa tempos e corrected_time)
     regatta_class = (
         db.query(models.RegattaClass)
@@ -523,6 +615,18 @@ def create_results_for_race(
 
     scoring_map = get_scoring_map(db, int(race.regatta_id), str(race.class_name or ""))
 
+    # entries da classe: 1 query para o pedido inteiro (em vez de 1-3 por linha)
+    if entries is None:
+        entries = EntryIdentityIndex.for_race(db, race)
+    # contexto N / fleets para os codes N+1: só se houver codes, 1x por pedido
+    competitor_ctx: Optional[dict] = None
+
+    def _competitor_ctx() -> dict:
+        nonlocal competitor_ctx
+        if competitor_ctx is None:
+            competitor_ctx = _build_competitor_context_for_race(db, race)
+        return competitor_ctx
+
     # A corrida tem fleet_set associado?
     has_fleets = bool(getattr(race, "fleet_set_id", None))
 
@@ -534,13 +638,7 @@ def create_results_for_race(
             continue
         cc = _norm_cc(getattr(r, "boat_country_code", None))
         if not cc:
-            entry_r = _find_entry_for_result_identity(
-                db,
-                regatta_id=r.regatta_id,
-                class_name=str(race.class_name or ""),
-                sail_number_norm=sn,
-                boat_country_code=None,
-            )
+            entry_r = entries.find(sn, None)
             cc = _norm_cc(getattr(entry_r, "boat_country_code", None)) if entry_r else None
         if cc:
             payload_identities.add((sn, cc))
@@ -558,7 +656,7 @@ def create_results_for_race(
         # não temos coluna fleet_id na tabela results,
         # por isso apagamos apenas pelos sails que vêm no payload
         if payload_identities:
-            identity_filter = _build_result_identity_filter(payload_identities)
+            identity_filter = _build_result_identity_filter(race.class_name, payload_identities)
             if identity_filter is not None:
                 db.query(models.Result).filter(
                     models.Result.race_id == race_id,
@@ -572,6 +670,7 @@ def create_results_for_race(
     # ---------------------------------------------
     # Chave composta (sail_number, boat_country_code) para permitir POR 2 e ESP 2 no mesmo payload
     seen_keys: set[tuple[str, str]] = set()
+    new_rows: list[dict] = []
 
     for r in results:
         sn_norm = _norm_sn(r.sail_number)
@@ -595,13 +694,7 @@ def create_results_for_race(
         code = _norm(getattr(r, "code", None))
 
         boat_cc = _norm_cc(getattr(r, "boat_country_code", None))
-        entry_r = _find_entry_for_result_identity(
-            db,
-            regatta_id=r.regatta_id,
-            class_name=str(race.class_name or ""),
-            sail_number_norm=sn_norm,
-            boat_country_code=boat_cc,
-        )
+        entry_r = entries.find(sn_norm, boat_cc)
         if not boat_cc and entry_r is not None:
             boat_cc = _norm_cc(getattr(entry_r, "boat_country_code", None))
         if not boat_cc:
@@ -621,6 +714,7 @@ def create_results_for_race(
                         code=code,
                         manual_points=float(r.points) if r.points is not None else None,
                         scoring_map=scoring_map,
+                        ctx=_competitor_ctx(),
                         boat_country_code=boat_cc,
                     )
                 else:
@@ -628,7 +722,7 @@ def create_results_for_race(
             except ValueError as e:
                 raise HTTPException(status_code=400, detail=str(e))
 
-            row = models.Result(
+            new_rows.append(dict(
                 regatta_id=r.regatta_id,
                 race_id=race_id,
                 sail_number=sn_norm,
@@ -640,32 +734,31 @@ def create_results_for_race(
                 finish_position=None if removes_from_ranking(code) else int(r.position or 1),
                 points=float(pts),
                 code=code,
-            )
-            db.add(row)
+            ))
 
     # Handicap: calcular ranking a partir de corrected_time e inserir (One Design já inserido acima)
     if is_handicap:
-        ctx = _build_competitor_context_for_race(db, race)
+        ctx = _competitor_ctx()
+        # anc/orc sem corrected_time: calculado do elapsed × rating, numa passagem para a race toda
+        computed_ct = _corrected_from_elapsed(race, results, entries)
+        corrected_strs = [
+            (getattr(r, "corrected_time", None) or "").strip() or (format_hms(ct) if ct is not None else "")
+            for r, ct in zip(results, computed_ct)
+        ]
         items = [
             (
-                _parse_time_to_seconds(getattr(r, "corrected_time", None)),
+                _parse_time_to_seconds(ct_str),
                 _norm(getattr(r, "code", None)),
                 bool(getattr(r, "code_shifts_places", False)),
             )
-            for r in results
+            for r, ct_str in zip(results, corrected_strs)
         ]
         rankings = compute_handicap_ranking(items, ctx["total_count"])
-        for r, (pos, delta_str, pts) in zip(results, rankings):
+        for r, ct_str, (pos, delta_str, pts) in zip(results, corrected_strs, rankings):
             sn_norm = _norm_sn(r.sail_number)
             # snapshot de dados da Entry (country code + rating)
             boat_cc = _norm_cc(getattr(r, "boat_country_code", None))
-            entry_r = _find_entry_for_result_identity(
-                db,
-                regatta_id=r.regatta_id,
-                class_name=str(race.class_name or ""),
-                sail_number_norm=sn_norm,
-                boat_country_code=boat_cc,
-            ) if sn_norm else None
+            entry_r = entries.find(sn_norm, boat_cc)
 
             if not boat_cc and entry_r is not None:
                 boat_cc = _norm_cc(getattr(entry_r, "boat_country_code", None))
@@ -683,7 +776,7 @@ def create_results_for_race(
                     finish_day_val = int(finish_day_val)
                 except (TypeError, ValueError):
                     finish_day_val = None
-            row = models.Result(
+            new_rows.append(dict(
                 regatta_id=r.regatta_id,
                 race_id=race_id,
                 sail_number=sn_norm,
@@ -698,11 +791,11 @@ def create_results_for_race(
                 finish_time=(getattr(r, "finish_time", None) or "").strip() or None,
                 finish_day=finish_day_val,
                 elapsed_time=(getattr(r, "elapsed_time", None) or "").strip() or None,
-                corrected_time=(getattr(r, "corrected_time", None) or "").strip() or None,
+                corrected_time=ct_str or None,
                 delta=delta_str,
-            )
-            db.add(row)
+            ))
 
+    insert_result_rows(db, new_rows)
     db.flush()
 
     # ---------------------------------------------
@@ -715,17 +808,9 @@ def create_results_for_race(
     # 4) Compactar posições / recalcular pontos finais
     # ---------------------------------------------
     normalize_race_results(db, race)
-    db.commit()
 
-    return (
-        db.query(models.Result)
-        .filter(models.Result.race_id == race_id)
-        .order_by(models.Result.position.asc(), models.Result.id.asc())
-        .all()
-    )
 
-
-# ========== One Design CSV Export / Import (v1: this race only) ==========
+# ========== CSV Export (this race only; import em results_import.py) ==========
 
 def _race_is_one_design(db: Session, race: models.Race) -> bool:
     regatta_class = (
@@ -755,6 +840,39 @@ def _race_handicap_csv_columns(race: models.Race) -> list[str]:
     return cols
 
 
+def _corrected_from_elapsed(
+    race: models.Race,
+    results: List[schemas.ResultCreate],
+    entries: EntryIdentityIndex,
+) -> list[Optional[float]]:
+    """
+    anc/orc: corrected time (segundos) = round(rating × elapsed) das linhas sem corrected_time,
+    com o rating da linha ou o rating efetivo da entry (`_effective_entry_rating_for_race`).
+    None onde não se aplica (manual, corrected já dado, sem elapsed ou sem rating).
+    """
+    method = (getattr(race, "handicap_method", None) or "manual").strip().lower()
+    if method not in ("anc", "orc"):
+        return [None] * len(results)
+    elapsed: list[Optional[float]] = []
+    ratings: list[Optional[float]] = []
+    for r in results:
+        if (getattr(r, "corrected_time", None) or "").strip():
+            elapsed.append(None)
+            ratings.append(None)
+            continue
+        elapsed.append(_parse_time_to_seconds(getattr(r, "elapsed_time", None)))
+        rating = getattr(r, "rating", None)
+        if rating is None:
+            entry = entries.find(
+                _norm_sn(r.sail_number),
+                _norm_cc(getattr(r, "boat_country_code", None)),
+                require_country_when_ambiguous=False,
+            )
+            rating = _effective_entry_rating_for_race(entry, race)
+        ratings.append(rating)
+    return correct_elapsed_times(elapsed, ratings)
+
+
 def _effective_entry_rating_for_race(entry: models.Entry | None, race: models.Race) -> float | None:
     if entry is None:
         return None
@@ -833,442 +951,3 @@ def export_race_results_csv(
         media_type="text/csv",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-
-
-def _parse_one_design_csv(content: bytes) -> tuple:
-    """Parse CSV with header sail_number,boat_country_code,points,code. Returns (rows, errors)."""
-    errors = []
-    rows = []
-    try:
-        text = content.decode("utf-8-sig").strip()
-    except Exception as e:
-        errors.append(f"File is not valid UTF-8: {e}")
-        return rows, errors
-    if not text:
-        errors.append("File is empty.")
-        return rows, errors
-    reader = csv.reader(io.StringIO(text))
-    header = next(reader, None)
-    if not header:
-        errors.append("Missing header row.")
-        return rows, errors
-    norm_header = [h.strip().lower() for h in header]
-    idx_sn = idx_cc = idx_pts = idx_code = -1
-    for i, h in enumerate(norm_header):
-        if h == "sail_number":
-            idx_sn = i
-        elif h == "boat_country_code":
-            idx_cc = i
-        elif h == "points":
-            idx_pts = i
-        elif h == "code":
-            idx_code = i
-    if idx_sn < 0:
-        errors.append("Missing required column 'sail_number'.")
-        return rows, errors
-    if idx_cc < 0:
-        errors.append("Missing required column 'boat_country_code'.")
-        return rows, errors
-    if idx_pts < 0 and idx_code < 0:
-        errors.append("At least one of 'points' or 'code' is required.")
-        return rows, errors
-    seen_keys = set()
-    for row_num, row in enumerate(reader, start=2):
-        max_idx = max(idx_sn, idx_cc, idx_pts if idx_pts >= 0 else 0, idx_code if idx_code >= 0 else 0)
-        if len(row) <= max_idx:
-            errors.append(f"Line {row_num}: missing fields.")
-            continue
-        sn = (row[idx_sn] or "").strip()
-        cc = (row[idx_cc] or "").strip().upper()
-        if not sn:
-            errors.append(f"Line {row_num}: 'sail_number' is required.")
-            continue
-        if not cc:
-            errors.append(f"Line {row_num}: 'boat_country_code' is required.")
-            continue
-        sn_upper = sn.upper()
-        key = (sn_upper, cc)
-        if key in seen_keys:
-            errors.append(f"Line {row_num}: duplicate pair '{cc} {sn_upper}'.")
-            continue
-        seen_keys.add(key)
-        pts_val = (row[idx_pts] or "").strip() if idx_pts >= 0 else ""
-        code_val = (row[idx_code] or "").strip() if idx_code >= 0 else ""
-        if not pts_val and not code_val:
-            errors.append(f"Line {row_num}: fill at least one of 'points' or 'code'.")
-            continue
-        if pts_val:
-            try:
-                float(pts_val)
-            except ValueError:
-                errors.append(f"Line {row_num}: 'points' must be numeric.")
-                continue
-        rows.append(
-            {
-                "sail_number": sn_upper,
-                "boat_country_code": cc,
-                "points": pts_val,
-                "code": code_val.upper() if code_val else None,
-            }
-        )
-    return rows, errors
-
-
-def _parse_handicap_csv(content: bytes, columns: list[str]) -> tuple[list[dict], list[str]]:
-    """Parse handicap CSV and validate format according to selected handicap mode columns."""
-    errors: list[str] = []
-    rows: list[dict] = []
-    try:
-        text = content.decode("utf-8-sig").strip()
-    except Exception as e:
-        errors.append(f"File is not valid UTF-8: {e}")
-        return rows, errors
-    if not text:
-        errors.append("File is empty.")
-        return rows, errors
-
-    reader = csv.reader(io.StringIO(text))
-    header = next(reader, None)
-    if not header:
-        errors.append("Missing header row.")
-        return rows, errors
-
-    norm_header = [h.strip().lower() for h in header]
-    idx_by_col: dict[str, int] = {}
-    optional_cols = {"rating"}
-    for c in columns:
-        try:
-            idx_by_col[c] = norm_header.index(c)
-        except ValueError:
-            if c in optional_cols:
-                continue
-            errors.append(f"Missing required column '{c}'.")
-    if errors:
-        return rows, errors
-
-    seen_keys: set[tuple[str, str]] = set()
-    for row_num, row in enumerate(reader, start=2):
-        max_idx = max(idx_by_col.values())
-        if len(row) <= max_idx:
-            errors.append(f"Line {row_num}: missing fields.")
-            continue
-
-        row_has_error = False
-        data = {c: (row[idx_by_col[c]] or "").strip() for c in columns if c in idx_by_col}
-        sn = (data.get("sail_number") or "").upper()
-        cc = (data.get("boat_country_code") or "").upper()
-
-        if not sn:
-            errors.append(f"Line {row_num}: 'sail_number' is required.")
-            row_has_error = True
-        if not cc:
-            errors.append(f"Line {row_num}: 'boat_country_code' is required.")
-            row_has_error = True
-        if row_has_error:
-            continue
-
-        key = (sn, cc)
-        if key in seen_keys:
-            errors.append(f"Line {row_num}: duplicate pair '{cc} {sn}'.")
-            continue
-        seen_keys.add(key)
-
-        corrected = (data.get("corrected_time") or "").strip()
-        if not corrected:
-            errors.append(f"Line {row_num}: 'corrected_time' is required.")
-            continue
-        if _parse_time_to_seconds(corrected) is None:
-            errors.append(f"Line {row_num}: 'corrected_time' must be HH:MM:SS.")
-            continue
-
-        for tcol in ("finish_time", "elapsed_time"):
-            tv = (data.get(tcol) or "").strip()
-            if tv and _parse_time_to_seconds(tv) is None:
-                errors.append(f"Line {row_num}: '{tcol}' must be HH:MM:SS.")
-                row_has_error = True
-
-        finish_day_raw = (data.get("finish_day") or "").strip()
-        if finish_day_raw:
-            try:
-                if int(finish_day_raw) < 0:
-                    raise ValueError()
-            except ValueError:
-                errors.append(f"Line {row_num}: 'finish_day' must be an integer >= 0.")
-                row_has_error = True
-
-        rating_raw = (data.get("rating") or "").strip()
-        if "rating" in idx_by_col:
-            if rating_raw:
-                try:
-                    float(rating_raw)
-                except ValueError:
-                    errors.append(f"Line {row_num}: 'rating' must be numeric.")
-                    row_has_error = True
-
-        if row_has_error:
-            continue
-
-        rows.append(
-            {
-                "sail_number": sn,
-                "boat_country_code": cc,
-                "finish_day": finish_day_raw,
-                "finish_time": (data.get("finish_time") or "").strip(),
-                "elapsed_time": (data.get("elapsed_time") or "").strip(),
-                "corrected_time": corrected,
-                "code": ((data.get("code") or "").strip().upper() or None),
-                "rating": float(rating_raw) if rating_raw else None,
-            }
-        )
-
-    return rows, errors
-
-
-@router.post("/races/{race_id}/import/csv")
-def import_race_results_csv(
-    race_id: int,
-    file: UploadFile = File(...),
-    clear_existing: bool = Form(False),
-    confirm: bool = Form(False),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
-    """
-    Import CSV for this race (one design only).
-    Without confirm: returns validation + preview.
-    With confirm: applies import (upsert by sail_number); optional clear_existing.
-    """
-    if current_user.role not in ("admin", "platform_admin", "scorer"):
-        raise HTTPException(status_code=403, detail="Access denied")
-    if not file:
-        raise HTTPException(status_code=400, detail="Missing file.")
-    race = db.query(models.Race).filter(models.Race.id == race_id).first()
-    if not race:
-        raise HTTPException(status_code=404, detail="Race not found")
-    regatta = db.query(models.Regatta).filter_by(id=race.regatta_id).first()
-    if regatta:
-        if current_user.role in ("admin", "platform_admin"):
-            assert_user_can_manage_org_id(current_user, regatta.organization_id)
-        else:
-            assert_staff_regatta_access(db, current_user, regatta.id)
-    content = file.file.read()
-    file.file.close()
-    is_one_design = _race_is_one_design(db, race)
-    if is_one_design:
-        rows, parse_errors = _parse_one_design_csv(content)
-        expected_columns = ["sail_number", "boat_country_code", "points", "code"]
-    else:
-        expected_columns = _race_handicap_csv_columns(race)
-        rows, parse_errors = _parse_handicap_csv(content, expected_columns)
-    if parse_errors:
-        return {
-            "ok": False,
-            "preview": [],
-            "errors": parse_errors,
-            "unmatched": [],
-            "columns": expected_columns,
-        }
-    entries = (
-        db.query(models.Entry)
-        .filter(
-            models.Entry.regatta_id == race.regatta_id,
-            func.lower(models.Entry.class_name) == func.lower(str(race.class_name or "")),
-        )
-        .all()
-    )
-    valid_keys = set()
-    entry_by_key = {}
-    for e in entries:
-        sn = _norm_sn(getattr(e, "sail_number", None))
-        cc = (getattr(e, "boat_country_code", None) or "").strip().upper()
-        if sn:
-            key = (sn, cc)
-            valid_keys.add(key)
-            entry_by_key[key] = e
-    unmatched = [f'{r["boat_country_code"]} {r["sail_number"]}' for r in rows if (r["sail_number"], r["boat_country_code"]) not in valid_keys]
-    missing_rating_pairs: list[str] = []
-    if not is_one_design:
-        method = (getattr(race, "handicap_method", None) or "manual").strip().lower()
-        if method in ("anc", "orc"):
-            for r in rows:
-                if r.get("rating") is not None:
-                    continue
-                sn = r["sail_number"]
-                cc = r["boat_country_code"]
-                entry = entry_by_key.get((sn, cc))
-                if _effective_entry_rating_for_race(entry, race) is None:
-                    missing_rating_pairs.append(f"{cc} {sn}")
-    if is_one_design:
-        preview = [
-            {
-                "sail_number": r["sail_number"],
-                "boat_country_code": r["boat_country_code"],
-                "points": r["points"],
-                "code": r["code"],
-            }
-            for r in rows[:15]
-        ]
-    else:
-        preview = [{c: r.get(c, "") for c in expected_columns} for r in rows[:15]]
-
-    if not confirm:
-        err_msg: list[str] = []
-        if unmatched:
-            err_msg.append(f"Entry not found for sail/country pair(s): {', '.join(unmatched)}")
-        if missing_rating_pairs:
-            mode = (getattr(race, "handicap_method", None) or "manual").strip().lower()
-            if mode == "orc":
-                err_msg.append(
-                    "Missing rating for ORC mode for sail/country pair(s): "
-                    + ", ".join(missing_rating_pairs)
-                )
-            else:
-                err_msg.append(
-                    "Missing rating for Simple Rating mode for sail/country pair(s): "
-                    + ", ".join(missing_rating_pairs)
-                )
-        return {
-            "ok": len(unmatched) == 0 and len(missing_rating_pairs) == 0,
-            "preview": preview,
-            "errors": err_msg,
-            "unmatched": unmatched,
-            "columns": expected_columns,
-        }
-
-    if unmatched:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Import failed: entry not found for sail/country pair(s): {', '.join(unmatched)}",
-        )
-    if missing_rating_pairs:
-        mode = (getattr(race, "handicap_method", None) or "manual").strip().lower()
-        mode_label = "ORC" if mode == "orc" else "Simple Rating"
-        raise HTTPException(
-            status_code=400,
-            detail=(
-                f"Import failed: missing rating for {mode_label} mode for sail/country pair(s): "
-                f"{', '.join(missing_rating_pairs)}"
-            ),
-        )
-
-    if is_one_design:
-        scoring_map = get_scoring_map(db, int(race.regatta_id), str(race.class_name or ""))
-        if clear_existing:
-            db.query(models.Result).filter(models.Result.race_id == race_id).delete(synchronize_session=False)
-            db.flush()
-
-        for i, r in enumerate(rows):
-            sn = r["sail_number"]
-            cc = r["boat_country_code"]
-            pts_str = r["points"]
-            code = _norm(r["code"]) if r["code"] else None
-            entry = entry_by_key.get((sn, cc))
-            boat_cc = cc
-            if code:
-                try:
-                    pts_val = compute_points_for_code(
-                        db=db,
-                        race=race,
-                        sail_number=sn,
-                        code=code,
-                        manual_points=float(pts_str) if pts_str else None,
-                        scoring_map=scoring_map,
-                        boat_country_code=boat_cc if boat_cc else None,
-                    )
-                except ValueError as e:
-                    raise HTTPException(status_code=400, detail=f"Line {i + 2}: {e}")
-            else:
-                pts_val = float(pts_str)
-            boat_name = getattr(entry, "boat_name", None) if entry else None
-            helm_name = (
-                f"{getattr(entry, 'first_name', '') or ''} {getattr(entry, 'last_name', '') or ''}".strip()
-                if entry else ""
-            )
-            existing = (
-                db.query(models.Result)
-                .filter(
-                    models.Result.race_id == race_id,
-                    models.Result.sail_number == sn,
-                    models.Result.boat_country_code == cc,
-                )
-                .first()
-            )
-            if existing:
-                existing.points = float(pts_val)
-                existing.code = code
-                existing.points_override = float(pts_val) if code else None
-            else:
-                new_res = models.Result(
-                    regatta_id=race.regatta_id,
-                    race_id=race_id,
-                    sail_number=sn,
-                    boat_country_code=boat_cc,
-                    boat_name=boat_name,
-                    class_name=race.class_name,
-                    skipper_name=helm_name or None,
-                    position=i + 1,
-                    points=float(pts_val),
-                    code=code,
-                    points_override=float(pts_val) if code else None,
-                )
-                db.add(new_res)
-
-        db.flush()
-        normalize_race_results(db, race)
-        db.commit()
-    else:
-        payload: list[schemas.ResultCreate] = []
-        for r in rows:
-            sn = r["sail_number"]
-            cc = r["boat_country_code"]
-            entry = entry_by_key.get((sn, cc))
-            rating_val = r.get("rating")
-            if rating_val is None:
-                rating_val = _effective_entry_rating_for_race(entry, race)
-            boat_name = getattr(entry, "boat_name", None) if entry else None
-            helm_name = (
-                f"{getattr(entry, 'first_name', '') or ''} {getattr(entry, 'last_name', '') or ''}".strip()
-                if entry
-                else ""
-            )
-            finish_day_val = r.get("finish_day")
-            finish_day_num = int(finish_day_val) if str(finish_day_val).strip() != "" else None
-            payload.append(
-                schemas.ResultCreate(
-                    regatta_id=race.regatta_id,
-                    race_id=race_id,
-                    sail_number=sn,
-                    boat_country_code=cc,
-                    boat_name=boat_name,
-                    helm_name=helm_name or None,
-                    position=None,
-                    points=None,
-                    code=r.get("code"),
-                    finish_time=r.get("finish_time") or None,
-                    finish_day=finish_day_num,
-                    elapsed_time=r.get("elapsed_time") or None,
-                    corrected_time=r.get("corrected_time") or None,
-                    rating=rating_val,
-                )
-            )
-
-        create_results_for_race(
-            race_id=race_id,
-            results=payload,
-            db=db,
-            current_user=current_user,
-            fleet_id="all",
-        )
-
-    updated = (
-        db.query(models.Result)
-        .filter(models.Result.race_id == race_id)
-        .order_by(models.Result.position.asc(), models.Result.id.asc())
-        .all()
-    )
-    return {
-        "ok": True,
-        "applied": len(rows),
-        "results": [schemas.ResultRead.model_validate(r) for r in updated],
-        "columns": expected_columns,
-    }
@@ -1,13 +1,25 @@
 # app/routes/results_utils.py
 from __future__ import annotations
 
+from dataclasses import dataclass, fields as dc_fields
 from typing import List, Optional, Dict, Any, Tuple, Union, Set
 
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy import func, insert, update
 
 from app import models
+from app.services import competitor_cache
+from app.services.race_locks import lock_races_for_write
+from app.services.standings_cache import mark_results_changed
+from app.scoring.handicap import format_delta, parse_time_to_seconds, rank_corrected_times
+from app.utils.identity import (
+    class_identity_key,
+    identity_key as competitor_identity_key,
+    sail_country_key,
+)
 
 
 # =========================================================
@@ -82,14 +94,9 @@ def _fleet_assignment_key(sn_norm: Optional[str], boat_country_code: Optional[st
     return (sn, cc)
 
 
-def _sc_key(sail_number: Any, boat_country_code: Any) -> str:
-    sn = _norm_sn(sail_number) or ""
-    cc = (str(boat_country_code) if boat_country_code is not None else "").strip().upper()
-    return f"{sn}||{cc}"
-
-
-def _class_identity_key(class_name: Any) -> str:
-    return str(class_name or "").strip().lower()
+# chaves canónicas em app.utils.identity (as mesmas das colunas identity_key)
+_sc_key = sail_country_key
+_class_identity_key = class_identity_key
 
 
 def result_row_identity(result: models.Result) -> Tuple[str, str]:
@@ -111,16 +118,18 @@ def build_eligible_result_identities(
     class_name: Optional[str] = None,
 ) -> Set[Tuple[str, str]]:
     """Conjunto de identidades (classe + vela + país) com entry paid+confirmed."""
-    q = db.query(models.Entry).filter(
+    q = db.query(
+        models.Entry.class_name,
+        models.Entry.sail_number,
+        models.Entry.boat_country_code,
+    ).filter(
         models.Entry.regatta_id == regatta_id,
         models.Entry.paid.is_(True),
         models.Entry.confirmed.is_(True),
     )
     if class_name:
-        q = q.filter(
-            func.lower(func.trim(models.Entry.class_name))
-            == func.lower(func.trim(str(class_name)))
-        )
+        # índice (regatta_id, class_key)
+        q = q.filter(models.Entry.class_key == _class_identity_key(class_name))
     return {entry_result_identity(e) for e in q.all()}
 
 
@@ -134,27 +143,84 @@ def filter_results_to_eligible_entries(
     return [r for r in results if result_row_identity(r) in eligible]
 
 
-def delete_results_for_entry(db: Session, entry: models.Entry) -> int:
-    """Apaga todos os resultados desta identidade na regata e recompacta as provas."""
-    identity = entry_result_identity(entry)
-    regatta_id = int(entry.regatta_id)
+def refresh_identity_keys(db: Session, model: Any, *criteria: Any) -> int:
+    """
+    Recalcula identity_key (e class_key nas entries) das linhas de `model` que batem
+    com `criteria`. Para depois de bulk UPDATEs de classe/vela/país, que não passam
+    pelos listeners do ORM. Devolve o nº de linhas corrigidas.
+    """
+    with_class_key = hasattr(model, "class_key")
+    changed: List[Dict[str, Any]] = []
+    for rid, cls, sn, cc, key in db.query(
+        model.id, model.class_name, model.sail_number, model.boat_country_code, model.identity_key
+    ).filter(*criteria):
+        new_key = competitor_identity_key(cls, sn, cc)
+        if new_key == key:
+            continue
+        params: Dict[str, Any] = {"id": int(rid), "identity_key": new_key}
+        if with_class_key:
+            params["class_key"] = _class_identity_key(cls)
+        changed.append(params)
+    if changed:
+        db.execute(update(model), changed)
+    return len(changed)
 
-    rows = db.query(models.Result).filter(models.Result.regatta_id == regatta_id).all()
-    to_delete = [r for r in rows if result_row_identity(r) == identity]
-    if not to_delete:
-        return 0
 
-    race_ids = {int(r.race_id) for r in to_delete}
-    for r in to_delete:
-        db.delete(r)
-    db.flush()
+def lock_entries_races_for_write(
+    db: Session,
+    entries: List[models.Entry],
+    extra_race_ids: Any = (),
+) -> None:
+    """
+    Lock de escrita (race_locks) de todas as races onde escritas destas entries podem
+    mexer: as das suas classes (DNC) e as que já têm linhas das suas identidades, mais
+    `extra_race_ids`. Tudo numa chamada, por ordem de id, ANTES de apagar/inserir/
+    renormalizar: um save do scorer na mesma race espera ou faz esperar.
+    """
+    race_ids: Set[int] = {int(r) for r in extra_race_ids if r is not None}
+    class_keys: Set[Tuple[int, str]] = set()
+    identities: Set[Tuple[int, str]] = set()
+    for e in entries:
+        if e.regatta_id is None:
+            continue
+        class_key = _class_identity_key(getattr(e, "class_name", None))
+        if class_key:
+            class_keys.add((int(e.regatta_id), class_key))
+        identities.add(
+            (int(e.regatta_id), competitor_identity_key(e.class_name, e.sail_number, e.boat_country_code))
+        )
 
-    for race_id in race_ids:
-        race = db.query(models.Race).filter(models.Race.id == race_id).first()
-        if race:
-            normalize_race_results(db, race)
+    # sem autoflush: não segurar as linhas das entries alteradas enquanto se espera pelo lock
+    with db.no_autoflush:
+        if class_keys:
+            for race_id, regatta_id, cls in db.query(
+                models.Race.id, models.Race.regatta_id, models.Race.class_name
+            ).filter(
+                models.Race.regatta_id.in_(sorted({rid for rid, _ in class_keys})),
+                func.lower(func.trim(models.Race.class_name)).in_(sorted({c for _, c in class_keys})),
+            ):
+                if (int(regatta_id), _class_identity_key(cls)) in class_keys:
+                    race_ids.add(int(race_id))
+        if identities:
+            for race_id, regatta_id, key in db.query(
+                models.Result.race_id, models.Result.regatta_id, models.Result.identity_key
+            ).filter(
+                models.Result.regatta_id.in_(sorted({rid for rid, _ in identities})),
+                models.Result.identity_key.in_(sorted({k for _, k in identities})),
+            ).distinct():
+                if (int(regatta_id), key) in identities:
+                    race_ids.add(int(race_id))
+
+    lock_races_for_write(db, race_ids)
 
-    return len(to_delete)
+
+def delete_results_for_entry(db: Session, entry: models.Entry) -> int:
+    """Apaga todos os resultados desta identidade na regata e recompacta as provas."""
+    lock_entries_races_for_write(db, [entry])
+    mark_results_changed(db, int(entry.regatta_id))
+    deleted, touched = _delete_entries_results(db, [entry])
+    _normalize_races(db, touched)
+    return deleted
 
 
 def add_entry_results_as_dnc(
@@ -167,143 +233,199 @@ def add_entry_results_as_dnc(
     Garante presença da entry nas races da classe/regata.
     Se já houver resultados numa race e a entry não existir, cria DNC no fim.
     """
-    if not entry_is_results_eligible(entry):
-        return 0
+    lock_entries_races_for_write(db, [entry])
+    created, touched = _add_entries_dnc_rows(db, [entry], only_scored_races=only_scored_races)
+    _normalize_races(db, touched)
+    return created
 
-    class_name = (getattr(entry, "class_name", None) or "").strip()
-    sn_norm = _norm_sn(getattr(entry, "sail_number", None))
-    if not class_name or not sn_norm:
-        return 0
 
-    races = (
-        db.query(models.Race)
+def sync_entry_results_eligibility(db: Session, entry: models.Entry) -> int:
+    """
+    Sincroniza resultados com estado da entry:
+    - paid+confirmed: garante DNC nas races já pontuadas onde faltava.
+    - caso contrário: remove resultados dessa entry.
+    """
+    counts = sync_entries_results_eligibility(db, [entry])
+    return counts["created"] if entry_is_results_eligible(entry) else counts["deleted"]
+
+
+def sync_entries_results_eligibility(db: Session, entries: List[models.Entry]) -> Dict[str, int]:
+    """
+    Versão set-based para várias entries (ex.: confirmar/pagar em massa):
+    entries elegíveis ganham DNC nas races já pontuadas onde faltavam, as restantes
+    perdem os seus resultados. Poucas queries no total (não por entry nem por race)
+    e cada race afetada é renormalizada uma só vez. Devolve {"created", "deleted"}.
+    """
+    entries = list(entries)
+    if not entries:
+        return {"created": 0, "deleted": 0}
+    lock_entries_races_for_write(db, entries)
+    # paid/confirmed/dados da entry entram no overall mesmo sem mexer em results
+    for regatta_id in sorted({int(e.regatta_id) for e in entries}):
+        mark_results_changed(db, regatta_id)
+    # o estado pendente (paid/confirmed) tem de contar para o N+1 dos DNC
+    db.flush()
+
+    deleted, touched_del = _delete_entries_results(
+        db, [e for e in entries if not entry_is_results_eligible(e)]
+    )
+    created, touched_add = _add_entries_dnc_rows(
+        db, [e for e in entries if entry_is_results_eligible(e)], only_scored_races=True
+    )
+    _normalize_races(db, {**touched_del, **touched_add})
+    return {"created": created, "deleted": deleted}
+
+
+def _normalize_races(db: Session, races: Dict[int, models.Race]) -> None:
+    for race_id in sorted(races):
+        normalize_race_results(db, races[race_id])
+
+
+def _delete_entries_results(
+    db: Session,
+    entries: List[models.Entry],
+) -> Tuple[int, Dict[int, models.Race]]:
+    """Apaga (sem normalizar) os resultados das identidades das entries. (nº apagados, races tocadas)."""
+    wanted: Set[Tuple[int, str]] = {
+        (int(e.regatta_id), competitor_identity_key(e.class_name, e.sail_number, e.boat_country_code))
+        for e in entries
+    }
+    if not wanted:
+        return 0, {}
+
+    # índice (regatta_id, identity_key): só as linhas destas identidades
+    rows = (
+        db.query(models.Result.id, models.Result.regatta_id, models.Result.race_id, models.Result.identity_key)
         .filter(
-            models.Race.regatta_id == int(entry.regatta_id),
-            func.lower(func.trim(models.Race.class_name))
-            == func.lower(func.trim(class_name)),
+            models.Result.regatta_id.in_(sorted({rid for rid, _ in wanted})),
+            models.Result.identity_key.in_(sorted({key for _, key in wanted})),
         )
-        .order_by(models.Race.order_index.asc(), models.Race.id.asc())
         .all()
     )
+    doomed = [r for r in rows if (int(r.regatta_id), r.identity_key) in wanted]
+    if not doomed:
+        return 0, {}
 
-    created_total = 0
-    entry_key = _fleet_assignment_key(sn_norm, getattr(entry, "boat_country_code", None))
+    db.query(models.Result).filter(
+        models.Result.id.in_([int(r.id) for r in doomed])
+    ).delete(synchronize_session="fetch")
+    race_ids = sorted({int(r.race_id) for r in doomed})
+    races = {
+        int(r.id): r
+        for r in db.query(models.Race).filter(models.Race.id.in_(race_ids)).all()
+    }
+    return len(doomed), races
 
-    for race in races:
-        if only_scored_races:
-            has_any = (
-                db.query(models.Result.id)
-                .filter(models.Result.race_id == int(race.id))
-                .first()
-            )
-            if not has_any:
-                continue
 
-        existing_rows = (
-            db.query(models.Result.sail_number, models.Result.boat_country_code)
-            .filter(models.Result.race_id == int(race.id))
-            .all()
-        )
-        existing_keys: Set[Tuple[str, str]] = set()
-        for sn_raw, cc_raw in existing_rows:
-            snn = _norm_sn(sn_raw)
-            if snn:
-                existing_keys.add(_fleet_assignment_key(snn, cc_raw))
-        if entry_key in existing_keys:
+def _add_entries_dnc_rows(
+    db: Session,
+    entries: List[models.Entry],
+    *,
+    only_scored_races: bool = True,
+) -> Tuple[int, Dict[int, models.Race]]:
+    """
+    Cria (sem normalizar) DNC no fim de cada race da classe onde a entry (elegível) falta.
+    Races + resultados existentes em 2 queries para todas as entries. (nº criados, races tocadas)
+    """
+    wanted: Dict[Tuple[int, str], List[models.Entry]] = {}
+    for entry in entries:
+        if not entry_is_results_eligible(entry):
             continue
+        class_key = _class_identity_key(getattr(entry, "class_name", None))
+        if not class_key or not _norm_sn(getattr(entry, "sail_number", None)):
+            continue
+        wanted.setdefault((int(entry.regatta_id), class_key), []).append(entry)
+    if not wanted:
+        return 0, {}
 
-        ctx = _build_competitor_context_for_race(db, race)
-        pts = _auto_n_plus_one_points(ctx, sn_norm, getattr(entry, "boat_country_code", None))
-
-        max_pos = (
-            db.query(models.Result.position)
-            .filter(models.Result.race_id == int(race.id))
-            .order_by(models.Result.position.desc())
-            .first()
+    races = (
+        db.query(models.Race)
+        .filter(
+            models.Race.regatta_id.in_(sorted({rid for rid, _ in wanted})),
+            func.lower(func.trim(models.Race.class_name)).in_(sorted({c for _, c in wanted})),
         )
-        next_pos = int(max_pos[0]) + 1 if max_pos and max_pos[0] is not None else 1
-
-        skipper = f"{getattr(entry, 'first_name', '') or ''} {getattr(entry, 'last_name', '') or ''}".strip() or None
-
-        db.add(
-            models.Result(
-                regatta_id=int(race.regatta_id),
-                race_id=int(race.id),
-                sail_number=sn_norm,
-                boat_country_code=getattr(entry, "boat_country_code", None),
-                boat_name=getattr(entry, "boat_name", None),
-                class_name=str(race.class_name or class_name),
-                skipper_name=skipper,
-                rating=getattr(entry, "rating", None),
-                position=next_pos,
-                points=float(pts),
-                code="DNC",
-                points_override=None,
-            )
+        .order_by(models.Race.order_index.asc(), models.Race.id.asc())
+        .all()
+    )
+    if not races:
+        return 0, {}
+
+    # chaves (vela, país) já presentes e maior position, por race
+    existing_keys: Dict[int, Set[Tuple[str, str]]] = {}
+    max_pos: Dict[int, int] = {}
+    for race_id, sn_raw, cc_raw, pos in (
+        db.query(
+            models.Result.race_id,
+            models.Result.sail_number,
+            models.Result.boat_country_code,
+            models.Result.position,
         )
-        db.flush()
-        normalize_race_results(db, race)
-        created_total += 1
+        .filter(models.Result.race_id.in_([int(r.id) for r in races]))
+        .all()
+    ):
+        keys = existing_keys.setdefault(int(race_id), set())
+        snn = _norm_sn(sn_raw)
+        if snn:
+            keys.add(_fleet_assignment_key(snn, cc_raw))
+        if pos is not None:
+            max_pos[int(race_id)] = max(max_pos.get(int(race_id), 0), int(pos))
 
-    return created_total
+    new_rows: List[models.Result] = []
+    touched: Dict[int, models.Race] = {}
+    for race in races:
+        group = wanted.get((int(race.regatta_id), _class_identity_key(race.class_name)))
+        if not group:
+            continue
+        if only_scored_races and int(race.id) not in existing_keys:
+            continue
 
+        keys = existing_keys.setdefault(int(race.id), set())
+        next_pos = max_pos.get(int(race.id), 0) + 1
+        ctx: Optional[Dict[str, Any]] = None
+        for entry in group:
+            sn_norm = _norm_sn(entry.sail_number)
+            entry_key = _fleet_assignment_key(sn_norm, getattr(entry, "boat_country_code", None))
+            if entry_key in keys:
+                continue
+            keys.add(entry_key)
+
+            if ctx is None:
+                ctx = _build_competitor_context_for_race(db, race)
+            pts = _auto_n_plus_one_points(ctx, sn_norm, getattr(entry, "boat_country_code", None))
+            skipper = f"{getattr(entry, 'first_name', '') or ''} {getattr(entry, 'last_name', '') or ''}".strip() or None
+
+            new_rows.append(
+                models.Result(
+                    regatta_id=int(race.regatta_id),
+                    race_id=int(race.id),
+                    sail_number=sn_norm,
+                    boat_country_code=getattr(entry, "boat_country_code", None),
+                    boat_name=getattr(entry, "boat_name", None),
+                    class_name=str(race.class_name or (entry.class_name or "").strip()),
+                    skipper_name=skipper,
+                    rating=getattr(entry, "rating", None),
+                    position=next_pos,
+                    points=float(pts),
+                    code="DNC",
+                    points_override=None,
+                )
+            )
+            next_pos += 1
+            touched[int(race.id)] = race
 
-def sync_entry_results_eligibility(db: Session, entry: models.Entry) -> int:
-    """
-    Sincroniza resultados com estado da entry:
-    - paid+confirmed: garante DNC nas races já pontuadas onde faltava.
-    - caso contrário: remove resultados dessa entry.
-    """
-    if entry_is_results_eligible(entry):
-        return add_entry_results_as_dnc(db, entry, only_scored_races=True)
-    return delete_results_for_entry(db, entry)
+    if new_rows:
+        db.add_all(new_rows)
+        db.flush()
+    return len(new_rows), touched
 
 
 # =========================================================
 # Handicap / Time Scoring helpers
 # =========================================================
 
-def _parse_time_to_seconds(s: Optional[str]) -> Optional[float]:
-    """Parse HH:MM:SS or H:MM:SS to total seconds. Returns None if invalid."""
-    if not s or not isinstance(s, str):
-        return None
-    # normalizar caracteres invisíveis (copiar/colar CSV/UI pode introduzir \u200b/\ufeff/\xa0)
-    normalized = (
-        (s or "")
-        .replace("\u200b", "")
-        .replace("\ufeff", "")
-        .replace("\xa0", " ")
-        .strip()
-    )
-    parts = normalized.split(":")
-    if len(parts) == 3:
-        try:
-            h, m, sec = int(parts[0]), int(parts[1]), float(parts[2])
-            if m < 0 or m >= 60 or sec < 0 or sec >= 60:
-                return None
-            return h * 3600 + m * 60 + sec
-        except (ValueError, IndexError):
-            return None
-    if len(parts) == 2:
-        try:
-            m, sec = int(parts[0]), float(parts[1])
-            if m < 0 or sec < 0 or sec >= 60:
-                return None
-            return m * 60 + sec
-        except (ValueError, IndexError):
-            return None
-    return None
-
-
-def _format_delta(seconds: float) -> str:
-    """Format seconds to HH:MM:SS (delta display). 1º = 00:00:00, sem décimos."""
-    if seconds < 0:
-        return "—"
-    total = int(round(seconds))
-    h = total // 3600
-    m = (total % 3600) // 60
-    s = total % 60
-    return f"{h:02d}:{m:02d}:{s:02d}"
+# parser / formatação partilhados com o motor de handicap em lote (app.scoring.handicap)
+_parse_time_to_seconds = parse_time_to_seconds
+_format_delta = format_delta
 
 
 def compute_handicap_ranking(
@@ -322,34 +444,17 @@ def compute_handicap_ranking(
         else:
             rankable.append((i, ct, code))
 
-    # Sort rankable by corrected time (None = DNF etc. go last)
-    rankable.sort(key=lambda x: (x[1] is None, x[1] if x[1] is not None else float("inf")))
-
-    best_corrected = None
-    for _, ct, _ in rankable:
-        if ct is not None:
-            best_corrected = ct
-            break
-
-    n_rankable = len(rankable)
+    # Rankable por corrected time (None = sem tempo, no fim), low-point com empates
+    ranking = rank_corrected_times([ct for _, ct, _ in rankable])
     result: List[Optional[Tuple[int, str, float]]] = [None] * len(items)
-
-    # Assign positions and points to rankable (low-point, ties share)
-    pos = 1
-    idx = 0
-    while idx < n_rankable:
-        ct = rankable[idx][1]
-        tie_count = 1
-        while idx + tie_count < n_rankable and rankable[idx + tie_count][1] == ct:
-            tie_count += 1
-        pts_sum = sum(pos + k for k in range(tie_count))
-        pts_avg = pts_sum / tie_count
-        delta_str = "00:00:00" if best_corrected is None else _format_delta((ct or 0) - best_corrected)
-        for k in range(tie_count):
-            orig_i = rankable[idx + k][0]
-            result[orig_i] = (pos, delta_str if ct is not None else "—", pts_avg)
-        pos += tie_count
-        idx += tie_count
+    for k, (orig_i, _ct, _code) in enumerate(rankable):
+        delta = ranking.deltas[k]
+        result[orig_i] = (
+            ranking.positions[k],
+            _format_delta(delta) if delta is not None else "—",
+            ranking.points[k],
+        )
+    pos = len(rankable) + 1
 
     # Non-rankable:
     # - códigos AUTO N+1 empatam na melhor posição dos não-rankeáveis
@@ -561,6 +666,17 @@ def get_scoring_maps(
 # =========================================================
 
 def _build_competitor_context_for_race(db: Session, race: models.Race) -> Dict[str, Any]:
+    """Contexto de competidores da race, em cache por (classe, fleet set, entries_version). Read-only."""
+    return competitor_cache.get_or_compute(
+        db,
+        int(race.regatta_id),
+        str(race.class_name or ""),
+        getattr(race, "fleet_set_id", None),
+        lambda: _compute_competitor_context_for_race(db, race),
+    )
+
+
+def _compute_competitor_context_for_race(db: Session, race: models.Race) -> Dict[str, Any]:
     """
     devolve:
       total_count: int
@@ -786,6 +902,164 @@ def compute_points_for_code(
     raise ValueError(f"Code {c} has no defined score")
 
 
+def apply_code_patch(
+    db: Session,
+    race: models.Race,
+    row: Any,
+    body: CodePatch,
+    scoring_map: Dict[str, float],
+    ctx: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Aplica um CodePatch a uma linha de resultado (in place, sem flush nem normalize).
+    Code vazio limpa code/flags/override. ValueError se o code/valor for inválido.
+    """
+    raw = (body.code or "").strip()
+    if raw == "":
+        # limpar code => re-rank por finish_position (One Design) ou tempo (Handicap)
+        row.code = None
+        if hasattr(row, "code_shifts_places"):
+            row.code_shifts_places = False
+        if hasattr(row, "code_discardable"):
+            row.code_discardable = None
+        if hasattr(row, "points_override"):
+            row.points_override = None
+        return
+
+    code = _norm(raw)
+    effective_points_arg = body.prp_percent if body.prp_percent is not None else body.points
+    base_points = prp_scored_base_points(row) if is_prp_code(code) else None
+
+    pts = compute_points_for_code(
+        db=db,
+        race=race,
+        sail_number=row.sail_number,
+        code=code,
+        manual_points=effective_points_arg,
+        scoring_map=scoring_map,
+        ctx=ctx,
+        boat_country_code=getattr(row, "boat_country_code", None),
+        base_points=base_points,
+    )
+
+    row.code = code
+    row.points = float(pts)
+
+    # ✅ ao definir um code, normalmente queremos “voltar ao normal” (sem override manual)
+    if hasattr(row, "points_override"):
+        row.points_override = None
+
+    if hasattr(row, "code_shifts_places"):
+        if body.shifts_places_behind is not None:
+            row.code_shifts_places = bool(body.shifts_places_behind)
+        elif code in AUTO_N_PLUS_ONE_CODES or is_prp_code(code) or is_adjustable(code):
+            row.code_shifts_places = False
+        # custom sem flag explícito: mantém valor anterior ou False
+
+    if hasattr(row, "code_discardable"):
+        if body.discardable is not None:
+            row.code_discardable = bool(body.discardable)
+        elif code in AUTO_N_PLUS_ONE_CODES or is_prp_code(code) or is_adjustable(code):
+            row.code_discardable = None
+        # custom sem flag explícita: mantém valor anterior ou None
+
+    if result_removes_from_ranking(row):
+        capture_finish_position_before_unrank(row)
+        row.position = UNRANKED_POSITION
+
+
+# =========================================================
+# Mutações em memória (batch de edições / what-if)
+# =========================================================
+
+class ResultMutation(BaseModel):
+    """
+    Uma alteração a um resultado existente. Pela ordem:
+    position (mover na ordem de chegada) -> code -> points_override.
+    code: None = não mexe; "" = limpa o code (como PATCH /{id}/code).
+    """
+    result_id: int
+    position: Optional[int] = Field(default=None, ge=1)
+    code: Optional[str] = None
+    points: Optional[float] = Field(default=None, ge=0)
+    prp_percent: Optional[float] = Field(default=None, ge=0)
+    shifts_places_behind: Optional[bool] = None
+    discardable: Optional[bool] = None
+    points_override: Optional[float] = Field(default=None, ge=0)
+    clear_points_override: bool = False
+
+
+def move_result_position(race_rows: List[Any], row: Any, new_pos: int) -> None:
+    """Equivalente em memória de PATCH /{id}/position (position + finish_position)."""
+    if result_removes_from_ranking(row):
+        raise ValueError("This result cannot be moved (status code is outside the ranking).")
+
+    old_pos = int(row.position)
+    new_pos = min(max(1, int(new_pos)), max(int(r.position) for r in race_rows))
+    if new_pos == old_pos:
+        return
+
+    for other in race_rows:
+        if other is row:
+            continue
+        if new_pos < old_pos:
+            if new_pos <= other.position < old_pos:
+                other.position += 1
+            if other.finish_position is not None and new_pos <= other.finish_position < old_pos:
+                other.finish_position += 1
+        else:
+            if old_pos < other.position <= new_pos:
+                other.position -= 1
+            if other.finish_position is not None and old_pos < other.finish_position <= new_pos:
+                other.finish_position -= 1
+
+    row.position = new_pos
+    row.finish_position = new_pos
+
+
+def apply_result_mutation(
+    db: Session,
+    race: Any,
+    race_rows: List[Any],
+    row: Any,
+    m: ResultMutation,
+    scoring_map: Dict[str, float],
+    ctx: Dict[str, Any],
+    is_handicap: bool,
+) -> None:
+    """
+    Aplica uma ResultMutation às linhas (em memória) de UMA race, com as mesmas regras
+    das routes de results_item. Cada passo renormaliza as linhas em memória, como a
+    sequência equivalente de PATCHs faria. ValueError se a mutação não for válida.
+    """
+    if m.position is not None:
+        move_result_position(race_rows, row, m.position)
+        normalize_result_rows(race_rows, race, scoring_map, ctx, is_handicap=is_handicap)
+
+    if m.code is not None:
+        patch = CodePatch(
+            code=m.code,
+            points=m.points,
+            prp_percent=m.prp_percent,
+            shifts_places_behind=m.shifts_places_behind,
+            discardable=m.discardable,
+        )
+        apply_code_patch(db, race, row, patch, scoring_map, ctx)
+        normalize_result_rows(race_rows, race, scoring_map, ctx, is_handicap=is_handicap)
+
+    if m.clear_points_override:
+        row.points_override = None
+        normalize_result_rows(race_rows, race, scoring_map, ctx, is_handicap=is_handicap)
+    elif m.points_override is not None:
+        if result_removes_from_ranking(row):
+            raise ValueError(
+                "This result is outside the ranking (DNF/DNC/etc.). Points override is not applied here."
+            )
+        row.points_override = float(m.points_override)
+        row.points = float(m.points_override)
+        normalize_result_rows(race_rows, race, scoring_map, ctx, is_handicap=is_handicap)
+
+
 # =========================================================
 # FILL: missing => DNC
 # =========================================================
@@ -866,6 +1140,14 @@ def ensure_missing_results_as_dnc(
 # NORMALIZE: compact + points + overrides
 # =========================================================
 
+def _result_corrected_seconds(row: Any) -> Optional[float]:
+    """corrected_seconds gravado (mantido no flush); sem ele, parse do corrected_time."""
+    secs = getattr(row, "corrected_seconds", None)
+    if secs is not None:
+        return float(secs)
+    return _parse_time_to_seconds(getattr(row, "corrected_time", None))
+
+
 def _normalize_group(rows, scoring_map, ctx, *, is_handicap: bool = False):
     ranked = [r for r in rows if not result_removes_from_ranking(r)]
     unranked = [r for r in rows if result_removes_from_ranking(r)]
@@ -873,48 +1155,27 @@ def _normalize_group(rows, scoring_map, ctx, *, is_handicap: bool = False):
     pos = 1
     if is_handicap:
         # Handicap: manter empates por corrected_time com low-point (média dos pontos empatados).
-        ranked.sort(
-            key=lambda r: (
-                _parse_time_to_seconds(getattr(r, "corrected_time", None)) is None,
-                _parse_time_to_seconds(getattr(r, "corrected_time", None))
-                if _parse_time_to_seconds(getattr(r, "corrected_time", None)) is not None
-                else float("inf"),
-                int(r.id),
-            )
+        ranking = rank_corrected_times(
+            [_result_corrected_seconds(r) for r in ranked],
+            [int(r.id) for r in ranked],
         )
+        for k in ranking.order:
+            r = ranked[k]
+            r.position = ranking.positions[k]
+            c = _norm(getattr(r, "code", None))
+            po = getattr(r, "points_override", None)
 
-        i = 0
-        n_ranked = len(ranked)
-        while i < n_ranked:
-            base_ct = _parse_time_to_seconds(getattr(ranked[i], "corrected_time", None))
-            tie_count = 1
-            while i + tie_count < n_ranked:
-                nxt_ct = _parse_time_to_seconds(getattr(ranked[i + tie_count], "corrected_time", None))
-                if nxt_ct != base_ct:
-                    break
-                tie_count += 1
-
-            pts_avg = sum(pos + k for k in range(tie_count)) / tie_count
-
-            for k in range(tie_count):
-                r = ranked[i + k]
-                r.position = pos
-                c = _norm(getattr(r, "code", None))
-                po = getattr(r, "points_override", None)
-
-                if po is not None:
-                    r.points = float(po)
+            if po is not None:
+                r.points = float(po)
+            else:
+                if not c:
+                    r.points = float(ranking.points[k])
+                elif c in ADJUSTABLE_CODES:
+                    # RDG/SCP/ZPF/DPI já guardam em r.points
+                    r.points = float(r.points)
                 else:
-                    if not c:
-                        r.points = float(pts_avg)
-                    elif c in ADJUSTABLE_CODES:
-                        # RDG/SCP/ZPF/DPI já guardam em r.points
-                        r.points = float(r.points)
-                    else:
-                        r.points = float(scoring_map.get(c, r.points))
-
-            pos += tie_count
-            i += tie_count
+                    r.points = float(scoring_map.get(c, r.points))
+        pos += len(ranked)
     else:
         # One Design: ranked ordenados por finish_position (ordem de chegada)
         ranked.sort(key=finish_order_sort_key)
@@ -970,10 +1231,7 @@ def _normalize_group(rows, scoring_map, ctx, *, is_handicap: bool = False):
         pos += 1
 
 
-def normalize_race_results(db: Session, race: models.Race) -> None:
-    scoring_map = get_scoring_map(db, int(race.regatta_id), str(race.class_name or ""))
-    ctx = _build_competitor_context_for_race(db, race)
-
+def race_class_is_handicap(db: Session, race: Any) -> bool:
     regatta_class = (
         db.query(models.RegattaClass)
         .filter(
@@ -982,14 +1240,156 @@ def normalize_race_results(db: Session, race: models.Race) -> None:
         )
         .first()
     )
-    is_handicap = bool(regatta_class and (regatta_class.class_type or "").lower() == "handicap")
-
+    return bool(regatta_class and (regatta_class.class_type or "").lower() == "handicap")
+
+
+@dataclass(slots=True)
+class PlainResult:
+    """Cópia mutável de um Result (atributos que o normalize, as mutações e o overall leem)."""
+    id: int
+    race_id: int
+    class_name: Optional[str]
+    sail_number: Optional[str]
+    boat_country_code: Optional[str]
+    boat_name: Optional[str]
+    skipper_name: Optional[str]
+    position: int
+    finish_position: Optional[int]
+    points: float
+    code: Optional[str]
+    code_shifts_places: bool
+    code_discardable: Optional[bool]
+    points_override: Optional[float]
+    finish_time: Optional[str]
+    elapsed_time: Optional[str]
+    corrected_time: Optional[str]
+    delta: Optional[str]
+    corrected_seconds: Optional[float]
+
+
+PLAIN_RESULT_COLUMNS = [getattr(models.Result, f.name) for f in dc_fields(PlainResult)]
+# colunas que o normalize escreve / que as mutações (código, posição, override) podem mudar
+NORMALIZE_WRITTEN_COLUMNS = ("position", "points", "finish_position")
+MUTATION_WRITTEN_COLUMNS = NORMALIZE_WRITTEN_COLUMNS + (
+    "code", "code_shifts_places", "code_discardable", "points_override",
+)
+
+
+def load_plain_results(db: Session, race_ids: List[int]) -> Dict[int, List[PlainResult]]:
+    """Linhas das races como PlainResult, por race, na ordem do normalize (position, id)."""
+    by_race: Dict[int, List[PlainResult]] = {int(rid): [] for rid in race_ids}
     rows = (
-        db.query(models.Result)
-        .filter(models.Result.race_id == int(race.id))
+        db.query(*PLAIN_RESULT_COLUMNS)
+        .filter(models.Result.race_id.in_(list(by_race)))
         .order_by(models.Result.position.asc(), models.Result.id.asc())
         .all()
     )
+    for r in rows:
+        plain = PlainResult(*r)
+        plain.code_shifts_places = bool(plain.code_shifts_places)
+        by_race[int(plain.race_id)].append(plain)
+    return by_race
+
+
+def result_column_values(rows: List[Any], columns: Tuple[str, ...]) -> Dict[int, Tuple[Any, ...]]:
+    return {int(r.id): tuple(getattr(r, c) for c in columns) for r in rows}
+
+
+def normalize_race_results(db: Session, race: models.Race) -> None:
+    """
+    Recalcula position/points (e finish_position em falta) de todas as linhas da race:
+    lê só colunas, calcula em Python e grava as linhas que mudaram num único UPDATE
+    executemany por id.
+    """
+    # standings novos só nesta race -> o overall em cache é atualizado incrementalmente
+    mark_results_changed(db, race.regatta_id, race_id=race.id)
+    scoring_map = get_scoring_map(db, int(race.regatta_id), str(race.class_name or ""))
+    ctx = _build_competitor_context_for_race(db, race)
+    is_handicap = race_class_is_handicap(db, race)
+
+    # a sessão não faz autoflush: alterações pendentes (ex.: code acabado de mudar)
+    # têm de estar na DB antes de lermos as colunas
+    db.flush()
+    plain = load_plain_results(db, [int(race.id)])[int(race.id)]
+    before = result_column_values(plain, NORMALIZE_WRITTEN_COLUMNS)
+    normalize_result_rows(plain, race, scoring_map, ctx, is_handicap=is_handicap)
+    write_result_columns(db, plain, before, NORMALIZE_WRITTEN_COLUMNS)
+
+
+def write_result_columns(
+    db: Session,
+    rows: List[Any],
+    before: Dict[int, Tuple[Any, ...]],
+    columns: Tuple[str, ...],
+) -> int:
+    """
+    Grava `columns` das linhas que mudaram face a `before` (ver `result_column_values`)
+    num só UPDATE por primary key (executemany). Objetos Result já carregados na sessão
+    recebem os mesmos valores como "committed" (não ficam stale nem voltam a dar UPDATE).
+    Devolve o nº de linhas gravadas.
+    """
+    changed: List[Dict[str, Any]] = []
+    for r in rows:
+        values = tuple(getattr(r, c) for c in columns)
+        if before.get(int(r.id)) == values:
+            continue
+        params = dict(zip(columns, values))
+        params["id"] = int(r.id)
+        changed.append(params)
+    if not changed:
+        return 0
+
+    db.execute(update(models.Result), changed)
+
+    for params in changed:
+        obj = db.identity_map.get(identity_key(models.Result, params["id"]))
+        if obj is None:
+            continue
+        for attr in columns:
+            set_committed_value(obj, attr, params[attr])
+    return len(changed)
+
+
+# tempos HH:MM:SS e a coluna em segundos que o listener do modelo mantém
+_TIME_SECONDS_COLUMNS = (
+    ("finish_time", "finish_seconds"),
+    ("elapsed_time", "elapsed_seconds"),
+    ("corrected_time", "corrected_seconds"),
+)
+
+
+def insert_result_rows(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insere as linhas (dicts de colunas de Result, todas com as mesmas chaves) num só
+    INSERT executemany, sem objetos ORM. O insert Core não passa pelos listeners do
+    modelo: identity_key e *_seconds são preenchidos aqui com as mesmas funções.
+    Não marca caches: quem insere normaliza a race a seguir (normalize_race_results).
+    """
+    if not rows:
+        return 0
+    for row in rows:
+        row["identity_key"] = competitor_identity_key(
+            row.get("class_name"), row.get("sail_number"), row.get("boat_country_code")
+        )
+        for time_col, seconds_col in _TIME_SECONDS_COLUMNS:
+            if time_col in row:
+                row[seconds_col] = parse_time_to_seconds(row[time_col])
+    db.execute(insert(models.Result), rows)
+    return len(rows)
+
+
+def normalize_result_rows(
+    rows: List[Any],
+    race: Any,
+    scoring_map: Dict[str, float],
+    ctx: Dict[str, Any],
+    *,
+    is_handicap: bool = False,
+) -> None:
+    """
+    Parte pura do normalize: recalcula position/points das linhas de UMA race, in place.
+    Só usa atributos (serve para objetos ORM e para cópias em memória, ex.: what-if).
+    """
     if not rows:
         return
 
@@ -1006,7 +1406,7 @@ def normalize_race_results(db: Session, race: models.Race) -> None:
     # Com fleet set: pontos e posições são independentes por frota (cada uma 1,2,3…).
     if getattr(race, "fleet_set_id", None):
         sn_to_fid = ctx["sn_to_fleet_id"]
-        by_fleet: Dict[Optional[int], List[models.Result]] = {}
+        by_fleet: Dict[Optional[int], List[Any]] = {}
 
         for r in rows:
             fk = _fleet_assignment_key(
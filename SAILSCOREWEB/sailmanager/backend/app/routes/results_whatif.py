@@ -0,0 +1,222 @@
+# app/routes/results_whatif.py
+"""
+Simulador "what-if" do overall para decisões do júri (RDG, DSQ, overrides...).
+
+Aplica mutações hipotéticas a resultados EM MEMÓRIA e devolve os standings
+resultantes + as diferenças de classificação, sem escrever nada na DB nem
+invalidar caches.
+
+- As mutações seguem as mesmas regras das routes de escrita (`apply_result_mutation`,
+  partilhado com o batch de edições) e cada race tocada é renormalizada com
+  `normalize_result_rows` (a mesma parte pura do `normalize_race_results`).
+- O overall parte do estado em cache da classe: só as colunas das races tocadas
+  são trocadas (`_replace_race_columns`, como no refresh incremental), por isso o
+  custo é proporcional às races mexidas e não à regata inteira.
+"""
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import get_db
+from app.org_scope import assert_staff_regatta_access
+from app.routes.results_overall import (
+    OverallState,
+    _load_overall_context,
+    _query_race_results,
+    _replace_race_columns,
+    _sc_key,
+    _state_from_results,
+    get_overall_state_cached,
+    parse_overall_view,
+)
+from app.routes.results_utils import (
+    ResultMutation,
+    _build_competitor_context_for_race,
+    apply_result_mutation,
+    get_scoring_map,
+    load_plain_results,
+    race_class_is_handicap,
+)
+from utils.auth_utils import get_current_user
+
+router = APIRouter()
+
+MAX_WHATIF_MUTATIONS = 200
+
+# campos que o diff de standings precisa, mesmo com `fields` a projetar menos
+_DIFF_FIELDS = frozenset({
+    "overall_rank", "sail_number", "boat_country_code", "class_name",
+    "skipper_name", "total_points", "net_points",
+})
+
+
+# as mesmas mutações do batch de edições (POST /races/{race_id}/batch)
+WhatIfMutation = ResultMutation
+
+
+class WhatIfBody(BaseModel):
+    class_name: str
+    public: bool = False
+    view: str = "full"
+    fields: Optional[str] = None
+    mutations: List[WhatIfMutation] = Field(..., min_length=1, max_length=MAX_WHATIF_MUTATIONS)
+
+
+# =====================================================================
+# Diferenças de classificação
+# =====================================================================
+def _row_identity(row: Dict[str, Any]) -> Tuple[str, str]:
+    return (str(row.get("class_name") or ""), _sc_key(row.get("sail_number"), row.get("boat_country_code")))
+
+
+def _rank_changes(before: List[Dict[str, Any]], after: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Barcos cujo rank ou pontos mudaram. rank_delta > 0 = ganhou lugares."""
+    before_by_key = {_row_identity(r): r for r in before}
+    after_by_key = {_row_identity(r): r for r in after}
+
+    changes: List[Dict[str, Any]] = []
+    for key in list(after_by_key) + [k for k in before_by_key if k not in after_by_key]:
+        b = before_by_key.get(key)
+        a = after_by_key.get(key)
+        rank_before = b.get("overall_rank") if b else None
+        rank_after = a.get("overall_rank") if a else None
+        net_before = b.get("net_points") if b else None
+        net_after = a.get("net_points") if a else None
+        total_before = b.get("total_points") if b else None
+        total_after = a.get("total_points") if a else None
+        if (rank_before, net_before, total_before) == (rank_after, net_after, total_after):
+            continue
+        ref = a or b
+        changes.append({
+            "sail_number": ref.get("sail_number"),
+            "boat_country_code": ref.get("boat_country_code"),
+            "class_name": ref.get("class_name"),
+            "skipper_name": ref.get("skipper_name"),
+            "rank_before": rank_before,
+            "rank_after": rank_after,
+            "rank_delta": (
+                rank_before - rank_after
+                if rank_before is not None and rank_after is not None
+                else None
+            ),
+            "net_points_before": net_before,
+            "net_points_after": net_after,
+            "total_points_before": total_before,
+            "total_points_after": total_after,
+        })
+    changes.sort(key=lambda c: (c["rank_after"] is None, c["rank_after"] or 0, c["rank_before"] or 0))
+    return changes
+
+
+# =====================================================================
+# Simulação
+# =====================================================================
+def simulate_overall(
+    db: Session,
+    regatta_id: int,
+    body: WhatIfBody,
+) -> Dict[str, Any]:
+    """Standings da classe com as mutações aplicadas (nada é escrito na DB)."""
+    view = parse_overall_view(body.view, body.fields)
+    if view.fields is not None:
+        view = replace(view, fields=frozenset(view.fields) | _DIFF_FIELDS)
+    class_name = body.class_name
+    base: OverallState = get_overall_state_cached(regatta_id, class_name, body.public, db, view)
+
+    result_ids = sorted({m.result_id for m in body.mutations})
+    targets = {
+        int(rid): (int(race_id), rclass)
+        for rid, race_id, rclass in db.query(
+            models.Result.id, models.Result.race_id, models.Result.class_name
+        )
+        .filter(models.Result.id.in_(result_ids), models.Result.regatta_id == regatta_id)
+        .all()
+    }
+    missing = [rid for rid in result_ids if rid not in targets]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Result not found: {missing[0]}")
+
+    ctx = base.ctx or _load_overall_context(db, regatta_id, class_name, body.public)
+    standing_races = set(ctx.race_ids) if ctx else set()
+    for rid, (race_id, rclass) in targets.items():
+        if rclass != class_name or race_id not in standing_races:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Result {rid} is not part of the {class_name} standings.",
+            )
+
+    race_ids = sorted({race_id for race_id, _ in targets.values()})
+    races = {
+        int(r.id): r for r in db.query(models.Race).filter(models.Race.id.in_(race_ids)).all()
+    }
+    sim_by_race = load_plain_results(db, race_ids)
+    sim_by_id = {r.id: r for rows in sim_by_race.values() for r in rows}
+
+    # contexto de scoring: 1x por classe / race (como o normalize_race_results)
+    any_race = races[race_ids[0]]
+    scoring_map = get_scoring_map(db, int(regatta_id), str(class_name or ""))
+    is_handicap = race_class_is_handicap(db, any_race)
+    comp_ctx = {rid: _build_competitor_context_for_race(db, races[rid]) for rid in race_ids}
+
+    for m in body.mutations:
+        row = sim_by_id[m.result_id]
+        race_id = int(row.race_id)
+        try:
+            apply_result_mutation(
+                db, races[race_id], sim_by_race[race_id], row, m,
+                scoring_map, comp_ctx[race_id], is_handicap,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Result {m.result_id}: {e}")
+
+    fresh_rows = sorted((r for rows in sim_by_race.values() for r in rows), key=lambda r: r.id)
+    state: Optional[OverallState] = None
+    if base.ctx is not None:
+        state = _replace_race_columns(base, base.ctx, race_ids, fresh_rows)
+    if state is None:
+        # sem matriz em cache (ou ficou vazia): cálculo completo com as linhas simuladas
+        touched = set(race_ids)
+        others = [r for r in _query_race_results(db, ctx, ctx.race_ids) if int(r.race_id) not in touched]
+        state = _state_from_results(ctx, sorted(others + fresh_rows, key=lambda r: r.id), view)
+
+    payload = dict(state.payload)
+    payload["changes"] = _rank_changes(base.payload.get("rows", []), state.payload.get("rows", []))
+    payload["mutated_results"] = [
+        {
+            "result_id": r.id,
+            "race_id": r.race_id,
+            "sail_number": r.sail_number,
+            "boat_country_code": r.boat_country_code,
+            "position": r.position,
+            "points": r.points,
+            "code": r.code,
+            "points_override": r.points_override,
+        }
+        for r in (sim_by_id[rid] for rid in result_ids)
+    ]
+    return payload
+
+
+@router.post("/overall/{regatta_id}/what-if")
+def simulate_overall_what_if(
+    regatta_id: int,
+    body: WhatIfBody,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Standings hipotéticos (payload igual ao de /overall/{regatta_id}) + `changes`
+    (diferenças de rank/pontos face aos standings atuais) + `mutated_results`.
+    Não escreve na DB: os standings públicos não mudam.
+    """
+    if current_user.role not in ("admin", "platform_admin", "scorer", "jury"):
+        raise HTTPException(status_code=403, detail="Access denied")
+    assert_staff_regatta_access(db, current_user, regatta_id)
+
+    return simulate_overall(db, regatta_id, body)
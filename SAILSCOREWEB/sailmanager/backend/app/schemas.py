@@ -768,6 +768,19 @@ class EntryImportConfirmResponse(BaseModel):
     created_entry_ids: List[int] = []
 
 
+class EntryBulkStatusRequest(BaseModel):
+    regatta_id: int
+    entry_ids: List[int] = Field(..., min_length=1, max_length=2000)
+    paid: Optional[bool] = None
+    confirmed: Optional[bool] = None
+
+
+class EntryBulkStatusResponse(BaseModel):
+    updated: int
+    results_created: int
+    results_deleted: int
+
+
 # =========================
 # RACES
 # =========================
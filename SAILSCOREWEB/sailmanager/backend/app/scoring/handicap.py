@@ -0,0 +1,191 @@
+# app/scoring/handicap.py
+"""
+Motor de handicap (time scoring) em lote: tempos, tempo corrigido e ranking.
+
+- `parse_time_to_seconds` é o parser único dos tempos "HH:MM:SS" (também o dos
+  listeners que mantêm `results.*_seconds`).
+- `correct_elapsed_times`: corrected = round(rating × elapsed) para anc/orc, como
+  no editor de time scoring (arredondamento half-up do Math.round).
+- `rank_corrected_times`: posição, pontos low-point (empates partilham a média) e
+  delta para o melhor tempo, para uma race inteira de uma vez.
+
+Com NumPy (ver `kernel_enabled`; a partir de HANDICAP_KERNEL_MIN_BOATS linhas) os
+cálculos são vetorizados; senão usa-se o caminho Python. O resultado tem de ser IGUAL
+nos dois caminhos: ordenação estável com o mesmo desempate, empates por igualdade
+exata do tempo, tempos em falta no fim.
+"""
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from app.scoring.matrix_kernel import SCORING_KERNEL, kernel_enabled
+
+try:
+    import numpy as np
+except ImportError:  # dependência opcional
+    np = None
+
+# uma race tem menos linhas que a matriz do overall: abaixo disto o Python ganha
+HANDICAP_KERNEL_MIN_BOATS = int(os.getenv("HANDICAP_KERNEL_MIN_BOATS", "48"))
+
+
+def _use_numpy(n: int) -> bool:
+    return kernel_enabled() and (SCORING_KERNEL == "numpy" or n >= HANDICAP_KERNEL_MIN_BOATS)
+
+
+def parse_time_to_seconds(s: Optional[str]) -> Optional[float]:
+    """Parse HH:MM:SS or H:MM:SS to total seconds. Returns None if invalid."""
+    if not s or not isinstance(s, str):
+        return None
+    # normalizar caracteres invisíveis (copiar/colar CSV/UI pode introduzir \u200b/\ufeff/\xa0)
+    normalized = (
+        (s or "")
+        .replace("\u200b", "")
+        .replace("\ufeff", "")
+        .replace("\xa0", " ")
+        .strip()
+    )
+    parts = normalized.split(":")
+    if len(parts) == 3:
+        try:
+            h, m, sec = int(parts[0]), int(parts[1]), float(parts[2])
+            if m < 0 or m >= 60 or sec < 0 or sec >= 60:
+                return None
+            return h * 3600 + m * 60 + sec
+        except (ValueError, IndexError):
+            return None
+    if len(parts) == 2:
+        try:
+            m, sec = int(parts[0]), float(parts[1])
+            if m < 0 or sec < 0 or sec >= 60:
+                return None
+            return m * 60 + sec
+        except (ValueError, IndexError):
+            return None
+    return None
+
+
+def format_hms(seconds: float) -> str:
+    """Segundos -> HH:MM:SS (arredondado ao segundo; horas podem passar de 24)."""
+    total = int(round(seconds))
+    return f"{total // 3600:02d}:{(total % 3600) // 60:02d}:{total % 60:02d}"
+
+
+def format_delta(seconds: float) -> str:
+    """Format seconds to HH:MM:SS (delta display). 1º = 00:00:00, sem décimos."""
+    if seconds < 0:
+        return "—"
+    return format_hms(seconds)
+
+
+# ============================================================
+# Tempo corrigido
+# ============================================================
+def correct_elapsed_times(
+    elapsed: Sequence[Optional[float]],
+    ratings: Sequence[Optional[float]],
+) -> List[Optional[float]]:
+    """round(rating × elapsed) por barco (None se faltar um dos dois)."""
+    n = len(elapsed)
+    if _use_numpy(n):
+        e = np.array([x if x is not None else np.nan for x in elapsed], dtype=np.float64)
+        r = np.array([x if x is not None else np.nan for x in ratings], dtype=np.float64)
+        ok = ~(np.isnan(e) | np.isnan(r))
+        corrected = np.floor(np.where(ok, e * r, 0.0) + 0.5)
+        return [float(c) if k else None for c, k in zip(corrected.tolist(), ok.tolist())]
+    return [
+        float(math.floor(e * r + 0.5)) if e is not None and r is not None else None
+        for e, r in zip(elapsed, ratings)
+    ]
+
+
+# ============================================================
+# Ranking
+# ============================================================
+@dataclass(frozen=True)
+class HandicapRanking:
+    """Por índice de entrada: posição, pontos (média dos empatados) e delta em segundos."""
+    order: List[int]
+    positions: List[int]
+    points: List[float]
+    deltas: List[Optional[float]]
+
+
+def rank_corrected_times(
+    corrected: Sequence[Optional[float]],
+    tiebreak: Optional[Sequence[int]] = None,
+) -> HandicapRanking:
+    """
+    Ordena por tempo corrigido (None no fim; desempate por `tiebreak`, ou pela ordem de
+    entrada) e atribui posições a partir de 1. Tempos iguais (e os sem tempo, entre si)
+    empatam: a mesma posição e a média dos pontos low-point do bloco.
+    """
+    n = len(corrected)
+    tb = list(tiebreak) if tiebreak is not None else list(range(n))
+    if n and _use_numpy(n):
+        return _rank_numpy(corrected, tb)
+    return _rank_python(corrected, tb)
+
+
+def _rank_python(corrected: Sequence[Optional[float]], tb: List[int]) -> HandicapRanking:
+    n = len(corrected)
+    order = sorted(
+        range(n),
+        key=lambda i: (corrected[i] is None, corrected[i] if corrected[i] is not None else math.inf, tb[i]),
+    )
+    best = corrected[order[0]] if n else None
+    positions = [0] * n
+    points = [0.0] * n
+    deltas: List[Optional[float]] = [None] * n
+
+    k = 0
+    while k < n:
+        ct = corrected[order[k]]
+        tie = 1
+        while k + tie < n and corrected[order[k + tie]] == ct:
+            tie += 1
+        pos = k + 1
+        for i in order[k : k + tie]:
+            positions[i] = pos
+            points[i] = pos + (tie - 1) / 2
+            deltas[i] = ct - best if ct is not None and best is not None else None
+        k += tie
+    return HandicapRanking(order=order, positions=positions, points=points, deltas=deltas)
+
+
+def _rank_numpy(corrected: Sequence[Optional[float]], tb: List[int]) -> HandicapRanking:
+    n = len(corrected)
+    missing = np.array([c is None for c in corrected], dtype=bool)
+    ct = np.array([c if c is not None else np.inf for c in corrected], dtype=np.float64)
+    order = np.lexsort((np.array(tb), ct, missing))
+
+    s_ct = ct[order]
+    s_missing = missing[order]
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = (s_ct[1:] != s_ct[:-1]) | (s_missing[1:] != s_missing[:-1])
+    starts = np.flatnonzero(new_group)
+    sizes = np.diff(np.append(starts, n))
+    group = np.cumsum(new_group) - 1
+
+    s_pos = starts[group] + 1
+    s_pts = s_pos + (sizes[group] - 1) / 2
+
+    positions = np.empty(n, dtype=np.int64)
+    points = np.empty(n, dtype=np.float64)
+    positions[order] = s_pos
+    points[order] = s_pts
+
+    if s_missing[0]:
+        deltas: List[Optional[float]] = [None] * n
+    else:
+        d = ct - s_ct[0]
+        deltas = [None if m else float(x) for x, m in zip(d.tolist(), missing.tolist())]
+    return HandicapRanking(
+        order=order.tolist(),
+        positions=positions.tolist(),
+        points=points.tolist(),
+        deltas=deltas,
+    )
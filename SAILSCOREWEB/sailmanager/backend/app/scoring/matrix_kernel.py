@@ -0,0 +1,125 @@
+# app/scoring/matrix_kernel.py
+"""
+Kernel vetorizado (NumPy) para o overall: totais, discards e chaves A8 em bloco.
+
+Opcional: se o NumPy não estiver instalado (ou SCORING_KERNEL=python), o overall
+usa o caminho Python de sempre. O resultado tem de ser IGUAL ao do caminho Python:
+- somas sequenciais pela ordem das races (cumsum), não a soma pairwise do np.sum;
+- discards por argsort estável (empates -> race mais antiga primeiro, como o sort Python);
+- races sem resultado contam BIG_F nas chaves A8.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.scoring.tiebreakers import BIG_F
+
+try:
+    import numpy as np
+except ImportError:  # dependência opcional
+    np = None
+
+# auto (usa NumPy se existir) | numpy | python
+SCORING_KERNEL = os.getenv("SCORING_KERNEL", "auto").strip().lower()
+# abaixo disto o custo de montar arrays não compensa
+SCORING_KERNEL_MIN_BOATS = int(os.getenv("SCORING_KERNEL_MIN_BOATS", "16"))
+
+
+@dataclass(frozen=True)
+class MatrixScore:
+    total_points: float
+    net_points: float
+    discarded_ids: frozenset
+    a8_signature: Tuple[float, ...]
+    a8_last_race: Tuple[float, ...]
+
+
+def kernel_enabled(n_boats: Optional[int] = None) -> bool:
+    if np is None or SCORING_KERNEL == "python":
+        return False
+    if SCORING_KERNEL == "numpy":
+        return True
+    return n_boats is None or n_boats >= SCORING_KERNEL_MIN_BOATS
+
+
+def score_matrix(
+    keys: List[Hashable],
+    per_race_map: Dict[Hashable, Dict[int, Dict[str, Any]]],
+    race_ids: List[int],
+    ordered_race_ids: List[int],
+    discard_count: int,
+    non_discardable_race_ids: set[int],
+    is_discardable_cell: Callable[[Dict[str, Any]], bool],
+) -> Dict[Hashable, MatrixScore]:
+    """
+    Calcula, para os barcos `keys` (todos da mesma classe):
+      - total (todas as `race_ids` com resultado),
+      - discards (os `discard_count` piores entre as `ordered_race_ids` descartáveis),
+      - net,
+      - assinatura A8.1 e chave A8.2 (sobre `ordered_race_ids`).
+    """
+    if np is None:
+        raise RuntimeError("NumPy não está disponível para o scoring kernel")
+
+    n, m = len(keys), len(race_ids)
+    col_of = {rid: j for j, rid in enumerate(race_ids)}
+    cls_cols = np.array([col_of[rid] for rid in ordered_race_ids if rid in col_of], dtype=np.intp)
+
+    points = np.zeros((n, m), dtype=np.float64)
+    present = np.zeros((n, m), dtype=bool)
+    code_ok = np.zeros((n, m), dtype=bool)
+    for i, key in enumerate(keys):
+        per = per_race_map.get(key, {})
+        for rid, cell in per.items():
+            j = col_of.get(rid)
+            if j is None:
+                continue
+            points[i, j] = float(cell["points"])
+            present[i, j] = True
+            code_ok[i, j] = bool(is_discardable_cell(cell))
+
+    race_ok = np.array([rid not in non_discardable_race_ids for rid in race_ids], dtype=bool)
+    in_class = np.zeros(m, dtype=bool)
+    in_class[cls_cols] = True
+
+    # ---- discards: D piores candidatos, empates pela ordem das races ----
+    discarded = np.zeros((n, m), dtype=bool)
+    D = int(discard_count or 0)
+    if D > 0 and m:
+        candidate = present & code_ok & race_ok & in_class
+        # só colunas da classe, pela ordem da classe (= ordem das candidatas no caminho Python)
+        cand_pts = np.where(candidate[:, cls_cols], points[:, cls_cols], -np.inf)
+        order = np.argsort(-cand_pts, axis=1, kind="stable")[:, :D]
+        n_cand = candidate[:, cls_cols].sum(axis=1)
+        take = np.minimum(n_cand, D)
+        rows_idx = np.repeat(np.arange(n), order.shape[1])
+        picked = order.ravel()
+        keep = np.tile(np.arange(order.shape[1]), n) < np.repeat(take, order.shape[1])
+        discarded[rows_idx[keep], cls_cols[picked[keep]]] = True
+
+    # ---- totais: soma sequencial (bit a bit igual ao += do Python) ----
+    if m:
+        total = np.cumsum(np.where(present, points, 0.0), axis=1)[:, -1]
+        net = np.cumsum(np.where(present & ~discarded, points, 0.0), axis=1)[:, -1]
+    else:
+        total = np.zeros(n)
+        net = np.zeros(n)
+
+    # ---- A8 ----
+    a8_pts = np.where(present[:, cls_cols], points[:, cls_cols], float(BIG_F))
+    a8_sig = np.sort(a8_pts, axis=1)
+    a8_last = a8_pts[:, ::-1]
+
+    rid_arr = np.array(race_ids)
+    out: Dict[Hashable, MatrixScore] = {}
+    for i, key in enumerate(keys):
+        out[key] = MatrixScore(
+            total_points=float(total[i]),
+            net_points=float(net[i]),
+            discarded_ids=frozenset(int(x) for x in rid_arr[discarded[i]]),
+            a8_signature=tuple(a8_sig[i].tolist()),
+            a8_last_race=tuple(a8_last[i].tolist()),
+        )
+    return out
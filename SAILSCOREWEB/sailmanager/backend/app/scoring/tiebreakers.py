@@ -1,6 +1,7 @@
 # app/scoring/tiebreakers.py
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple, Optional
 
 
@@ -46,6 +47,20 @@ def _group_by_equal(values: List[Dict[str, Any]], key_fn):
     return out
 
 
+def _medal_main_race(
+    ordered_race_ids: List[int],
+    medal_race_ids: Optional[List[int]],
+) -> Optional[int]:
+    """A MR "principal": a última MR de acordo com ordered_race_ids."""
+    if not medal_race_ids:
+        return None
+    medal_set = {int(x) for x in medal_race_ids}
+    for rid in reversed(ordered_race_ids):
+        if int(rid) in medal_set:
+            return int(rid)
+    return None
+
+
 # -----------------------------
 # A8 (Series Ties) - baseado em POINTS (RRS)
 # -----------------------------
@@ -88,12 +103,35 @@ def _a8_last_race_points_key(
     return tuple(rev)
 
 
+A8Keys = Dict[Any, Tuple[Tuple[float, ...], Tuple[float, ...]]]
+
+
+def _a8_keys_for(
+    k: Any,
+    ordered_race_ids: List[int],
+    per: Dict[int, Dict[str, Any]],
+    a8_keys: Optional[A8Keys] = None,
+) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """(A8.1, A8.2) — usa as chaves pré-calculadas (kernel) se existirem."""
+    if a8_keys:
+        pre = a8_keys.get(k)
+        if pre is not None:
+            return pre
+    # uma só passagem pelas races: A8.1 = ordenados, A8.2 = ordem inversa
+    pts: List[float] = []
+    for rid in ordered_race_ids:
+        rr = per.get(rid)
+        pts.append(_safe_float(rr.get("points"), BIG_F) if rr else BIG_F)
+    return tuple(sorted(pts)), tuple(reversed(pts))
+
+
 def break_tie_rrs_a8(
     tied_rows: List[Dict[str, Any]],
     *,
     ordered_race_ids: List[int],
     results_by_key: Dict[Any, Dict[int, Dict[str, Any]]],
     key_of_row,
+    a8_keys: Optional[A8Keys] = None,
 ) -> List[Dict[str, Any]]:
     """
     Desempate RRS Appendix A8 para um grupo já empatado em net_points.
@@ -101,9 +139,10 @@ def break_tie_rrs_a8(
     def a8_key(row: Dict[str, Any]) -> Tuple:
         k = key_of_row(row)
         per = results_by_key.get(k, {})
+        sig, last = _a8_keys_for(k, ordered_race_ids, per, a8_keys)
         return (
-            _a8_signature_points(ordered_race_ids, per),
-            _a8_last_race_points_key(ordered_race_ids, per),
+            sig,
+            last,
             # estabilidade (não é regra, evita “dançar”)
             str(row.get("sail_number") or ""),
             str(row.get("skipper_name") or ""),
@@ -124,6 +163,7 @@ def break_tie_medal_first_then_a8(
     medal_race_ids: List[int],
     medal_sail_set: Optional[set[str]] = None,
     sail_number_of_row=None,
+    a8_keys: Optional[A8Keys] = None,
 ) -> List[Dict[str, Any]]:
     """
     Regra: se existe Medal Race e TODOS os empatados são "MR sailors",
@@ -136,21 +176,17 @@ def break_tie_medal_first_then_a8(
             ordered_race_ids=ordered_race_ids,
             results_by_key=results_by_key,
             key_of_row=key_of_row,
+            a8_keys=a8_keys,
         )
 
-    # escolher a MR "principal": a última MR de acordo com ordered_race_ids
-    medal_set = {int(x) for x in medal_race_ids}
-    medal_main = None
-    for rid in reversed(ordered_race_ids):
-        if int(rid) in medal_set:
-            medal_main = int(rid)
-            break
+    medal_main = _medal_main_race(ordered_race_ids, medal_race_ids)
     if medal_main is None:
         return break_tie_rrs_a8(
             tied_rows,
             ordered_race_ids=ordered_race_ids,
             results_by_key=results_by_key,
             key_of_row=key_of_row,
+            a8_keys=a8_keys,
         )
 
     def is_mr_sailor(row: Dict[str, Any]) -> bool:
@@ -170,6 +206,7 @@ def break_tie_medal_first_then_a8(
             ordered_race_ids=ordered_race_ids,
             results_by_key=results_by_key,
             key_of_row=key_of_row,
+            a8_keys=a8_keys,
         )
 
     def mr_key(row: Dict[str, Any]) -> int:
@@ -192,11 +229,113 @@ def break_tie_medal_first_then_a8(
                     ordered_race_ids=ordered_race_ids,
                     results_by_key=results_by_key,
                     key_of_row=key_of_row,
+                    a8_keys=a8_keys,
                 )
             )
     return out
 
 
+# -----------------------------
+# Standings key (pré-calculada 1x por barco)
+# -----------------------------
+@dataclass(frozen=True)
+class StandingsKey:
+    """
+    Tudo o que o sort e o ranking precisam de um barco, calculado uma única vez.
+    `rank_signature` é a assinatura de empate: rows adjacentes com a mesma => mesmo rank.
+    """
+    net: float
+    total: float
+    is_mr_sailor: bool
+    mr_pos: int
+    a8_signature: Tuple[float, ...]
+    a8_last_race: Tuple[float, ...]
+    sail_number: str
+    skipper_name: str
+
+    @property
+    def rank_signature(self) -> Tuple:
+        return (self.net, self.mr_pos, self.a8_signature, self.a8_last_race)
+
+
+def build_standings_keys(
+    rows: List[Dict[str, Any]],
+    *,
+    ordered_race_ids: List[int],
+    results_by_key: Dict[Any, Dict[int, Dict[str, Any]]],
+    key_of_row,
+    medal_race_ids: Optional[List[int]] = None,
+    medal_sail_set: Optional[set[str]] = None,
+    sail_number_of_row=None,
+    a8_keys: Optional[A8Keys] = None,
+) -> List[StandingsKey]:
+    """Uma StandingsKey por row (mesma ordem). Todas as rows devem ser da mesma classe."""
+    medal_main = _medal_main_race(ordered_race_ids, medal_race_ids)
+    use_sail_set = medal_sail_set is not None and sail_number_of_row is not None
+
+    out: List[StandingsKey] = []
+    for row in rows:
+        k = key_of_row(row)
+        per = results_by_key.get(k, {})
+        a8_sig, a8_last = _a8_keys_for(k, ordered_race_ids, per, a8_keys)
+
+        is_mr = False
+        mr_pos = BIG_I
+        if medal_main is not None:
+            if use_sail_set:
+                is_mr = (sail_number_of_row(row) or "").strip().upper() in medal_sail_set
+            else:
+                is_mr = medal_main in per
+            if is_mr:
+                rr = per.get(medal_main, {}) or {}
+                mr_pos = _safe_int(rr.get("position"), BIG_I)
+
+        out.append(
+            StandingsKey(
+                net=_safe_float(row.get("net_points")),
+                total=_safe_float(row.get("total_points")),
+                is_mr_sailor=is_mr,
+                mr_pos=mr_pos,
+                a8_signature=a8_sig,
+                a8_last_race=a8_last,
+                sail_number=str(row.get("sail_number") or ""),
+                skipper_name=str(row.get("skipper_name") or ""),
+            )
+        )
+    return out
+
+
+def sort_by_standings_keys(
+    rows: List[Dict[str, Any]],
+    keys: List[StandingsKey],
+) -> List[Tuple[Dict[str, Any], StandingsKey]]:
+    """
+    Um único sort com a mesma ordem de `sort_overall_rows`:
+      net -> (MR position, só se TODOS os empatados em net são MR sailors)
+          -> A8.1 -> A8.2 -> sail/skipper (estabilidade) -> total.
+    Devolve pares (row, key) para o ranking reutilizar as keys.
+    """
+    # MR-first é decidido por bloco de net: precisa de todos os do bloco
+    all_mr: Dict[float, bool] = {}
+    for key in keys:
+        all_mr[key.net] = all_mr.get(key.net, True) and key.is_mr_sailor
+
+    def sort_key(i: int) -> Tuple:
+        key = keys[i]
+        return (
+            key.net,
+            key.mr_pos if all_mr[key.net] else 0,
+            key.a8_signature,
+            key.a8_last_race,
+            key.sail_number,
+            key.skipper_name,
+            key.total,
+        )
+
+    order = sorted(range(len(rows)), key=sort_key)
+    return [(rows[i], keys[i]) for i in order]
+
+
 # -----------------------------
 # Main sorter for a group
 # -----------------------------
@@ -209,6 +348,7 @@ def sort_overall_rows(
     medal_race_ids: Optional[List[int]] = None,
     medal_sail_set: Optional[set[str]] = None,
     sail_number_of_row=None,
+    a8_keys: Optional[A8Keys] = None,
 ) -> List[Dict[str, Any]]:
     """
     Ordena rows por:
@@ -218,45 +358,17 @@ def sort_overall_rows(
           - senão A8
     """
 
-    base = sorted(
+    keys = build_standings_keys(
         rows,
-        key=lambda r: (
-            _safe_float(r.get("net_points")),
-            _safe_float(r.get("total_points")),
-        ),
+        ordered_race_ids=ordered_race_ids,
+        results_by_key=results_by_key,
+        key_of_row=key_of_row,
+        medal_race_ids=medal_race_ids,
+        medal_sail_set=medal_sail_set,
+        sail_number_of_row=sail_number_of_row,
+        a8_keys=a8_keys,
     )
-
-    blocks = _group_by_equal(base, key_fn=lambda r: _safe_float(r.get("net_points")))
-
-    out: List[Dict[str, Any]] = []
-    for blk in blocks:
-        if len(blk) == 1:
-            out.extend(blk)
-            continue
-
-        if medal_race_ids:
-            out.extend(
-                break_tie_medal_first_then_a8(
-                    blk,
-                    ordered_race_ids=ordered_race_ids,
-                    results_by_key=results_by_key,
-                    key_of_row=key_of_row,
-                    medal_race_ids=medal_race_ids,
-                    medal_sail_set=medal_sail_set,
-                    sail_number_of_row=sail_number_of_row,
-                )
-            )
-        else:
-            out.extend(
-                break_tie_rrs_a8(
-                    blk,
-                    ordered_race_ids=ordered_race_ids,
-                    results_by_key=results_by_key,
-                    key_of_row=key_of_row,
-                )
-            )
-
-    return out
+    return [row for row, _ in sort_by_standings_keys(rows, keys)]
 
 
 def tie_signature_overall(
@@ -268,39 +380,19 @@ def tie_signature_overall(
     medal_race_ids: Optional[List[int]] = None,
     medal_sail_set: Optional[set[str]] = None,
     sail_number_of_row=None,
+    a8_keys: Optional[A8Keys] = None,
 ) -> Tuple:
     """
     Assinatura de empate (quando tudo o que usas para desempatar dá igual).
     Se duas rows tiverem a mesma signature => empate impossível -> mesmo rank.
     """
-    net = _safe_float(row.get("net_points"), BIG_F)
-
-    # A8 (inclui discards) — é o teu critério “hard” principal para empates
-    k = key_of_row(row)
-    per = results_by_key.get(k, {})
-
-    a8_sig = _a8_signature_points(ordered_race_ids, per)
-    a8_last = _a8_last_race_points_key(ordered_race_ids, per)
-
-    # MR-first: só entra se existir MR e TODOS forem MR sailors
-    mr_pos = BIG_I
-    if medal_race_ids:
-        medal_set = {int(x) for x in medal_race_ids}
-        medal_main = None
-        for rid in reversed(ordered_race_ids):
-            if int(rid) in medal_set:
-                medal_main = int(rid)
-                break
-
-        if medal_main is not None:
-            def is_mr_sailor_local() -> bool:
-                if medal_sail_set is not None and sail_number_of_row is not None:
-                    sn = (sail_number_of_row(row) or "").strip().upper()
-                    return sn in medal_sail_set
-                return medal_main in per
-
-            if is_mr_sailor_local():
-                rr = per.get(medal_main, {}) or {}
-                mr_pos = _safe_int(rr.get("position"), BIG_I)
-
-    return (net, mr_pos, a8_sig, a8_last)
+    return build_standings_keys(
+        [row],
+        ordered_race_ids=ordered_race_ids,
+        results_by_key=results_by_key,
+        key_of_row=key_of_row,
+        medal_race_ids=medal_race_ids,
+        medal_sail_set=medal_sail_set,
+        sail_number_of_row=sail_number_of_row,
+        a8_keys=a8_keys,
+    )[0].rank_signature
@@ -0,0 +1,170 @@
+# app/services/competitor_cache.py
+"""
+Cache do contexto de competidores de uma race (`_build_competitor_context_for_race`:
+N para o N+1, frota de cada barco, entries elegíveis).
+
+- Chave: (regatta_id, class_name, fleet_set_id, variant) -> (entries_version, ctx).
+  Races da mesma classe e do mesmo fleet set (ou sem fleet set) partilham o contexto.
+  `variant` separa outros payloads que só dependem de entries/fleets (ex.: as fleets
+  públicas da regata, `variant="public_fleets"`).
+- `regattas.entries_version` é incrementado no MESMO commit de qualquer escrita em
+  entries, fleet sets, fleets ou fleet assignments (no UPDATE único de regatta_versions):
+    * inserts/updates/deletes ORM desses modelos (detetados no before_flush);
+    * `mark_entries_changed(db, regatta_id)` para bulk updates fora do ORM
+      (o `mark_results_changed` estrutural chama-o).
+- Dentro de uma transação o contexto fica também em `db.info` (sem voltar a ler a
+  versão). Um flush que mexa em entries/fleets limpa essa memória da sessão e, até
+  ao commit, a cache partilhada deixa de ser usada para essa regata (a versão na DB
+  ainda é a antiga).
+- O ctx é partilhado entre pedidos: tratar como read-only.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.http_cache import _regatta_id_of
+from app.services.regatta_versions import bump_on_commit
+
+COMPETITOR_CACHE_ENABLED = os.getenv("COMPETITOR_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+COMPETITOR_CACHE_MAX_ENTRIES = int(os.getenv("COMPETITOR_CACHE_MAX_ENTRIES", "512"))
+
+_DIRTY_KEY = "entries_dirty_regattas"
+_SESSION_KEY = "competitor_ctx"
+
+_TRACKED_MODELS = (
+    models.Entry,
+    models.FleetSet,
+    models.Fleet,
+    models.FleetAssignment,
+)
+
+_LOCK = threading.Lock()
+_CACHE: "OrderedDict[Hashable, tuple[int, Any]]" = OrderedDict()
+_STATS = {"hits": 0, "misses": 0, "session_hits": 0, "bypass": 0}
+
+
+# ============================================================
+# Invalidação (write side)
+# ============================================================
+def mark_entries_changed(db: Session, regatta_id: Optional[int]) -> None:
+    """Marca entries/fleets da regata como alterados nesta sessão; a versão sobe no commit."""
+    if regatta_id is None:
+        return
+    try:
+        rid = int(regatta_id)
+    except (TypeError, ValueError):
+        return
+    db.info.setdefault(_DIRTY_KEY, set()).add(rid)
+    bump_on_commit(db, rid, "entries_version")
+    memo = db.info.get(_SESSION_KEY)
+    if memo:
+        for key in [k for k in memo if k[0] == rid]:
+            memo.pop(key, None)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_entry_changes(session: Session, flush_context, instances) -> None:
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, _TRACKED_MODELS):
+            mark_entries_changed(session, _regatta_id_of(session, obj))
+    for obj in list(session.dirty):
+        if isinstance(obj, _TRACKED_MODELS) and session.is_modified(obj):
+            mark_entries_changed(session, _regatta_id_of(session, obj))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_session_memo(session: Session, transaction) -> None:
+    # commit, rollback ou close: a versão já subiu (ou não), e a próxima transação
+    # pode ver outras entries
+    if transaction.parent is None:
+        session.info.pop(_DIRTY_KEY, None)
+        session.info.pop(_SESSION_KEY, None)
+
+
+# ============================================================
+# Leitura
+# ============================================================
+def get_entries_version(db: Session, regatta_id: int) -> Optional[int]:
+    row = db.query(models.Regatta.entries_version).filter(models.Regatta.id == regatta_id).first()
+    return int(row[0] or 0) if row is not None else None
+
+
+def get_or_compute(
+    db: Session,
+    regatta_id: int,
+    class_name: str,
+    fleet_set_id: Optional[int],
+    compute: Callable[[], Any],
+    variant: Hashable = None,
+) -> Any:
+    """Contexto em cache (sessão -> processo, validado pela entries_version), ou calcula e guarda."""
+    if not COMPETITOR_CACHE_ENABLED:
+        with _LOCK:
+            _STATS["bypass"] += 1
+        return compute()
+
+    rid = int(regatta_id)
+    key = (rid, str(class_name or ""), int(fleet_set_id) if fleet_set_id else None, variant)
+    memo: Dict[Hashable, Any] = db.info.setdefault(_SESSION_KEY, {})
+    if key in memo:
+        with _LOCK:
+            _STATS["session_hits"] += 1
+        return memo[key]
+
+    # escritas pendentes em entries/fleets desta regata: a versão na DB ainda é a antiga
+    if rid in (db.info.get(_DIRTY_KEY) or ()) or COMPETITOR_CACHE_MAX_ENTRIES <= 0:
+        with _LOCK:
+            _STATS["bypass"] += 1
+        ctx = memo[key] = compute()
+        return ctx
+
+    version = get_entries_version(db, rid)
+    if version is None:
+        with _LOCK:
+            _STATS["bypass"] += 1
+        return compute()
+
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit is not None and hit[0] == version:
+            _CACHE.move_to_end(key)
+            _STATS["hits"] += 1
+            memo[key] = hit[1]
+            return hit[1]
+        _STATS["misses"] += 1
+
+    ctx = compute()
+    memo[key] = ctx
+    with _LOCK:
+        cur = _CACHE.get(key)
+        if cur is None or cur[0] <= version:
+            _CACHE[key] = (version, ctx)
+            _CACHE.move_to_end(key)
+        while len(_CACHE) > COMPETITOR_CACHE_MAX_ENTRIES:
+            _CACHE.popitem(last=False)
+    return ctx
+
+
+def cache_stats() -> dict:
+    with _LOCK:
+        return {
+            "enabled": COMPETITOR_CACHE_ENABLED,
+            "max_entries": COMPETITOR_CACHE_MAX_ENTRIES,
+            "entries": len(_CACHE),
+            **_STATS,
+        }
+
+
+def clear_cache(reset_stats: bool = False) -> None:
+    with _LOCK:
+        _CACHE.clear()
+        if reset_stats:
+            for k in _STATS:
+                _STATS[k] = 0
@@ -1,11 +1,14 @@
 # app/services/fleets.py
 import random
-from typing import List, Dict, Tuple
+from dataclasses import dataclass
+from typing import List, Dict, Sequence
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models import FleetSet, Fleet, FleetAssignment, Race, Result, Entry
-from app.routes.results_overall import get_overall_results_data, _sn_norm
+from app.routes.results_overall import compute_entry_ranking
+from app.services.standings_cache import mark_results_changed
 
 FLEET_COLORS_QUALI = {
     2: ["Yellow", "Blue"],
@@ -14,36 +17,20 @@ FLEET_COLORS_QUALI = {
 }
 
 
-def _cc_norm(v: str | None) -> str:
-    return (v or "").strip().upper()
-
-
-def _overall_entry_key(class_name: str, row: dict) -> Tuple[str, str, str]:
-    """
-    Mesma lógica de identidade do overall: classe + vela + country.
-    Necessário quando há mais do que um barco com o mesmo sail_number na classe.
-    """
-    cls = str(class_name or row.get("class_name") or "")
-    sn = _sn_norm(row.get("sail_number"))
-    cc = _cc_norm(row.get("boat_country_code"))
-    return (cls, sn, cc)
-
-
-def list_confirmed_entries(
+def list_confirmed_entry_ids(
     db: Session,
     regatta_id: int,
     class_name: str,
-) -> List[Entry]:
-    return (
-        db.query(Entry)
-        .filter(
+) -> List[int]:
+    return [
+        int(eid)
+        for (eid,) in db.query(Entry.id).filter(
             Entry.regatta_id == regatta_id,
             Entry.class_name == class_name,
             Entry.paid == True,
             Entry.confirmed == True,
         )
-        .all()
-    )
+    ]
 
 
 def compute_overall_ranking(
@@ -52,63 +39,11 @@ def compute_overall_ranking(
     class_name: str,
 ) -> List[int]:
     """
-    Usa o mesmo ranking que o endpoint /results/overall/{regatta_id}?class_name=...
-    para garantir consistência entre aquilo que o utilizador vê e o que
-    é usado para reshuffle / finals.
+    Entry ids pela ordem do endpoint /results/overall/{regatta_id}?class_name=...
+    (mesmo scoring e desempates), para reshuffle / finals / medal race ficarem
+    consistentes com o que o utilizador vê. Só o ranking: sem payload do overall.
     """
-    overall_payload = get_overall_results_data(regatta_id, class_name, False, db)
-    # Endpoint devolve {"rows": [...], "races_meta": ..., ...}; iterar o dict dá só as keys.
-    if isinstance(overall_payload, dict):
-        overall = overall_payload.get("rows") or []
-    else:
-        overall = overall_payload or []
-
-    # map (classe, vela, country) -> entry_id — igual ao agrupamento em results_overall
-    entry_by_key: Dict[Tuple[str, str, str], int] = {}
-    for e in (
-        db.query(Entry)
-        .filter(
-            Entry.regatta_id == regatta_id,
-            Entry.class_name == class_name,
-        )
-        .all()
-    ):
-        cls = str(e.class_name or "")
-        snn = _sn_norm(e.sail_number)
-        ccn = _cc_norm(getattr(e, "boat_country_code", None))
-        if not snn:
-            continue
-        entry_by_key[(cls, snn, ccn)] = int(e.id)
-
-    ranking_ids: List[int] = []
-    seen_entry: set[int] = set()
-    debug_lines: List[str] = []
-
-    for idx, row in enumerate(overall, start=1):
-        if not isinstance(row, dict):
-            continue
-        key = _overall_entry_key(class_name, row)
-        _, snn, ccn = key
-        if not snn:
-            continue
-        eid = entry_by_key.get(key)
-        if eid is None:
-            # pode haver resultados sem entry correspondente (ex: barco extra)
-            continue
-        if eid in seen_entry:
-            continue
-        seen_entry.add(eid)
-        ranking_ids.append(eid)
-        net = float(row.get("net_points") or 0.0)
-        debug_lines.append(
-            f"#{idx}: entry_id={eid} sail={ccn} {snn} total={net:.2f}"
-        )
-
-    print("=== [FLEETS DEBUG] Ranking usado para reshuffle (from /results/overall) ===")
-    for line in debug_lines:
-        print(line)
-
-    return ranking_ids
+    return [r.entry_id for r in compute_entry_ranking(regatta_id, class_name, False, db)]
 
 
 def _ensure_unique_label(
@@ -147,61 +82,102 @@ def _ensure_unique_label(
     return label
 
 
-def create_initial_set_random(
+@dataclass
+class FleetSetBuild:
+    """Fleet set acabado de criar + nº de barcos por fleet (dos dados inseridos, sem reler a DB)."""
+    fleet_set: FleetSet
+    fleet_ids: List[int]
+    counts: Dict[str, int]
+
+    @property
+    def assigned(self) -> int:
+        return sum(self.counts.values())
+
+
+def build_fleet_set(
     db: Session,
     regatta_id: int,
     class_name: str,
+    phase: str,
     label: str | None,
-    num_fleets: int,
-) -> FleetSet:
-    if num_fleets not in FLEET_COLORS_QUALI:
-        raise ValueError("Invalid fleet count for qualifying (must be 2, 3, or 4).")
-
-    phase = "qualifying"
-    unique_label = _ensure_unique_label(db, regatta_id, class_name, phase, label)
-
+    fleet_names: Sequence[str],
+    members: Sequence[Sequence[int]],
+) -> FleetSetBuild:
+    """
+    Cria o fleet set (label único), as fleets (order_index = posição em `fleet_names`)
+    e as assignments `members[i]` -> fleet i: um INSERT para as fleets e um
+    executemany para as assignments, em vez de um flush por objeto. Sem commit.
+    """
     fs = FleetSet(
         regatta_id=regatta_id,
         class_name=class_name,
         phase=phase,
-        label=unique_label,
+        label=_ensure_unique_label(db, regatta_id, class_name, phase, label),
     )
     db.add(fs)
     db.flush()
 
-    names = FLEET_COLORS_QUALI[num_fleets]
-    fleets = [
-        Fleet(fleet_set_id=fs.id, name=n, order_index=i + 1)
-        for i, n in enumerate(names)
+    fleet_ids: List[int] = []
+    if fleet_names:
+        fleet_ids = list(
+            db.execute(
+                insert(Fleet).returning(Fleet.id, sort_by_parameter_order=True),
+                [
+                    {"fleet_set_id": fs.id, "name": name, "order_index": i + 1}
+                    for i, name in enumerate(fleet_names)
+                ],
+            ).scalars()
+        )
+
+    rows = [
+        {"fleet_set_id": fs.id, "fleet_id": fleet_id, "entry_id": int(entry_id)}
+        for fleet_id, entry_ids in zip(fleet_ids, members)
+        for entry_id in entry_ids
     ]
-    db.add_all(fleets)
-    db.flush()
+    if rows:
+        db.execute(insert(FleetAssignment), rows)
+
+    # as coleções do fs (pending) ficaram vazias; os inserts Core também não passam
+    # pelo before_flush que marca entries/conteúdo da regata como alterados
+    db.expire(fs, ["fleets", "assignments"])
+    mark_results_changed(db, regatta_id)
+
+    return FleetSetBuild(
+        fleet_set=fs,
+        fleet_ids=fleet_ids,
+        counts={name: len(entry_ids) for name, entry_ids in zip(fleet_names, members)},
+    )
+
 
-    entries = list_confirmed_entries(db, regatta_id, class_name)
-    random.shuffle(entries)
+def create_initial_set_random(
+    db: Session,
+    regatta_id: int,
+    class_name: str,
+    label: str | None,
+    num_fleets: int,
+) -> FleetSetBuild:
+    if num_fleets not in FLEET_COLORS_QUALI:
+        raise ValueError("Invalid fleet count for qualifying (must be 2, 3, or 4).")
+
+    entry_ids = list_confirmed_entry_ids(db, regatta_id, class_name)
+    random.shuffle(entry_ids)
 
     # round-robin inicial
-    for i, e in enumerate(entries):
-        f = fleets[i % len(fleets)]
-        db.add(
-            FleetAssignment(
-                fleet_set_id=fs.id,
-                fleet_id=f.id,
-                entry_id=e.id,
-            )
-        )
+    members: List[List[int]] = [[] for _ in range(num_fleets)]
+    for i, entry_id in enumerate(entry_ids):
+        members[i % num_fleets].append(entry_id)
 
-    return fs
+    return build_fleet_set(
+        db, regatta_id, class_name, "qualifying", label, FLEET_COLORS_QUALI[num_fleets], members
+    )
 
 
 def all_races_scored_for_set(db: Session, fleet_set_id: int) -> bool:
-    race_ids = [r.id for r in db.query(Race.id).filter(Race.fleet_set_id == fleet_set_id)]
-    if not race_ids:
-        return True
-    # considera "scored" se não há resultados com points nulos
+    # considera "scored" se não há resultados com points nulos nas races do set
     missing = (
         db.query(Result.id)
-        .filter(Result.race_id.in_(race_ids), Result.points == None)
+        .join(Race, Race.id == Result.race_id)
+        .filter(Race.fleet_set_id == fleet_set_id, Result.points == None)
         .first()
     )
     return missing is None
@@ -243,7 +219,7 @@ def reshuffle_from_ranking(
     prev_set_id: int,
     label: str | None,
     num_fleets: int,
-) -> FleetSet:
+) -> FleetSetBuild:
     if num_fleets not in FLEET_COLORS_QUALI:
         raise ValueError("Invalid fleet count for reshuffle (must be 2, 3, or 4).")
 
@@ -254,39 +230,14 @@ def reshuffle_from_ranking(
     # ranking oficial (mesma lógica que /results/overall)
     ranking = compute_overall_ranking(db, regatta_id, class_name)
 
-    phase = "qualifying"
-    unique_label = _ensure_unique_label(db, regatta_id, class_name, phase, label)
-
-    fs = FleetSet(
-        regatta_id=regatta_id,
-        class_name=class_name,
-        phase=phase,
-        label=unique_label,
-    )
-    db.add(fs)
-    db.flush()
-
-    names = FLEET_COLORS_QUALI[num_fleets]
-    fleets = [
-        Fleet(fleet_set_id=fs.id, name=n, order_index=i + 1)
-        for i, n in enumerate(names)
-    ]
-    db.add_all(fleets)
-    db.flush()
-
     # aplica o padrão "snake"
+    members: List[List[int]] = [[] for _ in range(num_fleets)]
     for i, entry_id in enumerate(ranking):
-        fleet_idx = snake_fleet_index(i, len(fleets))
-        f = fleets[fleet_idx]
-        db.add(
-            FleetAssignment(
-                fleet_set_id=fs.id,
-                fleet_id=f.id,
-                entry_id=entry_id,
-            )
-        )
+        members[snake_fleet_index(i, num_fleets)].append(entry_id)
 
-    return fs
+    return build_fleet_set(
+        db, regatta_id, class_name, "qualifying", label, FLEET_COLORS_QUALI[num_fleets], members
+    )
 
 
 def start_finals(
@@ -295,7 +246,7 @@ def start_finals(
     class_name: str,
     label: str,
     grouping: Dict[str, int],
-) -> FleetSet:
+) -> FleetSetBuild:
     """
     Cria um FleetSet de phase='finals' e reparte o ranking atual
     pelos grupos (Gold/Silver/…).
@@ -303,48 +254,19 @@ def start_finals(
     A partir daqui, o get_overall_results passa a respeitar
     estes grupos na ordenação final (Gold antes de Silver, etc).
     """
-    phase = "finals"
-    unique_label = _ensure_unique_label(db, regatta_id, class_name, phase, label)
-
-    fs = FleetSet(
-        regatta_id=regatta_id,
-        class_name=class_name,
-        phase=phase,
-        label=unique_label,
-    )
-    db.add(fs)
-    db.flush()
-
-    fleets: List[Fleet] = []
-    for i, (name, size) in enumerate(grouping.items()):
-        fleets.append(
-            Fleet(
-                fleet_set_id=fs.id,
-                name=name,
-                order_index=i + 1,  # ordem dos grupos: 1=Gold, 2=Silver, ...
-            )
-        )
-
-    db.add_all(fleets)
-    db.flush()
-
     # ranking geral (também baseado em /results/overall)
     ranking = compute_overall_ranking(db, regatta_id, class_name)
 
+    # ordem dos grupos: 1=Gold, 2=Silver, ...
+    names = list(grouping.keys())
+    members: List[List[int]] = []
     idx = 0
-    for f in fleets:
-        size = grouping.get(f.name, 0)
+    for name in names:
+        size = grouping.get(name, 0)
         if size <= 0:
+            members.append([])
             continue
-        slice_ids = ranking[idx : idx + size]
-        for entry_id in slice_ids:
-            db.add(
-                FleetAssignment(
-                    fleet_set_id=fs.id,
-                    fleet_id=f.id,
-                    entry_id=entry_id,
-                )
-            )
+        members.append(ranking[idx : idx + size])
         idx += size
 
-    return fs
+    return build_fleet_set(db, regatta_id, class_name, "finals", label, names, members)
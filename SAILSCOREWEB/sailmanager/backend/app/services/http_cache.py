@@ -0,0 +1,143 @@
+# app/services/http_cache.py
+"""
+Conditional GET (ETag / Last-Modified -> 304) para os endpoints que os espectadores
+fazem polling: overall, pace, entries, notices e fleets públicas.
+
+- `regattas.content_version` (+ `content_updated_at`) é incrementado no MESMO commit
+  de qualquer escrita que mude esses payloads (no UPDATE único de regatta_versions):
+    * tudo o que passa por `standings_cache.mark_results_changed` (results, races,
+      publicação, settings, fleets...);
+    * inserts/updates/deletes ORM de entries, notices, fleets, classes e publicação
+      (detetados no before_flush);
+    * `mark_content_changed(db, regatta_id)` para bulk updates fora do ORM.
+- `conditional_get(...)` é uma dependência: lê a versão (1 SELECT) e, se o
+  `If-None-Match` bater certo, responde 304 sem correr o handler.
+  Como a versão vive na DB, funciona igual com vários workers.
+- `Last-Modified` é só informativo: com resolução de 1s, duas escritas no mesmo
+  segundo dariam 304 errado a um If-Modified-Since. O ETag é a fonte de verdade.
+"""
+from __future__ import annotations
+
+import os
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import get_db
+from app.services.regatta_versions import bump_on_commit
+
+CONDITIONAL_GET_ENABLED = os.getenv("CONDITIONAL_GET_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# modelos cujo conteúdo aparece nos endpoints com ETag
+_TRACKED_MODELS = (
+    models.Regatta,
+    models.Entry,
+    models.Notice,
+    models.Race,
+    models.Result,
+    models.RegattaClass,
+    models.RegattaClassPublication,
+    models.RegattaClassSettings,
+    models.FleetSet,
+    models.Fleet,
+    models.FleetAssignment,
+)
+
+
+# ============================================================
+# Invalidação (write side)
+# ============================================================
+def mark_content_changed(db: Session, regatta_id: Optional[int]) -> None:
+    """Marca a regata como alterada nesta sessão; a versão sobe no commit."""
+    bump_on_commit(db, regatta_id, "content_version")
+
+
+def _regatta_id_of(session: Session, obj) -> Optional[int]:
+    if isinstance(obj, models.Regatta):
+        return obj.id
+    rid = getattr(obj, "regatta_id", None)
+    if rid is not None:
+        return rid
+    # Fleet / FleetAssignment só conhecem o fleet set
+    fs_id = getattr(obj, "fleet_set_id", None)
+    if fs_id is None:
+        return None
+    with session.no_autoflush:
+        fs = session.get(models.FleetSet, fs_id)
+    return fs.regatta_id if fs is not None else None
+
+
+@event.listens_for(Session, "before_flush")
+def _track_content_changes(session: Session, flush_context, instances) -> None:
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, _TRACKED_MODELS):
+            mark_content_changed(session, _regatta_id_of(session, obj))
+    for obj in list(session.dirty):
+        if isinstance(obj, _TRACKED_MODELS) and session.is_modified(obj):
+            mark_content_changed(session, _regatta_id_of(session, obj))
+
+
+# ============================================================
+# Leitura (conditional GET)
+# ============================================================
+def make_etag(regatta_id: int, version: int) -> str:
+    # weak: o mesmo ETag serve JSON com/sem compressão e todas as query strings do URL
+    return f'W/"r{int(regatta_id)}-c{int(version)}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == opaque:
+            return True
+    return False
+
+
+def conditional_get(get_db_dep: Callable = get_db) -> Callable:
+    """
+    Dependência para GETs por regata (path param `regatta_id`). Usar em `dependencies=[...]`
+    com o MESMO get_db do handler, para partilhar a sessão do pedido.
+    """
+
+    def dependency(
+        regatta_id: int,
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db_dep),
+    ) -> None:
+        if not CONDITIONAL_GET_ENABLED:
+            return
+        row = (
+            db.query(models.Regatta.content_version, models.Regatta.content_updated_at)
+            .filter(models.Regatta.id == regatta_id)
+            .first()
+        )
+        if row is None:
+            # o handler decide (404, payload vazio...)
+            return
+
+        etag = make_etag(regatta_id, row[0] or 0)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        updated_at = row[1]
+        if updated_at is not None:
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            headers["Last-Modified"] = format_datetime(updated_at.astimezone(timezone.utc), usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+
+    return dependency
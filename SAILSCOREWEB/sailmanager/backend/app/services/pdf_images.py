@@ -0,0 +1,223 @@
+# app/services/pdf_images.py
+"""
+Cache das imagens dos PDFs de resultados (bandeiras, logo, hero, sponsors), em dois níveis:
+
+1. Processo: LRU de `ImageReader` já abertos. Chave = URL, ou caminho local + mtime
+   (um ficheiro substituído no disco entra com chave nova). O ImageReader guarda os
+   pixels depois do primeiro drawImage, por isso um render quente não volta a
+   descodificar nem a ler nada. Falhas também ficam em cache (PDF_IMAGE_MISS_TTL_S),
+   para um URL em baixo não custar um timeout por linha da tabela.
+2. Disco: bytes descarregados de URLs remotas em PDF_IMAGE_CACHE_DIR (um ficheiro por
+   sha256 do URL, escrita atómica), partilhados entre workers e restarts. Passado
+   PDF_IMAGE_DISK_TTL_S volta a descarregar; sem rede, serve a cópia antiga.
+
+Cada URL é descarregado no máximo uma vez de cada vez (lock por URL): pedidos
+concorrentes pela mesma imagem esperam pelo primeiro.
+
+Bandeiras: `flag_image(alpha2)` usa primeiro os PNGs em app/assets/flags
+(`scripts/fetch_flag_assets.py`) e só depois o flagcdn, pelo mesmo cache.
+Os ImageReader são partilhados entre renders: tratar como read-only.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Hashable, Optional
+
+from reportlab.lib.utils import ImageReader
+
+PDF_IMAGE_CACHE_MAX_ENTRIES = int(os.getenv("PDF_IMAGE_CACHE_MAX_ENTRIES", "256"))
+PDF_IMAGE_CACHE_DIR = Path(
+    os.getenv("PDF_IMAGE_CACHE_DIR", str(Path(tempfile.gettempdir()) / "sailscore-pdf-images"))
+)
+PDF_IMAGE_DISK_TTL_S = float(os.getenv("PDF_IMAGE_DISK_TTL_S", str(7 * 24 * 3600)))
+PDF_IMAGE_MISS_TTL_S = float(os.getenv("PDF_IMAGE_MISS_TTL_S", "300"))
+PDF_IMAGE_FETCH_TIMEOUT_S = float(os.getenv("PDF_IMAGE_FETCH_TIMEOUT_S", "10"))
+
+FLAG_ASSETS_DIR = Path(
+    os.getenv("PDF_FLAG_ASSETS_DIR", str(Path(__file__).resolve().parent.parent / "assets" / "flags"))
+)
+FLAG_URL_TEMPLATE = "https://flagcdn.com/w40/{alpha2}.png"
+
+_LOCK = threading.Lock()
+# chave -> ImageReader, ou instante (monotonic) até ao qual a falha fica em cache
+_CACHE: "OrderedDict[Hashable, ImageReader | float]" = OrderedDict()
+_FETCH_LOCKS: Dict[str, threading.Lock] = {}
+_STATS = {"hits": 0, "misses": 0, "disk_hits": 0, "fetches": 0, "fetch_errors": 0, "stale_served": 0}
+
+
+# ============================================================
+# Nível 1: LRU em memória
+# ============================================================
+def _cached(key: Hashable) -> tuple[bool, Optional[ImageReader]]:
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit is None:
+            _STATS["misses"] += 1
+            return False, None
+        if isinstance(hit, float):
+            if hit < time.monotonic():
+                _CACHE.pop(key, None)
+                _STATS["misses"] += 1
+                return False, None
+            hit = None
+        else:
+            _CACHE.move_to_end(key)
+        _STATS["hits"] += 1
+        return True, hit
+
+
+def _store(key: Hashable, img: Optional[ImageReader]) -> Optional[ImageReader]:
+    if PDF_IMAGE_CACHE_MAX_ENTRIES <= 0:
+        return img
+    with _LOCK:
+        _CACHE[key] = img if img is not None else time.monotonic() + PDF_IMAGE_MISS_TTL_S
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > PDF_IMAGE_CACHE_MAX_ENTRIES:
+            _CACHE.popitem(last=False)
+    return img
+
+
+def _open(source) -> Optional[ImageReader]:
+    """ImageReader validado (lê o cabeçalho já aqui, não no meio do drawImage)."""
+    try:
+        img = ImageReader(source)
+        iw, ih = img.getSize()
+        return img if iw > 0 and ih > 0 else None
+    except Exception:
+        return None
+
+
+# ============================================================
+# Nível 2: bytes descarregados, em disco
+# ============================================================
+def _disk_path(url: str) -> Path:
+    return PDF_IMAGE_CACHE_DIR / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _disk_read(url: str, fresh_only: bool) -> Optional[bytes]:
+    path = _disk_path(url)
+    try:
+        if fresh_only and time.time() - path.stat().st_mtime > PDF_IMAGE_DISK_TTL_S:
+            return None
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+def _disk_write(url: str, data: bytes) -> None:
+    path = _disk_path(url)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # sem disco gravável: fica só a cache em memória
+
+
+def _fetch(url: str) -> Optional[bytes]:
+    with _LOCK:
+        _STATS["fetches"] += 1
+    try:
+        req = urllib.request.Request(url, headers={"User-Agent": "SailScore/1.0"})
+        with urllib.request.urlopen(req, timeout=PDF_IMAGE_FETCH_TIMEOUT_S) as resp:
+            return resp.read()
+    except Exception:
+        with _LOCK:
+            _STATS["fetch_errors"] += 1
+        return None
+
+
+# ============================================================
+# API
+# ============================================================
+def load_local_image(path: Path) -> Optional[ImageReader]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key = ("file", str(path), st.st_mtime_ns)
+    found, img = _cached(key)
+    if found:
+        return img
+    return _store(key, _open(str(path)))
+
+
+def load_remote_image(url: str) -> Optional[ImageReader]:
+    key = ("url", url)
+    found, img = _cached(key)
+    if found:
+        return img
+
+    with _LOCK:
+        fetch_lock = _FETCH_LOCKS.setdefault(url, threading.Lock())
+    with fetch_lock:
+        # outro pedido pode ter acabado de a carregar
+        found, img = _cached(key)
+        if found:
+            return img
+
+        data = _disk_read(url, fresh_only=True)
+        if data is not None:
+            with _LOCK:
+                _STATS["disk_hits"] += 1
+        else:
+            data = _fetch(url)
+            if data is not None:
+                _disk_write(url, data)
+            else:
+                data = _disk_read(url, fresh_only=False)
+                if data is not None:
+                    with _LOCK:
+                        _STATS["stale_served"] += 1
+        return _store(key, _open(io.BytesIO(data)) if data is not None else None)
+
+
+def load_image(url_or_path: str, root: Path) -> Optional[ImageReader]:
+    """Caminho local (/uploads/... ou relativo a `root`) ou URL http(s)."""
+    url_or_path = (url_or_path or "").strip()
+    if not url_or_path:
+        return None
+    if url_or_path.startswith("http://") or url_or_path.startswith("https://"):
+        return load_remote_image(url_or_path)
+    if url_or_path.startswith("/uploads/"):
+        return load_local_image(root / url_or_path.replace("/uploads/", "").lstrip("/"))
+    return load_local_image(root / url_or_path.lstrip("/"))
+
+
+def flag_image(alpha2: str) -> Optional[ImageReader]:
+    """Bandeira pelo código ISO alpha-2 (minúsculas): asset local, senão flagcdn."""
+    alpha2 = (alpha2 or "").strip().lower()
+    if not alpha2:
+        return None
+    local = FLAG_ASSETS_DIR / f"{alpha2}.png"
+    if local.is_file():
+        return load_local_image(local)
+    return load_remote_image(FLAG_URL_TEMPLATE.format(alpha2=alpha2))
+
+
+def cache_stats() -> dict:
+    with _LOCK:
+        return {
+            "max_entries": PDF_IMAGE_CACHE_MAX_ENTRIES,
+            "entries": len(_CACHE),
+            "disk_dir": str(PDF_IMAGE_CACHE_DIR),
+            **_STATS,
+        }
+
+
+def clear_cache(reset_stats: bool = False) -> None:
+    with _LOCK:
+        _CACHE.clear()
+        if reset_stats:
+            for k in _STATS:
+                _STATS[k] = 0
@@ -0,0 +1,418 @@
+# app/services/pdf_render_pool.py
+"""
+Render dos PDFs de resultados (overall e race) fora do pedido, com os PDFs prontos em disco.
+
+- Chave do PDF = (tipo, regata, classe/race, content_version da regata, colunas, sponsors,
+  versão do layout). `content_version` sobe em qualquer escrita de results, publicação,
+  entries ou da própria regata (ver http_cache); os sponsors não são rastreados por
+  regata e entram como impressão digital das linhas. A versão do layout é o mtime de
+  results_pdf.py: um deploy com layout novo não serve PDFs antigos.
+- PDFs prontos em PDF_ARTIFACT_DIR (um ficheiro por sha256 da chave, escrita atómica);
+  um PDF inalterado é servido com FileResponse: nenhum render, só a leitura do ficheiro.
+  Ficam no máximo PDF_ARTIFACT_MAX_FILES (apagam-se os mais antigos).
+- Renders num pool (PDF_RENDER_POOL_KIND: thread (default) | process | off, com
+  PDF_RENDER_WORKERS workers). Os jobs recebem snapshots picklable
+  (SimpleNamespace/dicts), nunca objetos ORM: o pedido não segura a sessão.
+    * thread: o render não corre no pedido, sem processos nem memória extra; o
+      reportlab segura o GIL, mas o ganho principal vem dos PDFs prontos em disco.
+    * process: opt-in, como no scoring_pool: "spawn", e cada processo importa a app
+      e o reportlab — PDF_RENDER_WORKERS interpretadores a mais por worker uvicorn
+      não cabem no plano de 512 MB do Dockerfile.
+- Pedidos iguais em simultâneo partilham o mesmo job. No máximo PDF_RENDER_QUEUE_MAX
+  jobs em espera/a correr por processo; acima disso 503 com Retry-After.
+- O job_id é o sha256 da chave: o estado (GET /results/pdf-jobs/{job_id}) responde
+  "done" em qualquer worker uvicorn assim que o ficheiro existe. A partilha de jobs em
+  curso é só dentro do processo.
+- O endpoint do PDF espera até PDF_RENDER_WAIT_S; passado isso (ou com ?wait=false)
+  responde 202 com o estado do job.
+
+Se o pool falhar (processo morto, erro de pickling), recria-se e o render corre no
+próprio pedido — o download nunca falha por causa do pool.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+from app.services import results_pdf
+
+logger = logging.getLogger("sailscore")
+
+PDF_RENDER_POOL_KIND = os.getenv("PDF_RENDER_POOL_KIND", "thread").strip().lower()
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(2, os.cpu_count() or 1))))
+PDF_RENDER_QUEUE_MAX = int(os.getenv("PDF_RENDER_QUEUE_MAX", "16"))
+PDF_RENDER_WAIT_S = float(os.getenv("PDF_RENDER_WAIT_S", "20"))
+PDF_RENDER_JOBS_MAX = int(os.getenv("PDF_RENDER_JOBS_MAX", "256"))
+PDF_ARTIFACT_DIR = Path(
+    os.getenv("PDF_ARTIFACT_DIR", str(Path(tempfile.gettempdir()) / "sailscore-results-pdf"))
+)
+PDF_ARTIFACT_MAX_FILES = int(os.getenv("PDF_ARTIFACT_MAX_FILES", "500"))
+
+_REGATTA_FIELDS = ("name", "start_date", "end_date", "listing_logo_url", "home_images", "results_overall_columns")
+_RACE_FIELDS = ("name", "class_name", "date", "start_time")
+_RESULT_FIELDS = (
+    "position", "fleet_name", "sail_number", "boat_country_code", "boat_name", "skipper_name",
+    "class_name", "boat_model", "bow_number", "rating", "finish_time", "elapsed_time",
+    "corrected_time", "delta", "code", "points",
+)
+
+_LOCK = threading.Lock()
+_EXECUTOR: Optional[Executor] = None
+_INFLIGHT: Dict[str, "PdfJob"] = {}
+_JOBS: "OrderedDict[str, PdfJob]" = OrderedDict()
+_STATS = {"artifact_hits": 0, "renders": 0, "shared": 0, "rejected": 0, "failed": 0, "inline": 0}
+
+
+@dataclass
+class PdfJob:
+    job_id: str
+    filename: str
+    status: str = "queued"  # queued | running | done | failed
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    render_ms: Optional[float] = None
+    error: Optional[str] = None
+    future: Optional[Future] = field(default=None, repr=False)
+    finished: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def path(self) -> Path:
+        return artifact_path(self.job_id)
+
+    def to_dict(self) -> dict:
+        status = self.status
+        if status == "queued" and self.future is not None and self.future.running():
+            status = "running"
+        return {
+            "job_id": self.job_id,
+            "status": status,
+            "filename": self.filename,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "render_ms": self.render_ms,
+            "error": self.error,
+            "status_url": f"/results/pdf-jobs/{self.job_id}",
+            "download_url": f"/results/pdf-jobs/{self.job_id}/file" if status == "done" else None,
+        }
+
+
+# ============================================================
+# Snapshots e chave
+# ============================================================
+def _snapshot(obj: Any, fields: Sequence[str]) -> SimpleNamespace:
+    # só os atributos que o objeto tem: os getattr(..., default) do results_pdf mantêm-se iguais
+    return SimpleNamespace(**{f: getattr(obj, f) for f in fields if hasattr(obj, f)})
+
+
+def regatta_snapshot(regatta: Any) -> SimpleNamespace:
+    return _snapshot(regatta, _REGATTA_FIELDS)
+
+
+def race_snapshot(race: Any) -> SimpleNamespace:
+    return _snapshot(race, _RACE_FIELDS)
+
+
+def result_snapshots(results: Iterable[Any]) -> list[SimpleNamespace]:
+    return [_snapshot(r, _RESULT_FIELDS) for r in results]
+
+
+def sponsor_snapshots(sponsors: Iterable[Any]) -> list[SimpleNamespace]:
+    return [SimpleNamespace(category=s.category, image_url=s.image_url) for s in sponsors]
+
+
+def sponsors_fingerprint(sponsors: Iterable[Any]) -> str:
+    rows = [(s.id, s.category, s.image_url, s.sort_order) for s in sponsors]
+    return hashlib.sha256(repr(rows).encode("utf-8")).hexdigest()[:16]
+
+
+def _layout_version() -> int:
+    try:
+        return Path(results_pdf.__file__).stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def pdf_key(kind: str, regatta: Any, subject: Any, sponsors: Sequence[Any]) -> tuple:
+    """Chave de um PDF: muda com os resultados/regata (content_version), colunas, sponsors e layout."""
+    return (
+        kind,
+        int(regatta.id),
+        subject,
+        int(getattr(regatta, "content_version", 0) or 0),
+        repr(getattr(regatta, "results_overall_columns", None)),
+        sponsors_fingerprint(sponsors),
+        _layout_version(),
+    )
+
+
+def job_id_for(key: tuple) -> str:
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+
+def artifact_path(job_id: str) -> Path:
+    return PDF_ARTIFACT_DIR / f"{job_id}.pdf"
+
+
+# ============================================================
+# Render (corre nos workers)
+# ============================================================
+def _render_to_file(kind: str, args: tuple, path: str) -> float:
+    """Render + escrita atómica do ficheiro; devolve o tempo de render em ms."""
+    t0 = time.perf_counter()
+    if kind == "overall":
+        pdf_bytes = results_pdf.build_results_pdf(*args)
+    else:
+        pdf_bytes = results_pdf.build_race_results_pdf(*args)
+    render_ms = (time.perf_counter() - t0) * 1000.0
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(target.parent), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(pdf_bytes)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return render_ms
+
+
+def _prune_artifacts() -> None:
+    if PDF_ARTIFACT_MAX_FILES <= 0:
+        return
+    try:
+        files = [(p.stat().st_mtime, p) for p in PDF_ARTIFACT_DIR.glob("*.pdf")]
+    except OSError:
+        return
+    if len(files) <= PDF_ARTIFACT_MAX_FILES:
+        return
+    files.sort()
+    for _, p in files[: len(files) - PDF_ARTIFACT_MAX_FILES]:
+        try:
+            p.unlink()
+        except OSError:
+            pass
+
+
+# ============================================================
+# Pool
+# ============================================================
+def pool_enabled() -> bool:
+    return PDF_RENDER_POOL_KIND in ("process", "thread") and PDF_RENDER_WORKERS >= 1
+
+
+def _get_executor() -> Executor:
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is None:
+            if PDF_RENDER_POOL_KIND == "thread":
+                _EXECUTOR = ThreadPoolExecutor(max_workers=PDF_RENDER_WORKERS, thread_name_prefix="pdf-render")
+            else:
+                _EXECUTOR = ProcessPoolExecutor(
+                    max_workers=PDF_RENDER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return _EXECUTOR
+
+
+def _reset_executor() -> None:
+    global _EXECUTOR
+    with _LOCK:
+        ex, _EXECUTOR = _EXECUTOR, None
+    if ex is not None:
+        ex.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown_pool() -> None:
+    _reset_executor()
+
+
+def _remember(job: PdfJob) -> None:
+    # chamado com _LOCK
+    _JOBS[job.job_id] = job
+    _JOBS.move_to_end(job.job_id)
+    while len(_JOBS) > PDF_RENDER_JOBS_MAX:
+        _JOBS.popitem(last=False)
+
+
+def _finish(job: PdfJob, render_ms: Optional[float], error: Optional[BaseException]) -> None:
+    with _LOCK:
+        job.finished_at = time.time()
+        if error is None:
+            job.status = "done"
+            job.render_ms = render_ms
+            _STATS["renders"] += 1
+        else:
+            job.status = "failed"
+            job.error = str(error) or type(error).__name__
+            _STATS["failed"] += 1
+        job.future = None
+        _INFLIGHT.pop(job.job_id, None)
+    job.finished.set()
+    if error is None:
+        _prune_artifacts()
+    else:
+        logger.error("pdf render %s failed: %s", job.job_id[:12], job.error)
+
+
+def _render_inline(job: PdfJob, kind: str, args: tuple) -> None:
+    with _LOCK:
+        _STATS["inline"] += 1
+    try:
+        render_ms = _render_to_file(kind, args, str(job.path))
+    except Exception as e:
+        _finish(job, None, e)
+    else:
+        _finish(job, render_ms, None)
+
+
+def _on_done(job: PdfJob, kind: str, args: tuple, fut: Future) -> None:
+    if fut.cancelled():
+        _finish(job, None, RuntimeError("render cancelled"))
+        return
+    error = fut.exception()
+    if error is None:
+        _finish(job, fut.result(), None)
+    elif isinstance(error, BrokenProcessPool):
+        logger.error("pdf render pool falhou; a fazer o render no pedido")
+        _reset_executor()
+        _render_inline(job, kind, args)
+    else:
+        _finish(job, None, error)
+
+
+# ============================================================
+# API
+# ============================================================
+def _existing(job_id: str, filename: str) -> Optional[PdfJob]:
+    # chamado com _LOCK: job em curso com a mesma chave, ou o PDF já em disco
+    running = _INFLIGHT.get(job_id)
+    if running is not None:
+        _STATS["shared"] += 1
+        return running
+    if not artifact_path(job_id).is_file():
+        return None
+    _STATS["artifact_hits"] += 1
+    job = _JOBS.get(job_id)
+    if job is None or job.status != "done":
+        job = PdfJob(job_id=job_id, filename=filename, status="done", finished_at=time.time())
+        job.finished.set()
+        _remember(job)
+    return job
+
+
+def cached_job(key: tuple, filename: str) -> Optional[PdfJob]:
+    """O PDF já existe (ou está a ser feito) com esta chave? Não submete nada."""
+    with _LOCK:
+        return _existing(job_id_for(key), filename)
+
+
+def submit_render(key: tuple, filename: str, kind: str, args: tuple) -> PdfJob:
+    """
+    Job do PDF com esta chave: já pronto (ficheiro em disco), o job em curso com a mesma
+    chave, ou um novo no pool. `args` são os argumentos do builder (snapshots picklable).
+    """
+    job_id = job_id_for(key)
+    path = artifact_path(job_id)
+    with _LOCK:
+        job = _existing(job_id, filename)
+        if job is not None:
+            return job
+        if len(_INFLIGHT) >= PDF_RENDER_QUEUE_MAX:
+            _STATS["rejected"] += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Too many PDFs being generated right now. Please try again shortly.",
+                headers={"Retry-After": "5"},
+            )
+        job = PdfJob(job_id=job_id, filename=filename)
+        _INFLIGHT[job_id] = job
+        _remember(job)
+
+    if not pool_enabled():
+        _render_inline(job, kind, args)
+        return job
+    try:
+        fut = _get_executor().submit(_render_to_file, kind, args, str(path))
+    except Exception:
+        logger.exception("pdf render pool falhou; a fazer o render no pedido")
+        _reset_executor()
+        _render_inline(job, kind, args)
+        return job
+    with _LOCK:
+        if job.status == "queued":
+            job.future = fut
+    fut.add_done_callback(lambda f: _on_done(job, kind, args, f))
+    return job
+
+
+def get_job(job_id: str) -> Optional[PdfJob]:
+    with _LOCK:
+        job = _JOBS.get(job_id)
+    if job is not None:
+        return job
+    # render feito por outro worker (ou antes de um restart): basta o ficheiro
+    if len(job_id) == 64 and all(c in "0123456789abcdef" for c in job_id) and artifact_path(job_id).is_file():
+        job = PdfJob(job_id=job_id, filename="results.pdf", status="done")
+        job.finished.set()
+        return job
+    return None
+
+
+def file_response(job: PdfJob) -> FileResponse:
+    return FileResponse(
+        job.path,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{job.filename}"'},
+    )
+
+
+def pdf_response(job: PdfJob, wait: bool) -> Response:
+    """Ficheiro se ficar pronto dentro do PDF_RENDER_WAIT_S; senão 202 com o estado do job."""
+    if wait and PDF_RENDER_WAIT_S > 0:
+        job.finished.wait(PDF_RENDER_WAIT_S)
+    if job.status == "done":
+        return file_response(job)
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail="PDF generation failed")
+    return JSONResponse(job.to_dict(), status_code=202, headers={"Retry-After": "2"})
+
+
+def render_stats() -> dict:
+    with _LOCK:
+        return {
+            "kind": PDF_RENDER_POOL_KIND,
+            "workers": PDF_RENDER_WORKERS,
+            "queue_max": PDF_RENDER_QUEUE_MAX,
+            "in_flight": len(_INFLIGHT),
+            "jobs": len(_JOBS),
+            "artifact_dir": str(PDF_ARTIFACT_DIR),
+            **_STATS,
+        }
+
+
+def reset_render_stats() -> None:
+    with _LOCK:
+        for k in _STATS:
+            _STATS[k] = 0
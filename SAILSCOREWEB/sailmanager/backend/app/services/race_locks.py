@@ -0,0 +1,187 @@
+# app/services/race_locks.py
+"""
+Lock de escrita por race: duas escritas de resultados da MESMA race (save em bloco,
+import CSV, patches de item, batch, e as escritas das entries — pago/confirmado,
+rename com propagate_keys, delete — via `lock_entries_races_for_write`) são
+serializadas durante toda a transação.
+
+Races diferentes da mesma regata não partilham este lock, mas todas incrementam as
+versões na linha da regata (`regattas.*_version`), que fica bloqueada até ao commit.
+Esse UPDATE é um só e é o último statement antes do COMMIT (ver regatta_versions):
+escritas de races diferentes só se serializam nesse instante final, não no trabalho.
+
+- `lock_race_for_write(db, race_id)` no início da escrita, antes de ler as linhas a mudar.
+  O lock dura até ao fim da transação (commit, rollback ou close) e é reentrante na sessão.
+- Postgres: `pg_advisory_xact_lock(namespace, race_id)`, válido entre workers/processos;
+  o tempo de espera é limitado por `lock_timeout` (RACE_LOCK_TIMEOUT_MS).
+- Outras DBs (SQLite local): um `threading.Lock` por race dentro do processo.
+- Várias races na mesma transação: `lock_races_for_write` adquire por ordem de id
+  (sem deadlocks entre imports de várias races).
+- Esgotado o tempo de espera: HTTP 409 (o cliente volta a tentar).
+- Tempos de espera em `lock_stats()` (GET /results/race-locks/stats).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable
+
+from fastapi import HTTPException
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger("sailscore")
+
+RACE_LOCKS_ENABLED = os.getenv("RACE_LOCKS_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+RACE_LOCK_TIMEOUT_MS = int(os.getenv("RACE_LOCK_TIMEOUT_MS", "10000"))
+# esperas acima disto contam como "contended" e ficam no log
+RACE_LOCK_SLOW_MS = float(os.getenv("RACE_LOCK_SLOW_MS", "250"))
+
+# 1.º argumento do advisory lock: separa estes locks de outros que usem ids de races
+RACE_LOCK_NAMESPACE = 0x52414345  # "RACE"
+
+_HELD_KEY = "race_write_locks"
+_LOCAL_KEY = "race_write_local_locks"
+
+_LOCK = threading.Lock()
+_LOCAL_LOCKS: Dict[int, threading.Lock] = {}
+_STATS = {
+    "acquired": 0,
+    "reentrant": 0,
+    "contended": 0,
+    "timeouts": 0,
+    "wait_ms_total": 0.0,
+    "wait_ms_max": 0.0,
+}
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="Results for this race are being updated by another request. Please try again.",
+    )
+
+
+def _record_wait(race_id: int, wait_ms: float) -> None:
+    with _LOCK:
+        _STATS["acquired"] += 1
+        _STATS["wait_ms_total"] += wait_ms
+        if wait_ms > _STATS["wait_ms_max"]:
+            _STATS["wait_ms_max"] = wait_ms
+        if wait_ms >= RACE_LOCK_SLOW_MS:
+            _STATS["contended"] += 1
+    if wait_ms >= RACE_LOCK_SLOW_MS:
+        logger.info("race %s: write lock wait %.0f ms", race_id, wait_ms)
+
+
+def _record_timeout(race_id: int) -> None:
+    with _LOCK:
+        _STATS["timeouts"] += 1
+    logger.warning("race %s: write lock timeout after %s ms", race_id, RACE_LOCK_TIMEOUT_MS)
+
+
+# ============================================================
+# Backends
+# ============================================================
+def _acquire_advisory(db: Session, race_id: int) -> None:
+    prev = db.execute(
+        text("SELECT current_setting('lock_timeout'), set_config('lock_timeout', :t, true)"),
+        {"t": f"{max(RACE_LOCK_TIMEOUT_MS, 0)}ms"},
+    ).first()[0]
+    try:
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:ns, :race_id)"),
+            {"ns": RACE_LOCK_NAMESPACE, "race_id": race_id},
+        )
+    except OperationalError as e:
+        # 55P03 = lock_not_available; a transação fica abortada e é desfeita pelo get_db
+        if getattr(e.orig, "pgcode", None) == "55P03":
+            _record_timeout(race_id)
+            raise _busy() from e
+        raise
+    db.execute(text("SELECT set_config('lock_timeout', :t, true)"), {"t": prev})
+
+
+def _acquire_local(db: Session, race_id: int) -> None:
+    db.connection()  # garante uma transação: o lock sai no after_transaction_end
+    with _LOCK:
+        lock = _LOCAL_LOCKS.setdefault(race_id, threading.Lock())
+    timeout = RACE_LOCK_TIMEOUT_MS / 1000.0 if RACE_LOCK_TIMEOUT_MS > 0 else -1
+    if not lock.acquire(timeout=timeout):
+        _record_timeout(race_id)
+        raise _busy()
+    db.info.setdefault(_LOCAL_KEY, []).append(lock)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_race_locks(session: Session, transaction) -> None:
+    # advisory xact locks já foram libertados pela DB; os locais libertam-se aqui
+    if transaction.parent is not None:
+        return
+    session.info.pop(_HELD_KEY, None)
+    for lock in reversed(session.info.pop(_LOCAL_KEY, None) or ()):
+        lock.release()
+
+
+# ============================================================
+# API
+# ============================================================
+def _expire_race_results(db: Session, race_id: int) -> None:
+    # linhas lidas antes do lock podem ter sido mudadas pelo escritor anterior
+    for obj in list(db.identity_map.values()):
+        if (
+            isinstance(obj, models.Result)
+            and obj.__dict__.get("race_id") == race_id
+            and not db.is_modified(obj)
+        ):
+            db.expire(obj)
+
+
+def lock_race_for_write(db: Session, race_id: int) -> None:
+    """Serializa as escritas nesta race até ao fim da transação (409 se a espera esgotar)."""
+    if not RACE_LOCKS_ENABLED or race_id is None:
+        return
+    rid = int(race_id)
+    held = db.info.setdefault(_HELD_KEY, set())
+    if rid in held:
+        with _LOCK:
+            _STATS["reentrant"] += 1
+        return
+
+    t0 = time.perf_counter()
+    if db.get_bind().dialect.name == "postgresql":
+        _acquire_advisory(db, rid)
+    else:
+        _acquire_local(db, rid)
+    held.add(rid)
+    _record_wait(rid, (time.perf_counter() - t0) * 1000.0)
+    _expire_race_results(db, rid)
+
+
+def lock_races_for_write(db: Session, race_ids: Iterable[int]) -> None:
+    """Várias races na mesma transação: sempre por ordem de id."""
+    for rid in sorted({int(r) for r in race_ids if r is not None}):
+        lock_race_for_write(db, rid)
+
+
+def lock_stats() -> dict:
+    with _LOCK:
+        acquired = _STATS["acquired"]
+        return {
+            "enabled": RACE_LOCKS_ENABLED,
+            "timeout_ms": RACE_LOCK_TIMEOUT_MS,
+            "local_locks": len(_LOCAL_LOCKS),
+            **_STATS,
+            "wait_ms_avg": (_STATS["wait_ms_total"] / acquired) if acquired else 0.0,
+        }
+
+
+def reset_lock_stats() -> None:
+    with _LOCK:
+        for k in _STATS:
+            _STATS[k] = 0.0 if k.startswith("wait_ms") else 0
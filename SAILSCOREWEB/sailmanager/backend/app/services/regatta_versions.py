@@ -0,0 +1,77 @@
+# app/services/regatta_versions.py
+"""
+Incremento das versões da regata (`regattas.results_version`, `results_structure_version`,
+`content_version`, `entries_version`) no commit, com UM UPDATE por regata.
+
+- `bump_on_commit(db, regatta_id, *colunas)` marca as colunas a incrementar nesta sessão
+  (standings_cache, http_cache e competitor_cache marcam as suas).
+- Um único listener de before_commit: faz o flush pendente (os before_flush que detetam
+  escritas ORM ainda marcam), corre os hooks dos caches (`on_commit`: ex. versões das
+  races) e só então atualiza `regattas`. O UPDATE da linha da regata é o ÚLTIMO statement
+  antes do COMMIT: o lock dessa linha dura só o commit, e escritas em races diferentes
+  da mesma regata só se cruzam nesse instante.
+- Rollback: as marcas são descartadas, nenhuma versão sobe.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app import models
+
+VERSION_COLUMNS = ("results_version", "results_structure_version", "content_version", "entries_version")
+
+_BUMPS_KEY = "regatta_version_bumps"
+_HOOKS: List[Callable[[Session], None]] = []
+
+
+def bump_on_commit(db: Session, regatta_id: Optional[int], *columns: str) -> None:
+    """Incrementa estas colunas de versão da regata no próximo commit (uma vez por commit)."""
+    if regatta_id is None:
+        return
+    try:
+        rid = int(regatta_id)
+    except (TypeError, ValueError):
+        return
+    db.info.setdefault(_BUMPS_KEY, {}).setdefault(rid, set()).update(columns)
+
+
+def on_commit(fn: Callable[[Session], None]) -> Callable[[Session], None]:
+    """Regista um hook que corre no before_commit, depois do flush e antes do UPDATE de `regattas`."""
+    _HOOKS.append(fn)
+    return fn
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_version_bumps(session: Session) -> None:
+    # o flush do commit só corre depois deste evento: forçá-lo para os before_flush marcarem
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    for hook in _HOOKS:
+        hook(session)
+
+    bumps: Dict[int, Set[str]] = session.info.pop(_BUMPS_KEY, None) or {}
+    # regatas com as mesmas colunas partilham o statement; cada regata aparece num só
+    by_columns: Dict[frozenset, List[int]] = {}
+    for rid, columns in bumps.items():
+        if columns:
+            by_columns.setdefault(frozenset(columns), []).append(rid)
+
+    for columns, regatta_ids in by_columns.items():
+        values = {c: getattr(models.Regatta, c) + 1 for c in VERSION_COLUMNS if c in columns}
+        if "content_version" in columns:
+            values["content_updated_at"] = datetime.now(timezone.utc)
+        session.execute(
+            update(models.Regatta)
+            .where(models.Regatta.id.in_(sorted(regatta_ids)))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_bumps_on_rollback(session: Session) -> None:
+    session.info.pop(_BUMPS_KEY, None)
@@ -19,7 +19,6 @@ from __future__ import annotations
 import io
 import math
 import os
-import urllib.request
 from pathlib import Path
 from typing import Any, Iterable, Dict, List
 
@@ -29,6 +28,8 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase import pdfmetrics
 
+from app.services import pdf_images
+
 # ISO 3166-1 alpha-3 (World Sailing) -> alpha-2 for flagcdn
 CODE_TO_ALPHA2: dict[str, str] = {
     "ALG": "DZ", "ARG": "AR", "AUS": "AU", "AUT": "AT", "BEL": "BE", "BRA": "BR",
@@ -142,31 +143,17 @@ def _alpha2_for_flag(boat_country_code: str | None) -> str:
 
 
 def _load_image(url_or_path: str, root: Path | None = None) -> ImageReader | None:
-    """Load image from local path (if /uploads/...) or from URL (e.g. flagcdn)."""
-    url_or_path = (url_or_path or "").strip()
-    if not url_or_path:
+    """Load image from local path (if /uploads/...) or from URL, via the PDF image cache."""
+    try:
+        return pdf_images.load_image(url_or_path, root or FILES_ROOT)
+    except Exception:
         return None
 
-    base_root = root or FILES_ROOT
 
+def _flag_image(alpha2: str) -> ImageReader | None:
+    """Flag for an ISO alpha-2 code: bundled asset, else flagcdn (cached)."""
     try:
-        if url_or_path.startswith("/uploads/"):
-            rel = url_or_path.replace("/uploads/", "").lstrip("/")
-            path = base_root / rel
-            if path.exists():
-                return ImageReader(str(path))
-            return None
-
-        if url_or_path.startswith("http://") or url_or_path.startswith("https://"):
-            req = urllib.request.Request(url_or_path, headers={"User-Agent": "SailScore/1.0"})
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                return ImageReader(io.BytesIO(resp.read()))
-
-        local_path = base_root / url_or_path.lstrip("/")
-        if local_path.exists():
-            return ImageReader(str(local_path))
-
-        return None
+        return pdf_images.flag_image(alpha2)
     except Exception:
         return None
 
@@ -609,8 +596,7 @@ def _draw_overall_table_row(
             text_x = x_cell
             if alpha2:
                 try:
-                    flag_url = f"https://flagcdn.com/w40/{alpha2}.png"
-                    img = _load_image(flag_url)
+                    img = _flag_image(alpha2)
                     if img:
                         iw, ih = img.getSize()
                         if ih > 0:
@@ -711,8 +697,7 @@ def _draw_race_table_row(
             text_x = x_cell
             if alpha2:
                 try:
-                    flag_url = f"https://flagcdn.com/w40/{alpha2}.png"
-                    img = _load_image(flag_url)
+                    img = _flag_image(alpha2)
                     if img:
                         iw, ih = img.getSize()
                         if ih > 0:
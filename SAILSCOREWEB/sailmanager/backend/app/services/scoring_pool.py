@@ -0,0 +1,95 @@
+# app/services/scoring_pool.py
+"""
+Pool para pontuar classes em paralelo (overall multi-classe).
+
+As classes são independentes no scoring: cada job recebe o contexto da classe
+e as suas linhas de Result (tudo picklable) e devolve o estado calculado.
+
+- OVERALL_POOL_KIND: thread (default) | process | off
+    * thread: sem custo de pickling nem memória extra; o kernel NumPy liberta o GIL
+      nas operações sobre arrays.
+    * process: paralelismo real para o caminho Python puro, mas opt-in: usa "spawn"
+      (fazer fork de um worker uvicorn com threads ativas pode herdar locks presos) e
+      cada processo importa a app inteira — com vários workers uvicorn não cabe no
+      plano de 512 MB do Dockerfile.
+- OVERALL_POOL_WORKERS: nº de workers (default min(4, CPUs)); <= 1 => em série.
+- OVERALL_POOL_MIN_RESULTS: abaixo deste nº de results o pool não compensa
+  (pickling + IPC) e corre em série.
+
+Se o pool falhar (ex.: processo morto), recria-se na próxima chamada e esta
+corre em série — o pedido nunca falha por causa do pool.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("sailscore")
+
+OVERALL_POOL_KIND = os.getenv("OVERALL_POOL_KIND", "thread").strip().lower()
+OVERALL_POOL_WORKERS = int(os.getenv("OVERALL_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+OVERALL_POOL_MIN_RESULTS = int(os.getenv("OVERALL_POOL_MIN_RESULTS", "2000"))
+
+_LOCK = threading.Lock()
+_EXECUTOR: Optional[Executor] = None
+
+
+def pool_enabled() -> bool:
+    return OVERALL_POOL_KIND in ("process", "thread") and OVERALL_POOL_WORKERS > 1
+
+
+def _get_executor() -> Executor:
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is None:
+            if OVERALL_POOL_KIND == "thread":
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=OVERALL_POOL_WORKERS, thread_name_prefix="overall-scoring"
+                )
+            else:
+                _EXECUTOR = ProcessPoolExecutor(
+                    max_workers=OVERALL_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return _EXECUTOR
+
+
+def _reset_executor() -> None:
+    global _EXECUTOR
+    with _LOCK:
+        ex, _EXECUTOR = _EXECUTOR, None
+    if ex is not None:
+        ex.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown_pool() -> None:
+    _reset_executor()
+
+
+def run_jobs(
+    fn: Callable[..., Any],
+    jobs: Sequence[Tuple[Any, ...]],
+    work_size: int = 0,
+) -> List[Any]:
+    """
+    `fn(*job)` para cada job, pela ordem dos jobs. `fn` tem de ser uma função
+    de módulo (picklable). `work_size` (ex.: nº de results) decide se vale a pena paralelizar.
+    """
+    if not pool_enabled() or len(jobs) < 2 or work_size < OVERALL_POOL_MIN_RESULTS:
+        return [fn(*job) for job in jobs]
+
+    try:
+        executor = _get_executor()
+        futures = [executor.submit(fn, *job) for job in jobs]
+        return [f.result() for f in futures]
+    except Exception:
+        # BrokenProcessPool, erro de pickling, etc.: recriar o pool e fazer em série
+        logger.exception("scoring pool falhou; a calcular em série")
+        _reset_executor()
+        return [fn(*job) for job in jobs]
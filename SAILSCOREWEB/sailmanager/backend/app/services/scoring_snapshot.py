@@ -0,0 +1,272 @@
+# app/services/scoring_snapshot.py
+"""
+Snapshot de tudo o que o scoring do overall lê da DB (exceto as linhas de Result),
+carregado num número FIXO de queries set-based, independentemente do nº de classes:
+
+  1. regatta (defaults de discards + scoring codes)
+  2. races da regata
+  3. publicação (K races publicadas) de todas as classes
+  4. class settings
+  5. fleet sets da regata
+  6. membros (fleet + entry) dos fleet sets relevantes   (só se houver algum)
+  7. entries (só colunas usadas)
+  8. regatta classes (class_type)
+
+Só projeções de colunas (Row tuples): nada de objetos Entry/Race completos
+nem identity map. A estrutura devolvida é imutável — quem consome deriva o resto.
+
+Sem `class_name` carrega a regata inteira; `for_class()` parte-o por classe sem
+voltar à DB (o resultado é igual ao de carregar só essa classe).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+@dataclass(frozen=True)
+class RegattaScoringSnapshot:
+    regatta_id: int
+    class_name: Optional[str]
+    discard_count: int
+    discard_threshold: int
+    scoring_codes: Any
+    # todas as races da regata, por (order_index, id)
+    races: Tuple[Row, ...]
+    # class_name -> (published_races_count, published_at)
+    publications: Mapping[str, Row]
+    # class_name -> settings row
+    class_settings: Mapping[str, Row]
+    # (id, class_name, phase, created_at) por created_at desc, id desc
+    fleet_sets: Tuple[Row, ...]
+    # fleet_set_id -> ((fleet_name, fleet_order_index, entry_regatta_id, class_name, sail_number, boat_country_code), ...)
+    fleet_members: Mapping[int, Tuple[Row, ...]]
+    # entries da regata (filtradas por classe com lower/trim, como build_eligible_result_identities)
+    entries: Tuple[Row, ...]
+    # lower(class_name) -> class_type
+    class_types: Mapping[str, str]
+    # nomes das classes configuradas (trim, sem duplicados por lower), ordenados;
+    # sem classes configuradas, as das races
+    class_names: Tuple[str, ...] = ()
+
+    def latest_fleet_set_id(self, class_name: str, phase: str) -> Optional[int]:
+        for fs in self.fleet_sets:
+            if fs.phase == phase and fs.class_name == class_name:
+                return int(fs.id)
+        return None
+
+    def for_class(self, class_name: str) -> "RegattaScoringSnapshot":
+        """Snapshot de uma classe, derivado de um snapshot da regata inteira."""
+        if self.class_name is not None:
+            raise ValueError("for_class() precisa de um snapshot da regata inteira")
+        norm = str(class_name).strip().lower()
+        return replace(
+            self,
+            class_name=class_name,
+            class_settings=MappingProxyType(
+                {k: v for k, v in self.class_settings.items() if k == class_name}
+            ),
+            entries=tuple(
+                e for e in self.entries if str(e.class_name or "").strip().lower() == norm
+            ),
+        )
+
+
+def load_scoring_snapshot(
+    db: Session,
+    regatta_id: int,
+    class_name: Optional[str] = None,
+) -> RegattaScoringSnapshot:
+    reg = (
+        db.query(
+            models.Regatta.id,
+            models.Regatta.discard_count,
+            models.Regatta.discard_threshold,
+            models.Regatta.scoring_codes,
+        )
+        .filter(models.Regatta.id == regatta_id)
+        .first()
+    )
+    if not reg:
+        raise HTTPException(404, "Regatta not found")
+
+    # todas as races da regata: as medal races de um FleetSet medal podem não estar
+    # entre as visíveis (classe/publicação) e o filtro final é feito em Python
+    races = tuple(
+        db.query(
+            models.Race.id,
+            models.Race.name,
+            models.Race.class_name,
+            models.Race.order_index,
+            models.Race.date,
+            models.Race.start_time,
+            models.Race.handicap_method,
+            models.Race.orc_rating_mode,
+            models.Race.is_medal_race,
+            models.Race.double_points,
+            models.Race.discardable,
+            models.Race.fleet_set_id,
+            models.Race.results_version,
+        )
+        .filter(models.Race.regatta_id == regatta_id)
+        .order_by(models.Race.order_index.asc(), models.Race.id.asc())
+        .all()
+    )
+
+    publications = {
+        str(p.class_name): p
+        for p in db.query(
+            models.RegattaClassPublication.class_name,
+            models.RegattaClassPublication.published_races_count,
+            models.RegattaClassPublication.published_at,
+        )
+        .filter(models.RegattaClassPublication.regatta_id == regatta_id)
+        .all()
+    }
+
+    cs_q = db.query(
+        models.RegattaClassSettings.class_name,
+        models.RegattaClassSettings.discard_count,
+        models.RegattaClassSettings.discard_threshold,
+        models.RegattaClassSettings.scoring_codes,
+        models.RegattaClassSettings.discard_schedule,
+        models.RegattaClassSettings.discard_schedule_active,
+    ).filter(models.RegattaClassSettings.regatta_id == regatta_id)
+    if class_name:
+        cs_q = cs_q.filter(models.RegattaClassSettings.class_name == class_name)
+    class_settings = {str(cs.class_name): cs for cs in cs_q.all() if cs.class_name}
+
+    fleet_sets = tuple(
+        db.query(
+            models.FleetSet.id,
+            models.FleetSet.class_name,
+            models.FleetSet.phase,
+            models.FleetSet.created_at,
+        )
+        .filter(models.FleetSet.regatta_id == regatta_id)
+        .order_by(models.FleetSet.created_at.desc(), models.FleetSet.id.desc())
+        .all()
+    )
+
+    # fleet sets que interessam: os das races + último medal por classe + último finals da classe
+    relevant_sets: set[int] = {int(r.fleet_set_id) for r in races if r.fleet_set_id is not None}
+    seen_medal: set[str] = set()
+    for fs in fleet_sets:
+        if fs.phase == "medal" and fs.class_name and fs.class_name not in seen_medal:
+            seen_medal.add(fs.class_name)
+            relevant_sets.add(int(fs.id))
+    # último finals da classe (ou de cada classe, se o snapshot é da regata inteira)
+    seen_finals: set[str] = set()
+    for fs in fleet_sets:
+        if fs.phase != "finals" or not fs.class_name or fs.class_name in seen_finals:
+            continue
+        if class_name and fs.class_name != class_name:
+            continue
+        seen_finals.add(fs.class_name)
+        relevant_sets.add(int(fs.id))
+
+    fleet_members: dict[int, list[Row]] = {}
+    if relevant_sets:
+        member_rows = (
+            db.query(
+                models.Fleet.fleet_set_id,
+                models.Fleet.name.label("fleet_name"),
+                models.Fleet.order_index.label("fleet_order_index"),
+                models.Entry.regatta_id.label("entry_regatta_id"),
+                models.Entry.class_name,
+                models.Entry.sail_number,
+                models.Entry.boat_country_code,
+            )
+            .join(models.FleetAssignment, models.FleetAssignment.fleet_id == models.Fleet.id)
+            .join(models.Entry, models.Entry.id == models.FleetAssignment.entry_id)
+            .filter(models.Fleet.fleet_set_id.in_(sorted(relevant_sets)))
+            .all()
+        )
+        for m in member_rows:
+            fleet_members.setdefault(int(m.fleet_set_id), []).append(m)
+
+    entries_q = db.query(
+        models.Entry.id,
+        models.Entry.class_name,
+        models.Entry.sail_number,
+        models.Entry.boat_country_code,
+        models.Entry.boat_name,
+        models.Entry.first_name,
+        models.Entry.last_name,
+        models.Entry.boat_model,
+        models.Entry.bow_number,
+        models.Entry.club,
+        models.Entry.paid,
+        models.Entry.confirmed,
+    ).filter(models.Entry.regatta_id == regatta_id)
+    if class_name:
+        entries_q = entries_q.filter(
+            func.lower(func.trim(models.Entry.class_name))
+            == func.lower(func.trim(str(class_name)))
+        )
+    entries = tuple(entries_q.all())
+
+    class_rows = (
+        db.query(models.RegattaClass.class_name, models.RegattaClass.class_type)
+        .filter(models.RegattaClass.regatta_id == regatta_id)
+        .all()
+    )
+    class_types: dict[str, str] = {}
+    for cname, ctype in class_rows:
+        class_types.setdefault(str(cname or "").lower(), ctype)
+
+    return RegattaScoringSnapshot(
+        regatta_id=int(regatta_id),
+        class_name=class_name,
+        discard_count=int(reg.discard_count or 0),
+        discard_threshold=int(reg.discard_threshold or 0),
+        scoring_codes=reg.scoring_codes,
+        races=races,
+        publications=MappingProxyType(publications),
+        class_settings=MappingProxyType(class_settings),
+        fleet_sets=fleet_sets,
+        fleet_members=MappingProxyType({k: tuple(v) for k, v in fleet_members.items()}),
+        entries=entries,
+        class_types=MappingProxyType(class_types),
+        class_names=_class_names(
+            [cname for cname, _ in class_rows], [r.class_name for r in races]
+        ),
+    )
+
+
+def _class_names(configured: Iterable[Any], from_races: Iterable[Any]) -> Tuple[str, ...]:
+    """Classes configuradas (trim, sem duplicados por lower), ordenadas; senão as das races."""
+    names: dict[str, str] = {}
+    for cname in configured:
+        trimmed = str(cname or "").strip()
+        if trimmed:
+            names.setdefault(trimmed.lower(), trimmed)
+    if not names:
+        return tuple(sorted({str(c) for c in from_races if c}))
+    return tuple(sorted(names.values()))
+
+
+def load_class_names(db: Session, regatta_id: int) -> Tuple[str, ...]:
+    """Só os nomes das classes (mesma regra que `RegattaScoringSnapshot.class_names`)."""
+    configured = [
+        c for (c,) in db.query(models.RegattaClass.class_name)
+        .filter(models.RegattaClass.regatta_id == regatta_id)
+        .all()
+    ]
+    from_races: list[Any] = []
+    if not any(str(c or "").strip() for c in configured):
+        from_races = [
+            c for (c,) in db.query(models.Race.class_name)
+            .filter(models.Race.regatta_id == regatta_id)
+            .distinct()
+            .all()
+        ]
+    return _class_names(configured, from_races)
@@ -0,0 +1,277 @@
+# app/services/standings_cache.py
+"""
+Cache dos standings overall (GET /results/overall/{regatta_id}).
+
+- Chave: (regatta_id, class_name, public, variant) -> (results_version, payload).
+  `variant` distingue formatos do mesmo overall (ex.: view/fields do payload).
+- `regattas.results_version` é incrementado no MESMO commit de qualquer escrita
+  que afete a pontuação (ver `mark_results_changed`). Como a versão vive na DB,
+  a invalidação é correta com vários workers uvicorn: cada leitura faz apenas
+  um SELECT da versão e, se bater certo, devolve o payload em memória.
+- Escritas confinadas aos resultados de uma race (`mark_results_changed(..., race_id=)`)
+  incrementam `races.results_version` e `regattas.results_version`; as restantes
+  incrementam também `regattas.results_structure_version` (as colunas de `regattas`
+  no UPDATE único de regatta_versions, no fim do commit). Com a estrutura igual, o valor em cache
+  pode ser atualizado via `refresh` (recompute incremental) em vez de recalculado.
+- O payload é partilhado entre pedidos: tratar como read-only.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.competitor_cache import mark_entries_changed
+from app.services.http_cache import mark_content_changed
+from app.services.regatta_versions import bump_on_commit, on_commit
+
+STANDINGS_CACHE_ENABLED = os.getenv("STANDINGS_CACHE_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+STANDINGS_CACHE_MAX_ENTRIES = int(os.getenv("STANDINGS_CACHE_MAX_ENTRIES", "256"))
+
+_DIRTY_KEY = "standings_dirty_regattas"
+_DIRTY_RACES_KEY = "standings_dirty_races"
+
+_LOCK = threading.Lock()
+_CACHE: "OrderedDict[Hashable, tuple[int, int, Any]]" = OrderedDict()
+_STATS = {"hits": 0, "misses": 0, "stale": 0, "incremental": 0, "bypass": 0}
+
+
+# ============================================================
+# Invalidação (write side)
+# ============================================================
+def mark_results_changed(
+    db: Session,
+    regatta_id: Optional[int],
+    race_id: Optional[int] = None,
+) -> None:
+    """
+    Marca a regata como alterada nesta sessão. A versão é incrementada
+    no commit, por isso um rollback não invalida nada.
+    Com `race_id`, a alteração fica confinada aos resultados dessa race.
+    """
+    if regatta_id is None:
+        return
+    try:
+        rid = int(regatta_id)
+    except (TypeError, ValueError):
+        return
+    # tudo o que muda standings muda também o conteúdo público (ETag)
+    mark_content_changed(db, rid)
+    if race_id is None:
+        db.info.setdefault(_DIRTY_KEY, set()).add(rid)
+        bump_on_commit(db, rid, "results_version", "results_structure_version")
+        # estrutural pode ser um bulk update de entries/fleets fora do ORM
+        mark_entries_changed(db, rid)
+    else:
+        db.info.setdefault(_DIRTY_RACES_KEY, {}).setdefault(rid, set()).add(int(race_id))
+        bump_on_commit(db, rid, "results_version")
+
+
+@on_commit
+def _bump_race_versions(session: Session) -> None:
+    dirty = session.info.pop(_DIRTY_KEY, None) or set()
+    dirty_races = session.info.pop(_DIRTY_RACES_KEY, None) or {}
+    if not dirty and not dirty_races:
+        return
+
+    race_ids = sorted({r for ids in dirty_races.values() for r in ids})
+    if race_ids:
+        session.execute(
+            update(models.Race)
+            .where(models.Race.id.in_(race_ids))
+            .values(results_version=models.Race.results_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+    # mudança estrutural: neste worker libertamos já as entradas antigas (os outros
+    # descobrem a nova versão na próxima leitura). Mudanças só de races ficam
+    # em cache como base do refresh incremental.
+    if dirty:
+        with _LOCK:
+            for key in [k for k in _CACHE if k[0] in dirty]:
+                _CACHE.pop(key, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_dirty_on_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
+    session.info.pop(_DIRTY_RACES_KEY, None)
+
+
+# ============================================================
+# Leitura
+# ============================================================
+def get_results_versions(db: Session, regatta_id: int) -> Optional[tuple[int, int]]:
+    """(results_version, results_structure_version) da regata, ou None se não existir."""
+    row = (
+        db.query(models.Regatta.results_version, models.Regatta.results_structure_version)
+        .filter(models.Regatta.id == regatta_id)
+        .first()
+    )
+    if row is None:
+        return None
+    return int(row[0] or 0), int(row[1] or 0)
+
+
+def get_results_version(db: Session, regatta_id: int) -> Optional[int]:
+    versions = get_results_versions(db, regatta_id)
+    return versions[0] if versions else None
+
+
+def _cache_key(regatta_id: int, class_name: Optional[str], public: bool, variant: Hashable) -> tuple:
+    return (int(regatta_id), (class_name or "").strip() or None, bool(public), variant)
+
+
+def _store(key: tuple, version: int, structure_version: int, value: Any) -> None:
+    """Chamar com _LOCK."""
+    cur = _CACHE.get(key)
+    # outro pedido pode ter guardado uma versão mais recente entretanto
+    if cur is None or cur[0] <= version:
+        _CACHE[key] = (version, structure_version, value)
+        _CACHE.move_to_end(key)
+    while len(_CACHE) > STANDINGS_CACHE_MAX_ENTRIES:
+        _CACHE.popitem(last=False)
+
+
+def get_or_compute(
+    db: Session,
+    regatta_id: int,
+    class_name: Optional[str],
+    public: bool,
+    compute: Callable[[], Any],
+    refresh: Optional[Callable[[Any], Any]] = None,
+    variant: Hashable = None,
+) -> Any:
+    """
+    Devolve o valor em cache para a versão atual, ou calcula e guarda.
+    Se a versão mudou mas a estrutura não, tenta `refresh(valor_antigo)`
+    (None => cálculo completo).
+    """
+    if not STANDINGS_CACHE_ENABLED or STANDINGS_CACHE_MAX_ENTRIES <= 0:
+        with _LOCK:
+            _STATS["bypass"] += 1
+        return compute()
+
+    # escritas pendentes nesta sessão ainda não têm versão nova -> não cachear
+    if db.info.get(_DIRTY_KEY) or db.info.get(_DIRTY_RACES_KEY):
+        with _LOCK:
+            _STATS["bypass"] += 1
+        return compute()
+
+    versions = get_results_versions(db, regatta_id)
+    if versions is None:
+        with _LOCK:
+            _STATS["bypass"] += 1
+        return compute()
+    version, structure_version = versions
+
+    key = _cache_key(regatta_id, class_name, public, variant)
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit is not None and hit[0] == version:
+            _CACHE.move_to_end(key)
+            _STATS["hits"] += 1
+            return hit[2]
+        if hit is not None:
+            _STATS["stale"] += 1
+        _STATS["misses"] += 1
+
+    payload = None
+    if refresh is not None and hit is not None and hit[1] == structure_version:
+        payload = refresh(hit[2])
+        if payload is not None:
+            with _LOCK:
+                _STATS["incremental"] += 1
+    if payload is None:
+        payload = compute()
+
+    with _LOCK:
+        _store(key, version, structure_version, payload)
+    return payload
+
+
+def get_many_or_compute(
+    db: Session,
+    regatta_id: int,
+    class_names: Sequence[str],
+    public: bool,
+    compute_many: Callable[[List[str]], Dict[str, Any]],
+    variant: Hashable = None,
+) -> Dict[str, Any]:
+    """
+    Versão multi-classe de `get_or_compute`: um só SELECT da versão, as classes
+    em cache são servidas daí e `compute_many(em_falta)` calcula as restantes
+    de uma vez (ex.: em paralelo). Partilha as entradas com `get_or_compute`.
+    """
+    names = list(class_names)
+    if not STANDINGS_CACHE_ENABLED or STANDINGS_CACHE_MAX_ENTRIES <= 0:
+        with _LOCK:
+            _STATS["bypass"] += 1
+        return compute_many(names)
+
+    # escritas pendentes nesta sessão ainda não têm versão nova -> não cachear
+    if db.info.get(_DIRTY_KEY) or db.info.get(_DIRTY_RACES_KEY):
+        with _LOCK:
+            _STATS["bypass"] += 1
+        return compute_many(names)
+
+    versions = get_results_versions(db, regatta_id)
+    if versions is None:
+        with _LOCK:
+            _STATS["bypass"] += 1
+        return compute_many(names)
+    version, structure_version = versions
+
+    out: Dict[str, Any] = {}
+    missing: List[str] = []
+    with _LOCK:
+        for cls in names:
+            key = _cache_key(regatta_id, cls, public, variant)
+            hit = _CACHE.get(key)
+            if hit is not None and hit[0] == version:
+                _CACHE.move_to_end(key)
+                _STATS["hits"] += 1
+                out[cls] = hit[2]
+                continue
+            if hit is not None:
+                _STATS["stale"] += 1
+            _STATS["misses"] += 1
+            missing.append(cls)
+
+    if missing:
+        computed = compute_many(missing)
+        with _LOCK:
+            for cls in missing:
+                _store(_cache_key(regatta_id, cls, public, variant), version, structure_version, computed[cls])
+        out.update(computed)
+    return {cls: out[cls] for cls in names}
+
+
+def cache_stats() -> dict:
+    with _LOCK:
+        hits = _STATS["hits"]
+        misses = _STATS["misses"]
+        total = hits + misses
+        return {
+            "enabled": STANDINGS_CACHE_ENABLED,
+            "max_entries": STANDINGS_CACHE_MAX_ENTRIES,
+            "entries": len(_CACHE),
+            "hits": hits,
+            "misses": misses,
+            "stale": _STATS["stale"],
+            "incremental": _STATS["incremental"],
+            "bypass": _STATS["bypass"],
+            "hit_ratio": round(hits / total, 4) if total else None,
+        }
+
+
+def clear_cache(reset_stats: bool = False) -> None:
+    with _LOCK:
+        _CACHE.clear()
+        if reset_stats:
+            for k in _STATS:
+                _STATS[k] = 0
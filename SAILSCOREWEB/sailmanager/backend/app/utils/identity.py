@@ -0,0 +1,24 @@
+"""Canonical competitor identity (class + sail number + country) shared by results and entries.
+
+`identity_key` is persisted in `results.identity_key` / `entries.identity_key` so that
+matching a result to its entry is an indexed equality lookup instead of a scan with
+lower()/trim() on every row.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+
+def class_identity_key(class_name: Any) -> str:
+    return str(class_name or "").strip().lower()
+
+
+def sail_country_key(sail_number: Any, boat_country_code: Any) -> str:
+    sn = (str(sail_number) if sail_number is not None else "").strip().upper()
+    cc = (str(boat_country_code) if boat_country_code is not None else "").strip().upper()
+    return f"{sn}||{cc}"
+
+
+def identity_key(class_name: Any, sail_number: Any, boat_country_code: Any) -> str:
+    """'classe|VELA||PAÍS' — classe em minúsculas, vela e país em maiúsculas, sem espaços nas pontas."""
+    return f"{class_identity_key(class_name)}|{sail_country_key(sail_number, boat_country_code)}"
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Gerador de regatas sintéticas para benchmarks locais (SQLite).
+
+Cria uma regata parametrizável diretamente na DB (sem passar pela API), com
+resultados já normalizados (posições compactas + pontos low-point):
+
+  - classes one design e handicap (corrected_time, empates por tempo igual)
+  - fleet set de qualificação com N fleets (posições por fleet)
+  - medal race (fleet set "medal" com os 10 primeiros)
+  - mistura de codes (DNF/DNC/OCS/...) e densidade de empates
+    (pares de barcos com resultados espelhados -> empates no overall / A8)
+
+Uso (seed de uma DB para inspecionar / correr a API contra ela):
+  python scripts/bench_regatta_generator.py --db /tmp/bench.db --boats 80 --classes 3 --races 10 --fleets 2 --medal
+
+IMPORTANTE: a DATABASE_URL tem de apontar para a DB de benchmark ANTES de importar
+`app` (ver `use_database`).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# backend root no path (se correres a partir da pasta backend)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+CODE_MIX = ("DNF", "DNC", "OCS", "DSQ", "DNS", "UFD", "RET", "BFD")
+MEDAL_FLEET_SIZE = 10
+
+
+@dataclass
+class RegattaSpec:
+    classes: int = 2
+    boats_per_class: int = 60
+    races: int = 10
+    # 0/1 = sem fleets; >= 2 = fleet set de qualificação com N fleets (todas as races exceto a medal)
+    fleets: int = 0
+    medal_race: bool = False
+    # quantas das classes são handicap (as últimas)
+    handicap_classes: int = 0
+    # probabilidade de um resultado ter code (N+1)
+    code_rate: float = 0.05
+    # fração de barcos em pares "gémeos" (mesmos pontos totais -> tiebreaks)
+    tie_rate: float = 0.1
+    discard_count: int = 1
+    discard_threshold: int = 4
+    seed: int = 1
+
+
+@dataclass
+class GeneratedRegatta:
+    regatta_id: int
+    class_names: List[str]
+    race_ids_by_class: Dict[str, List[int]] = field(default_factory=dict)
+    handicap_classes: List[str] = field(default_factory=list)
+    results: int = 0
+
+
+def use_database(path: str, *, fresh: bool = True) -> str:
+    """Aponta a app para uma DB SQLite de benchmark. Chamar antes de importar `app`."""
+    path = os.path.abspath(path)
+    if fresh and os.path.exists(path):
+        os.remove(path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    return path
+
+
+def _hms(seconds: float) -> str:
+    s = int(round(seconds))
+    return f"{s // 3600:02d}:{(s % 3600) // 60:02d}:{s % 60:02d}"
+
+
+def _finish_order(boats: List[int], twins: Dict[int, int], rnd: random.Random, race_idx: int) -> List[int]:
+    """Ordem de chegada: gémeos chegam seguidos e alternam quem fica à frente."""
+    units: List[List[int]] = []
+    seen: set[int] = set()
+    for b in boats:
+        if b in seen:
+            continue
+        t = twins.get(b)
+        if t is not None and t in boats:
+            pair = [b, t] if race_idx % 2 == 0 else [t, b]
+            units.append(pair)
+            seen.update(pair)
+        else:
+            units.append([b])
+            seen.add(b)
+    rnd.shuffle(units)
+    return [b for u in units for b in u]
+
+
+def _score_block(
+    order: List[int],
+    rnd: random.Random,
+    code_rate: float,
+    n_plus_one: int,
+) -> Dict[int, tuple]:
+    """{boat: (position, points, code)} de uma fleet/race One Design, já normalizado."""
+    coded = {b: rnd.choice(CODE_MIX) for b in order if rnd.random() < code_rate}
+    out: Dict[int, tuple] = {}
+    pos = 1
+    for b in order:
+        if b not in coded:
+            out[b] = (pos, float(pos), None)
+            pos += 1
+    # AUTO N+1: empatados na melhor posição do bloco unranked
+    for b in order:
+        if b in coded:
+            out[b] = (pos, float(n_plus_one), coded[b])
+    return out
+
+
+def _score_handicap(
+    order: List[int],
+    rnd: random.Random,
+    spec: RegattaSpec,
+    n_plus_one: int,
+) -> Dict[int, tuple]:
+    """{boat: (position, points, code, corrected_seconds)} com empates por tempo igual."""
+    coded = {b: rnd.choice(CODE_MIX) for b in order if rnd.random() < spec.code_rate}
+    times: List[tuple] = []
+    t = 3600.0
+    for b in order:
+        if b in coded:
+            continue
+        if times and rnd.random() < spec.tie_rate:
+            times.append((b, times[-1][1]))
+        else:
+            t += rnd.uniform(1.0, 40.0)
+            times.append((b, round(t)))
+
+    out: Dict[int, tuple] = {}
+    pos = 1
+    i = 0
+    while i < len(times):
+        j = i
+        while j < len(times) and times[j][1] == times[i][1]:
+            j += 1
+        pts = sum(range(pos, pos + (j - i))) / (j - i)
+        for k in range(i, j):
+            out[times[k][0]] = (pos, float(pts), None, times[k][1])
+        pos += j - i
+        i = j
+    for b in order:
+        if b in coded:
+            out[b] = (pos, float(n_plus_one), coded[b], None)
+    return out
+
+
+def generate_regatta(db, spec: RegattaSpec) -> GeneratedRegatta:
+    """Cria a regata na sessão `db` e faz commit. Determinístico para o mesmo `seed`."""
+    from sqlalchemy import insert
+
+    from app import models
+    from app.scoring.handicap import parse_time_to_seconds
+    from app.utils.identity import identity_key
+
+    rnd = random.Random(spec.seed)
+
+    org = db.query(models.Organization).filter_by(slug="bench").first()
+    if org is None:
+        org = models.Organization(name="Bench", slug="bench")
+        db.add(org)
+        db.flush()
+
+    reg = models.Regatta(
+        organization_id=org.id,
+        name=f"Bench regatta (seed {spec.seed})",
+        discard_count=spec.discard_count,
+        discard_threshold=spec.discard_threshold,
+        scoring_codes={},
+    )
+    db.add(reg)
+    db.flush()
+
+    class_names = [f"C{i + 1:02d}" for i in range(spec.classes)]
+    handicap = set(class_names[len(class_names) - spec.handicap_classes:]) if spec.handicap_classes else set()
+    out = GeneratedRegatta(regatta_id=int(reg.id), class_names=class_names, handicap_classes=sorted(handicap))
+
+    result_rows: List[dict] = []
+    for cls in class_names:
+        is_handicap = cls in handicap
+        db.add(models.RegattaClass(
+            regatta_id=reg.id,
+            class_name=cls,
+            class_type="handicap" if is_handicap else "one_design",
+        ))
+
+        entries = [
+            models.Entry(
+                regatta_id=reg.id,
+                class_name=cls,
+                sail_number=str(100 + i),
+                boat_country_code=rnd.choice(("POR", "ESP", "FRA")),
+                boat_name=f"{cls} boat {i}",
+                first_name=f"F{i}",
+                last_name=f"L{i}",
+                club="Bench YC",
+                rating=round(rnd.uniform(0.9, 1.2), 3) if is_handicap else None,
+                paid=True,
+                confirmed=True,
+            )
+            for i in range(spec.boats_per_class)
+        ]
+        db.add_all(entries)
+        db.flush()
+        boats = list(range(len(entries)))
+
+        # pares gémeos (empates no total)
+        twins: Dict[int, int] = {}
+        n_twins = int(len(boats) * spec.tie_rate) // 2
+        pool = rnd.sample(boats, n_twins * 2)
+        for k in range(n_twins):
+            a, b = pool[2 * k], pool[2 * k + 1]
+            twins[a], twins[b] = b, a
+
+        # fleet set de qualificação
+        fleet_of: Dict[int, Optional[int]] = {b: None for b in boats}
+        qual_fs_id: Optional[int] = None
+        if spec.fleets >= 2 and not is_handicap:
+            fs = models.FleetSet(regatta_id=reg.id, class_name=cls, phase="qualifying", label="Qualifying")
+            db.add(fs)
+            db.flush()
+            fleets = [models.Fleet(fleet_set_id=fs.id, name=name, order_index=i)
+                      for i, name in enumerate(("Yellow", "Blue", "Red", "Green", "White", "Black")[: spec.fleets])]
+            db.add_all(fleets)
+            db.flush()
+            order = boats[:]
+            rnd.shuffle(order)
+            assignments = []
+            for i, b in enumerate(order):
+                f = fleets[i % len(fleets)]
+                fleet_of[b] = int(f.id)
+                assignments.append(models.FleetAssignment(fleet_set_id=fs.id, fleet_id=f.id, entry_id=entries[b].id))
+            db.add_all(assignments)
+            qual_fs_id = int(fs.id)
+
+        n_fleet_races = spec.races - (1 if spec.medal_race and not is_handicap else 0)
+        race_ids: List[int] = []
+        for r_idx in range(n_fleet_races):
+            race = models.Race(
+                regatta_id=reg.id,
+                name=f"R{r_idx + 1}",
+                class_name=cls,
+                order_index=r_idx + 1,
+                fleet_set_id=qual_fs_id,
+                start_time="12:00:00" if is_handicap else None,
+                handicap_method="manual" if is_handicap else None,
+            )
+            db.add(race)
+            db.flush()
+            race_ids.append(int(race.id))
+
+            groups: Dict[Optional[int], List[int]] = {}
+            for b in boats:
+                groups.setdefault(fleet_of[b], []).append(b)
+
+            for group in groups.values():
+                order = _finish_order(group, twins, rnd, r_idx)
+                n1 = len(group) + 1
+                scored = _score_handicap(order, rnd, spec, n1) if is_handicap else _score_block(order, rnd, spec.code_rate, n1)
+                for b, vals in scored.items():
+                    e = entries[b]
+                    pos, pts, code = vals[0], vals[1], vals[2]
+                    row = dict(
+                        regatta_id=reg.id,
+                        race_id=race.id,
+                        sail_number=e.sail_number,
+                        boat_country_code=e.boat_country_code,
+                        boat_name=e.boat_name,
+                        class_name=cls,
+                        skipper_name=f"{e.first_name} {e.last_name}",
+                        position=pos,
+                        finish_position=None if code else pos,
+                        points=pts,
+                        code=code,
+                        code_shifts_places=False,
+                    )
+                    if is_handicap:
+                        ct = vals[3]
+                        row.update(
+                            rating=e.rating,
+                            corrected_time=_hms(ct) if ct is not None else None,
+                            elapsed_time=_hms(ct / (e.rating or 1.0)) if ct is not None else None,
+                            finish_time=_hms(12 * 3600 + ct / (e.rating or 1.0)) if ct is not None else None,
+                        )
+                    result_rows.append(row)
+
+        # medal race: 10 barcos, pontos a dobrar no overall
+        if spec.medal_race and not is_handicap:
+            fs = models.FleetSet(regatta_id=reg.id, class_name=cls, phase="medal", label="Medal")
+            db.add(fs)
+            db.flush()
+            fleet = models.Fleet(fleet_set_id=fs.id, name="Medal", order_index=0)
+            db.add(fleet)
+            db.flush()
+            medal_boats = rnd.sample(boats, min(MEDAL_FLEET_SIZE, len(boats)))
+            db.add_all([
+                models.FleetAssignment(fleet_set_id=fs.id, fleet_id=fleet.id, entry_id=entries[b].id)
+                for b in medal_boats
+            ])
+            race = models.Race(
+                regatta_id=reg.id,
+                name="MR",
+                class_name=cls,
+                order_index=spec.races,
+                is_medal_race=True,
+                discardable=False,
+                fleet_set_id=fs.id,
+            )
+            db.add(race)
+            db.flush()
+            race_ids.append(int(race.id))
+            scored = _score_block(_finish_order(medal_boats, {}, rnd, 0), rnd, spec.code_rate, len(medal_boats) + 1)
+            for b, (pos, pts, code) in scored.items():
+                e = entries[b]
+                result_rows.append(dict(
+                    regatta_id=reg.id,
+                    race_id=race.id,
+                    sail_number=e.sail_number,
+                    boat_country_code=e.boat_country_code,
+                    boat_name=e.boat_name,
+                    class_name=cls,
+                    skipper_name=f"{e.first_name} {e.last_name}",
+                    position=pos,
+                    finish_position=None if code else pos,
+                    points=pts,
+                    code=code,
+                    code_shifts_places=False,
+                ))
+
+        out.race_ids_by_class[cls] = race_ids
+
+    if result_rows:
+        # o insert Core não passa pelos listeners do ORM: identity_key e *_seconds à mão
+        for row in result_rows:
+            row["identity_key"] = identity_key(row["class_name"], row["sail_number"], row["boat_country_code"])
+            for time_col in ("finish_time", "elapsed_time", "corrected_time"):
+                if time_col in row:
+                    row[time_col.replace("_time", "_seconds")] = parse_time_to_seconds(row[time_col])
+        db.execute(insert(models.Result), result_rows)
+    out.results = len(result_rows)
+    db.commit()
+    return out
+
+
+def create_schema() -> None:
+    from app import models  # o import regista as tabelas no Base
+    from app.database import engine
+
+    models.Base.metadata.create_all(bind=engine)
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    d = RegattaSpec()
+    parser.add_argument("--classes", type=int, default=d.classes)
+    parser.add_argument("--boats", type=int, default=d.boats_per_class, help="boats per class")
+    parser.add_argument("--races", type=int, default=d.races)
+    parser.add_argument("--fleets", type=int, default=d.fleets, help=">= 2 creates a qualifying fleet set")
+    parser.add_argument("--medal", action="store_true", help="add a medal race (top 10)")
+    parser.add_argument("--handicap-classes", type=int, default=d.handicap_classes)
+    parser.add_argument("--code-rate", type=float, default=d.code_rate)
+    parser.add_argument("--tie-rate", type=float, default=d.tie_rate)
+    parser.add_argument("--seed", type=int, default=d.seed)
+
+
+def spec_from_args(args: argparse.Namespace) -> RegattaSpec:
+    return RegattaSpec(
+        classes=args.classes,
+        boats_per_class=args.boats,
+        races=args.races,
+        fleets=args.fleets,
+        medal_race=args.medal,
+        handicap_classes=args.handicap_classes,
+        code_rate=args.code_rate,
+        tie_rate=args.tie_rate,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a SQLite DB with a synthetic regatta.")
+    parser.add_argument("--db", default="bench.db", help="SQLite file (recreated)")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    path = use_database(args.db)
+    create_schema()
+
+    from app.database import SessionLocal
+
+    spec = spec_from_args(args)
+    db = SessionLocal()
+    try:
+        gen = generate_regatta(db, spec)
+    finally:
+        db.close()
+    print(f"DB: {path}")
+    print(f"spec: {asdict(spec)}")
+    print(f"regatta_id={gen.regatta_id} classes={gen.class_names} results={gen.results}")
+
+
+if __name__ == "__main__":
+    main()
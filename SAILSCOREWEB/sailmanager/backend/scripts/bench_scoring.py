@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Benchmarks locais dos hot paths de scoring (tempo + nº de statements SQL).
+
+Gera uma regata sintética por cenário numa DB SQLite temporária (scripts/bench_regatta_generator.py)
+e mede, por cenário:
+
+  overall_full            get_overall_results_data (uma classe, cálculo completo)
+  overall_regatta         get_overall_results_data sem classe (todas as classes)
+  overall_cached          get_overall_results_cached (hit na cache de standings)
+  overall_by_class        build_overall_states_by_class (todas as classes)
+  normalize_race_results  normalize_race_results de uma race (já normalizada: nada a gravar)
+  normalize_rescore       normalize_race_results com todas as linhas a mudar (UPDATE em bulk)
+  normalize_rescore_orm   o mesmo pelo caminho antigo por objetos ORM (só aqui, para comparação)
+  create_results_for_race POST /races/{id}/results (bulk save de uma race)
+  compute_handicap_ranking  ranking por corrected_time (puro)
+  sort_overall_rows       ordenação + tiebreaks do overall (puro)
+
+Uso:
+  python scripts/bench_scoring.py                          # cenários por defeito, imprime tabela
+  python scripts/bench_scoring.py --scenario large --repeat 10
+  python scripts/bench_scoring.py --save-baseline          # grava scripts/bench_baseline.json
+  python scripts/bench_scoring.py --compare                # compara com o baseline; exit 1 se regressão
+  python scripts/bench_scoring.py --check-kernel           # paridade NumPy vs Python; exit 1 se diferir
+  python scripts/bench_scoring.py --check-queries          # nº de queries do snapshot fixo (1 vs N classes)
+
+Uma regressão é: tempo mínimo acima de baseline * (1 + --threshold) (e mais de --min-delta-ms),
+com o baseline escalado pela calibração (carga fixa medida antes de cada cenário),
+ou MAIS statements SQL do que no baseline (estes são determinísticos).
+Os tempos dependem da máquina: comparar só com baselines gravados na mesma máquina
+(o bench_baseline.json do repo é de uma VM com 1 CPU e serve sobretudo pelos statements).
+Em máquinas ruidosas o default de +50% evita falsos positivos; numa máquina calma
+pode-se apertar (ex.: --threshold 0.15 --repeat 15).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_regatta_generator import (  # noqa: E402
+    RegattaSpec,
+    add_spec_arguments,
+    create_schema,
+    generate_regatta,
+    spec_from_args,
+    use_database,
+)
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "bench_baseline.json"
+
+SCENARIOS: Dict[str, RegattaSpec] = {
+    "small": RegattaSpec(classes=2, boats_per_class=30, races=8),
+    "fleets": RegattaSpec(classes=2, boats_per_class=120, races=10, fleets=3, medal_race=True),
+    "handicap": RegattaSpec(classes=2, boats_per_class=60, races=8, handicap_classes=2, tie_rate=0.2),
+    "large": RegattaSpec(classes=6, boats_per_class=80, races=12, fleets=2, medal_race=True, handicap_classes=1),
+    "race150": RegattaSpec(classes=1, boats_per_class=150, races=4),
+}
+DEFAULT_SCENARIOS = ("small", "fleets", "handicap", "race150")
+
+
+class StatementCounter:
+    def __init__(self, engine) -> None:
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+def _measure(
+    fn: Callable[[], Any],
+    counter: StatementCounter,
+    repeat: int,
+    setup: Optional[Callable[[], None]] = None,
+) -> Dict[str, Any]:
+    # 1 volta de aquecimento (imports lazy, caches do SQLAlchemy, page cache do SQLite)
+    if setup is not None:
+        setup()
+    fn()
+
+    fn_times: List[float] = []
+    statements: List[int] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        before = counter.count
+        t0 = time.perf_counter()
+        fn()
+        fn_times.append((time.perf_counter() - t0) * 1000.0)
+        statements.append(counter.count - before)
+    return {
+        "median_ms": round(statistics.median(fn_times), 3),
+        "min_ms": round(min(fn_times), 3),
+        "statements": statements[-1],
+    }
+
+
+def calibrate(repeat: int = 15) -> float:
+    """
+    Tempo mínimo (ms) de uma carga fixa em Python puro (dicts, sort, floats, strings),
+    parecida com o scoring. Serve para descontar a velocidade da máquina no --compare.
+    """
+    times: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        acc: Dict[str, List[float]] = {}
+        for i in range(20000):
+            acc.setdefault(f"k{i % 500}", []).append((i * 7919) % 101 / 3.0)
+        rows = sorted(((sum(v), k) for k, v in acc.items()), reverse=True)
+        _ = [f"{k}:{v:.1f}" for v, k in rows]
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return round(min(times), 3)
+
+
+def _normalize_race_results_orm(db, race) -> None:
+    """O normalize_race_results antigo (objetos ORM + flush por linha), só como referência."""
+    from app import models
+    from app.routes.results_utils import (
+        _build_competitor_context_for_race,
+        get_scoring_map,
+        normalize_result_rows,
+        race_class_is_handicap,
+    )
+    from app.services.standings_cache import mark_results_changed
+
+    mark_results_changed(db, race.regatta_id, race_id=race.id)
+    scoring_map = get_scoring_map(db, int(race.regatta_id), str(race.class_name or ""))
+    ctx = _build_competitor_context_for_race(db, race)
+    is_handicap = race_class_is_handicap(db, race)
+    rows = (
+        db.query(models.Result)
+        .filter(models.Result.race_id == int(race.id))
+        .order_by(models.Result.position.asc(), models.Result.id.asc())
+        .all()
+    )
+    normalize_result_rows(rows, race, scoring_map, ctx, is_handicap=is_handicap)
+
+
+def run_scenario(spec: RegattaSpec, repeat: int, counter: StatementCounter) -> Dict[str, Dict[str, Any]]:
+    """Gera a regata do cenário (na DB de benchmark) e corre os benchmarks. {bench: métricas}."""
+    from types import SimpleNamespace
+
+    from sqlalchemy import or_, update
+
+    from app import models, schemas
+    from app.database import SessionLocal
+    from app.routes import results_overall as ro
+    from app.routes.results_race import create_results_for_race
+    from app.routes.results_utils import (
+        _parse_time_to_seconds,
+        compute_handicap_ranking,
+        normalize_race_results,
+    )
+    from app.scoring.tiebreakers import sort_overall_rows
+    from app.services import standings_cache
+
+    db = SessionLocal()
+    gen = generate_regatta(db, spec)
+    rid = gen.regatta_id
+
+    one_design = [c for c in gen.class_names if c not in gen.handicap_classes]
+    main_class = one_design[0] if one_design else gen.class_names[0]
+    main_race_id = gen.race_ids_by_class[main_class][0]
+    user = SimpleNamespace(role="platform_admin", organization_id=None, id=0)
+
+    out: Dict[str, Dict[str, Any]] = {}
+
+    def cold() -> None:
+        standings_cache.clear_cache()
+        db.expire_all()
+
+    out["overall_full"] = _measure(
+        lambda: ro.get_overall_results_data(rid, main_class, False, db), counter, repeat, cold
+    )
+    out["overall_regatta"] = _measure(
+        lambda: ro.get_overall_results_data(rid, None, False, db), counter, repeat, cold
+    )
+    ro.get_overall_results_cached(rid, main_class, False, db)
+    out["overall_cached"] = _measure(
+        lambda: ro.get_overall_results_cached(rid, main_class, False, db), counter, repeat
+    )
+    out["overall_by_class"] = _measure(
+        lambda: ro.build_overall_states_by_class(rid, None, False, db), counter, repeat, cold
+    )
+
+    race = db.query(models.Race).filter_by(id=main_race_id).one()
+
+    def normalize() -> None:
+        normalize_race_results(db, race)
+        db.flush()
+
+    out["normalize_race_results"] = _measure(normalize, counter, repeat, db.rollback)
+
+    def scramble() -> None:
+        # ordem invertida, pontos a zero e 1/3 sem finish_position: o normalize regrava
+        # tudo, com conjuntos de colunas alteradas diferentes (como numa edição real)
+        db.rollback()
+        db.execute(
+            update(models.Result)
+            .where(models.Result.race_id == main_race_id)
+            .values(position=10000 - models.Result.position, points=0.0)
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            update(models.Result)
+            .where(models.Result.race_id == main_race_id, models.Result.id % 3 == 0)
+            .values(finish_position=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.expire_all()
+
+    out["normalize_rescore"] = _measure(normalize, counter, repeat, scramble)
+
+    def normalize_orm() -> None:
+        _normalize_race_results_orm(db, race)
+        db.flush()
+
+    out["normalize_rescore_orm"] = _measure(normalize_orm, counter, repeat, scramble)
+    db.rollback()
+
+    # bulk save com o mesmo conteúdo que já está na DB (idempotente entre repetições)
+    rows = (
+        db.query(models.Result)
+        .filter(
+            models.Result.race_id == main_race_id,
+            or_(models.Result.code.is_(None), models.Result.code != "DNC"),
+        )
+        .order_by(models.Result.position.asc(), models.Result.id.asc())
+        .all()
+    )
+    payload = [
+        schemas.ResultCreate(
+            regatta_id=rid,
+            race_id=main_race_id,
+            sail_number=r.sail_number,
+            boat_country_code=r.boat_country_code or "POR",
+            boat_name=r.boat_name,
+            helm_name=r.skipper_name,
+            position=r.position,
+            points=None if r.code else r.points,
+            code=r.code,
+        )
+        for r in rows
+    ]
+    db.rollback()
+    out["create_results_for_race"] = _measure(
+        lambda: create_results_for_race(main_race_id, payload, db, user, "all"), counter, repeat
+    )
+
+    # puros (sem DB): dados do maior grupo da regata
+    hc = gen.handicap_classes[0] if gen.handicap_classes else None
+    if hc:
+        items = [
+            (_parse_time_to_seconds(ct), code, False)
+            for ct, code in db.query(models.Result.corrected_time, models.Result.code)
+            .filter(models.Result.race_id == gen.race_ids_by_class[hc][0])
+            .all()
+        ]
+    else:
+        items = [(3600.0 + (i * 7) % 900, None, False) for i in range(spec.boats_per_class)]
+    out["compute_handicap_ranking"] = _measure(
+        lambda: compute_handicap_ranking(items, len(items)), counter, max(repeat, 20)
+    )
+
+    state = ro.build_overall_state(rid, main_class, False, db)
+    ctx = state.ctx
+    if ctx is not None:
+        rows_in = list(state.rows_by_key.values())
+        row_key = lambda r: (str(r.get("class_name") or ""), ro._sc_key(r.get("sail_number"), r.get("boat_country_code")))  # noqa: E731
+        medal_ids = sorted(ctx.medal_race_ids_by_class.get(main_class, set())) or None
+        medal_sails = ctx.medal_sail_set_by_class.get(main_class) or None
+        out["sort_overall_rows"] = _measure(
+            lambda: sort_overall_rows(
+                rows_in,
+                ordered_race_ids=ctx.race_ids,
+                results_by_key=state.per_race_map,
+                key_of_row=row_key,
+                medal_race_ids=medal_ids,
+                medal_sail_set=medal_sails,
+                sail_number_of_row=lambda r: ro._sc_key(r.get("sail_number"), r.get("boat_country_code")),
+            ),
+            counter,
+            max(repeat, 20),
+        )
+
+    db.close()
+    return out
+
+
+def _plain(value: Any) -> Any:
+    # payloads comparáveis: dicts ordenados, datas em string
+    return json.loads(json.dumps(value, sort_keys=True, default=str))
+
+
+def check_kernel_parity(spec: RegattaSpec) -> List[str]:
+    """
+    Corre o overall (por classe, regata inteira e multi-classe) e o motor de handicap com
+    SCORING_KERNEL=python e =numpy sobre a mesma regata; devolve as diferenças (vazia = ok).
+    """
+    from app import models
+    from app.database import SessionLocal
+    from app.routes import results_overall as ro
+    from app.scoring import handicap, matrix_kernel
+    from app.services import scoring_pool, standings_cache
+
+    if matrix_kernel.np is None:
+        return ["numpy is not installed: the kernel path cannot be checked"]
+
+    db = SessionLocal()
+    gen = generate_regatta(db, spec)
+    rid = gen.regatta_id
+
+    handicap_races = [
+        [(r.elapsed_seconds, r.rating) for r in db.query(models.Result).filter_by(race_id=race_id).order_by(models.Result.id)]
+        for cls in gen.handicap_classes
+        for race_id in gen.race_ids_by_class[cls]
+    ]
+
+    def run(kernel: str) -> Dict[str, Any]:
+        matrix_kernel.SCORING_KERNEL = kernel
+        handicap.SCORING_KERNEL = kernel
+        standings_cache.clear_cache()
+        db.expire_all()
+        out: Dict[str, Any] = {}
+        for public in (False, True):
+            out[f"regatta/public={public}"] = ro.get_overall_results_data(rid, None, public, db)
+            for cls in gen.class_names:
+                out[f"{cls}/public={public}"] = ro.get_overall_results_data(rid, cls, public, db)
+        states = ro.build_overall_states_by_class(rid, None, False, db)
+        out["by_class"] = {cls: st.payload for cls, st in states.items()}
+        for i, rows in enumerate(handicap_races):
+            corrected = handicap.correct_elapsed_times([e for e, _ in rows], [r for _, r in rows])
+            out[f"handicap/{i}"] = {"corrected": corrected, "ranking": handicap.rank_corrected_times(corrected)}
+        return _plain(out)
+
+    saved = (matrix_kernel.SCORING_KERNEL, handicap.SCORING_KERNEL, scoring_pool.OVERALL_POOL_KIND)
+    # em série: os workers do pool não veriam o kernel trocado aqui
+    scoring_pool.OVERALL_POOL_KIND = "off"
+    try:
+        python_out = run("python")
+        numpy_out = run("numpy")
+    finally:
+        matrix_kernel.SCORING_KERNEL, handicap.SCORING_KERNEL, scoring_pool.OVERALL_POOL_KIND = saved
+        db.close()
+
+    return [
+        f"{name}: numpy result differs from python"
+        for name in python_out
+        if python_out[name] != numpy_out.get(name)
+    ]
+
+
+def check_snapshot_queries(spec: RegattaSpec, counter: StatementCounter) -> List[str]:
+    """
+    O snapshot de scoring (e o overall multi-classe por cima dele) tem de fazer o mesmo
+    nº de statements SQL com 1 classe e com `spec.classes`; devolve as diferenças.
+    """
+    from app.database import SessionLocal
+    from app.routes import results_overall as ro
+    from app.services.scoring_snapshot import load_scoring_snapshot
+
+    probes: Dict[str, Callable[[Any, int], Any]] = {
+        "load_scoring_snapshot": lambda db, rid: load_scoring_snapshot(db, rid),
+        "build_overall_states_by_class": lambda db, rid: ro.build_overall_states_by_class(rid, None, False, db),
+    }
+    counts: Dict[int, Dict[str, int]] = {}
+    for classes in sorted({1, max(spec.classes, 2)}):
+        db = SessionLocal()
+        rid = generate_regatta(db, replace(spec, classes=classes, handicap_classes=0)).regatta_id
+        counts[classes] = {}
+        for name, probe in probes.items():
+            db.expire_all()
+            before = counter.count
+            probe(db, rid)
+            counts[classes][name] = counter.count - before
+        db.close()
+
+    one, many = sorted(counts)
+    return [
+        f"{name}: {counts[one][name]} statements with {one} class, {counts[many][name]} with {many}"
+        for name in probes
+        if counts[one][name] != counts[many][name]
+    ]
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_delta_ms: float,
+) -> List[str]:
+    """Linhas de regressão (vazia = ok). Tempos do baseline escalados pela calibração."""
+    problems: List[str] = []
+    for scen, benches in current["scenarios"].items():
+        base_benches = baseline.get("scenarios", {}).get(scen)
+        if not base_benches:
+            continue
+        scale = _calibration_scale(current, baseline, scen)
+        for bench, m in benches.items():
+            b = base_benches.get(bench)
+            if not b:
+                continue
+            # o mínimo é o menos sensível a ruído (GC, outros processos)
+            expected = b["min_ms"] * scale
+            delta = m["min_ms"] - expected
+            if m["min_ms"] > expected * (1 + threshold) and delta > min_delta_ms:
+                problems.append(
+                    f"{scen}/{bench}: min {m['min_ms']:.2f} ms vs baseline {expected:.2f} ms "
+                    f"(+{delta / expected * 100:.0f}%)"
+                )
+            if m["statements"] > b["statements"]:
+                problems.append(
+                    f"{scen}/{bench}: {m['statements']} SQL statements vs baseline {b['statements']}"
+                )
+    return problems
+
+
+def _calibration_scale(current: Dict[str, Any], baseline: Dict[str, Any], scenario: str) -> float:
+    """Quão mais lenta está a máquina agora do que no baseline (calibração por cenário)."""
+    cur = current.get("calibration_ms", {}).get(scenario)
+    base = baseline.get("calibration_ms", {}).get(scenario)
+    return cur / base if cur and base else 1.0
+
+
+def _print_table(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    print(f"{'scenario/bench':<40} {'median ms':>10} {'min ms':>9} {'stmts':>6}  {'min vs base':>12}")
+    for scen, benches in report["scenarios"].items():
+        scale = _calibration_scale(report, baseline, scen) if baseline else 1.0
+        for bench, m in benches.items():
+            vs = ""
+            b = (baseline or {}).get("scenarios", {}).get(scen, {}).get(bench)
+            if b and b["min_ms"]:
+                vs = f"{(m['min_ms'] / (b['min_ms'] * scale) - 1) * 100:+.0f}%"
+                if m["statements"] != b["statements"]:
+                    vs += f" ({b['statements']} st)"
+            print(f"{scen + '/' + bench:<40} {m['median_ms']:>10.2f} {m['min_ms']:>9.2f} {m['statements']:>6}  {vs:>12}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scoring hot paths.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS) + ["custom"],
+                        help=f"repeatable (default: {', '.join(DEFAULT_SCENARIOS)}); 'custom' uses the flags below")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--compare", action="store_true", help="exit 1 if a benchmark regressed vs --baseline")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown of the min time (0.5 = +50%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--json", type=Path, help="also write the report to this file")
+    parser.add_argument("--check-queries", action="store_true",
+                        help="no timings: check that the scoring snapshot makes as many statements for 1 class as for N (exit 1 if not)")
+    parser.add_argument("--check-kernel", action="store_true",
+                        help="no timings: check that SCORING_KERNEL=numpy gives the same payloads as python (exit 1 if not)")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    names = args.scenario or list(DEFAULT_SCENARIOS)
+    specs = {n: (spec_from_args(args) if n == "custom" else replace(SCENARIOS[n], seed=args.seed)) for n in names}
+
+    # uma DB nova por run; cada cenário cria a sua regata
+    workdir = tempfile.mkdtemp(prefix="sailscore_bench_")
+    use_database(os.path.join(workdir, "bench.db"))
+    create_schema()
+
+    if args.check_kernel:
+        failures = 0
+        for name, spec in specs.items():
+            problems = check_kernel_parity(spec)
+            print(f"{name}: {'OK' if not problems else 'FAILED'}")
+            for p in problems:
+                print("  " + p)
+            failures += bool(problems)
+        return 1 if failures else 0
+
+    from app.database import engine
+
+    counter = StatementCounter(engine)
+
+    if args.check_queries:
+        failures = 0
+        for name, spec in specs.items():
+            problems = check_snapshot_queries(spec, counter)
+            print(f"{name}: {'OK' if not problems else 'FAILED'}")
+            for p in problems:
+                print("  " + p)
+            failures += bool(problems)
+        return 1 if failures else 0
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "specs": {n: asdict(s) for n, s in specs.items()},
+        },
+        # velocidade da máquina medida antes de cada cenário (desconta drift entre runs)
+        "calibration_ms": {},
+        "scenarios": {},
+    }
+    for name, spec in specs.items():
+        print(f"# {name}: {asdict(spec)}", file=sys.stderr)
+        report["calibration_ms"][name] = calibrate()
+        report["scenarios"][name] = run_scenario(spec, args.repeat, counter)
+
+    baseline = None
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    _print_table(report, baseline)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline written to {args.baseline}")
+
+    if args.compare:
+        if baseline is None:
+            print(f"no baseline at {args.baseline}", file=sys.stderr)
+            return 2
+        problems = compare(report, baseline, args.threshold, args.min_delta_ms)
+        if problems:
+            print("\nREGRESSIONS:")
+            for p in problems:
+                print("  " + p)
+            return 1
+        print("\nno regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
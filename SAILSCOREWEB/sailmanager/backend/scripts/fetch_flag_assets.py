@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Descarrega as bandeiras usadas nos PDFs de resultados (CODE_TO_ALPHA2 de
+app/services/results_pdf.py) para app/assets/flags/{alpha2}.png.
+
+Com os PNGs locais, os PDFs não dependem do flagcdn em runtime (ver
+app/services/pdf_images.py). Corre-se à mão (com rede) quando entra um país novo
+em CODE_TO_ALPHA2 e os PNGs são commitados: o build da imagem não vai à rede.
+As que já existem não são descarregadas outra vez (--force para refazer); sai com
+código 1 se alguma falhar. --check só lista as que faltam (sem rede).
+
+Uso:
+  python scripts/fetch_flag_assets.py
+  python scripts/fetch_flag_assets.py --force
+  python scripts/fetch_flag_assets.py --check
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.pdf_images import FLAG_ASSETS_DIR, FLAG_URL_TEMPLATE  # noqa: E402
+from app.services.results_pdf import CODE_TO_ALPHA2  # noqa: E402
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="descarregar mesmo as que já existem")
+    parser.add_argument("--check", action="store_true", help="só listar as que faltam (código 1 se faltar alguma)")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    wanted = sorted({a.lower() for a in CODE_TO_ALPHA2.values()})
+    if args.check:
+        missing = [a for a in wanted if not (FLAG_ASSETS_DIR / f"{a}.png").is_file()]
+        print(f"flags: {len(wanted) - len(missing)}/{len(wanted)} em {FLAG_ASSETS_DIR}")
+        if missing:
+            print("em falta: " + " ".join(missing), file=sys.stderr)
+        return 1 if missing else 0
+
+    FLAG_ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+    failed: list[str] = []
+    fetched = 0
+    for alpha2 in wanted:
+        path = FLAG_ASSETS_DIR / f"{alpha2}.png"
+        if path.is_file() and not args.force:
+            continue
+        url = FLAG_URL_TEMPLATE.format(alpha2=alpha2)
+        try:
+            req = urllib.request.Request(url, headers={"User-Agent": "SailScore/1.0"})
+            with urllib.request.urlopen(req, timeout=args.timeout) as resp:
+                data = resp.read()
+        except Exception as e:
+            print(f"{alpha2}: {e}", file=sys.stderr)
+            failed.append(alpha2)
+            continue
+        if not data.startswith(_PNG_SIGNATURE):
+            print(f"{alpha2}: resposta não é PNG ({len(data)} bytes)", file=sys.stderr)
+            failed.append(alpha2)
+            continue
+        tmp = path.with_suffix(".png.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        fetched += 1
+
+    print(f"flags: {fetched} descarregadas, {len(failed)} falharam -> {FLAG_ASSETS_DIR}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -67,6 +67,18 @@ function pause(minMs, maxMs) {
   sleep(ms / 1000);
 }
 
+// ETags por VU: os browsers revalidam com If-None-Match e recebem 304 se nada mudou.
+const etags = {};
+
+function revalidatingGet(url, params) {
+  const headers = etags[url] ? { 'If-None-Match': etags[url] } : {};
+  const res = http.get(url, Object.assign({}, params, { headers }));
+  if (res.status === 200 && res.headers['Etag']) {
+    etags[url] = res.headers['Etag'];
+  }
+  return res;
+}
+
 function uniqueSailNumber() {
   const vu = __VU.toString(36).toUpperCase().padStart(2, '0');
   const iter = __ITER.toString(36).toUpperCase().padStart(4, '0');
@@ -132,10 +144,10 @@ export function sailorSigningUp() {
 // ============================================================================
 export function publicBrowser() {
   // Sequência típica: header → entry list → notice board → results
-  const r1 = http.get(`${BASE_URL}/entries/by_regatta/${REGATTA_ID}?include_waiting=1`, {
+  const r1 = revalidatingGet(`${BASE_URL}/entries/by_regatta/${REGATTA_ID}?include_waiting=1`, {
     tags: { group: 'browser_get_entries' },
   });
-  check(r1, { 'browser GET entries 200': (r) => r.status === 200 });
+  check(r1, { 'browser GET entries 200/304': (r) => r.status === 200 || r.status === 304 });
   pause(2000, 6000);
 
   const r2 = http.get(`${BASE_URL}/regattas/${REGATTA_ID}`, {